@@ -2,6 +2,9 @@
 ASGI config for trainersamay project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the project through it (for example ``uvicorn TrainerSamay.asgi:application``)
+to enable the ``/api/events/`` live update stream, which holds one connection
+open per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
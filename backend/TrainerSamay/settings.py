@@ -88,6 +88,10 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Zone in which trainers' weekly availability windows are interpreted when
+# the server validates session slots.
+SCHEDULING_TIME_ZONE = os.getenv('SCHEDULING_TIME_ZONE', TIME_ZONE)
+
 # --- Static Files ---
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
@@ -155,6 +159,84 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 CSRF_TRUSTED_ORIGINS.extend(CORS_ALLOWED_ORIGINS)
 
+# --- Caches ---
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trainersamay-default',
+    },
+    # Token-to-user resolutions. Revocations must reach every worker, so
+    # CachedTokenAuthentication only caches on a shared backend: set
+    # AUTH_TOKEN_CACHE_DIR to share entries between the workers of one host,
+    # or point the alias at another shared cache. On locmem it is disabled.
+    'auth': (
+        {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('AUTH_TOKEN_CACHE_DIR'),
+            'OPTIONS': {'MAX_ENTRIES': int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))},
+        }
+        if os.getenv('AUTH_TOKEN_CACHE_DIR')
+        else {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'trainersamay-auth',
+        }
+    ),
+    # Serialized responses of read-mostly list views. Set RESPONSE_CACHE_DIR
+    # to share entries and hit/miss counters between local worker processes;
+    # file-based increments are not atomic, so the counters are approximate.
+    'responses': (
+        {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('RESPONSE_CACHE_DIR'),
+        }
+        if os.getenv('RESPONSE_CACHE_DIR')
+        else {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'trainersamay-responses',
+        }
+    ),
+}
+
+AUTH_TOKEN_CACHE_ALIAS = 'auth'
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '300'))
+
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '600'))
+
+# --- Calendar Feeds ---
+# Days before and after today covered by the trainers' .ics feeds, and how
+# long rendered VEVENT blocks are kept in the response cache.
+CALENDAR_FEED_PAST_DAYS = int(os.getenv('CALENDAR_FEED_PAST_DAYS', '30'))
+CALENDAR_FEED_FUTURE_DAYS = int(os.getenv('CALENDAR_FEED_FUTURE_DAYS', '180'))
+CALENDAR_EVENT_CACHE_TTL = int(os.getenv('CALENDAR_EVENT_CACHE_TTL', str(7 * 24 * 3600)))
+
+# --- Live Updates ---
+# Broker fanning change events out to /api/events/ streams. The default
+# only reaches streams of the same process; with several ASGI workers use a
+# class relaying through a shared broker (see core.live_events.LocalBroker).
+LIVE_EVENTS_BROKER = os.getenv('LIVE_EVENTS_BROKER', 'core.live_events.LocalBroker')
+LIVE_EVENTS_QUEUE_SIZE = int(os.getenv('LIVE_EVENTS_QUEUE_SIZE', '256'))
+LIVE_EVENTS_HEARTBEAT = int(os.getenv('LIVE_EVENTS_HEARTBEAT', '15'))
+
+# --- Login Tokens ---
+# 'db' issues permanent DRF tokens; 'signed' issues short-lived HMAC-signed
+# access tokens plus refresh tokens, verified without a database lookup.
+AUTH_TOKEN_MODE = os.getenv('AUTH_TOKEN_MODE', 'db')
+SIGNED_ACCESS_TOKEN_TTL = int(os.getenv('SIGNED_ACCESS_TOKEN_TTL', '900'))
+SIGNED_REFRESH_TOKEN_TTL = int(os.getenv('SIGNED_REFRESH_TOKEN_TTL', str(14 * 24 * 3600)))
+# Deny-list for logouts and forced revocation. Signed mode refuses to start
+# on a process-local cache: set AUTH_DENY_CACHE_DIR to share it between the
+# workers of one host and keep it across restarts, or point the alias at
+# another shared cache.
+if os.getenv('AUTH_DENY_CACHE_DIR'):
+    CACHES['deny'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('AUTH_DENY_CACHE_DIR'),
+        # Culling would forget revocations; keep far more than are ever live.
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    }
+AUTH_DENY_CACHE_ALIAS = 'deny' if os.getenv('AUTH_DENY_CACHE_DIR') else 'default'
+
 # --- Custom User Model ---
 AUTH_USER_MODEL = 'core.User'
 
@@ -168,9 +250,16 @@ AUTHENTICATION_BACKENDS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'core.signed_tokens.SignedTokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Uses orjson when installed (requirements-optional.txt); the same JSON
+    # either way, up to the spelling of very small or large floats.
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
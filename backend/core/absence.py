@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import live_events
+from core.models import Session, SessionSeries
+from core.recurrence import occurrence_session, occurrences, stored_occurrences
+from core.rollups import apply_deltas, created_deltas, grouped_deltas, merge_deltas
+from core.versioning import bump, session_scopes
+
+# Sessions up to an hour long wait half their duration; longer ones wait 30
+# minutes. No session ever waits longer than this.
+MAX_WAITING = timedelta(minutes=30)
+
+
+def waiting_minutes(duration):
+    return duration * 0.5 if duration <= 60 else 30
+
+
+def mark_absent_sessions(now=None):
+    """
+    Mark overdue ``Scheduled`` sessions as ``Absent`` and return how many rows changed.
+
+    Everything that started more than ``MAX_WAITING`` ago is overdue whatever
+    its duration, so it is flipped with a single set-based UPDATE. Only the
+    last ``MAX_WAITING`` of sessions needs the per-duration cutoff, and that
+    window is small enough to resolve from ``(id, date, duration)`` tuples
+    before a second UPDATE by primary key.
+
+    Stored sessions are never bounded by the previous sweep: rows created,
+    imported, moved or reset with a past date become overdue long after the
+    sweep passed their start. After a sweep only the last ``MAX_WAITING`` of
+    the ``(status, date)`` index holds past ``Scheduled`` rows, so the full
+    range stays cheap to scan.
+
+    The affected rows are aggregated per rollup bucket in the same transaction
+    and moved from ``Scheduled`` to ``Absent`` in the daily rollup table.
+
+    Overdue untouched occurrences of recurring series are stored as ``Absent``
+    exceptions with one ``bulk_create`` and count towards the total. Only
+    series with occurrences past their ``sweptThrough`` mark are expanded,
+    from that mark on, and the mark then moves to ``now - MAX_WAITING``, so
+    finished series cost nothing however many pile up.
+    """
+    now = now or timezone.now()
+    window_start = now - MAX_WAITING
+
+    scheduled = Session.objects.filter(status='Scheduled', date__lt=now)
+
+    with transaction.atomic():
+        long_overdue = scheduled.filter(date__lt=window_start)
+        moved = grouped_deltas(long_overdue, status='Absent')
+        updated = long_overdue.update(status='Absent')
+
+        recent = scheduled.filter(date__gte=window_start, duration__lte=60)
+        overdue_ids = [
+            pk for pk, date, duration in recent.values_list('id', 'date', 'duration')
+            if now > date + timedelta(minutes=waiting_minutes(duration))
+        ]
+        if overdue_ids:
+            recent_overdue = Session.objects.filter(id__in=overdue_ids, status='Scheduled')
+            moved = merge_deltas(moved, grouped_deltas(recent_overdue, status='Absent'))
+            updated += recent_overdue.update(status='Absent')
+
+        pending = list(
+            SessionSeries.objects.filter(start__lt=now)
+            .filter(Q(sweptThrough__isnull=True) | Q(lastStart__gte=F('sweptThrough')))
+        )
+        marks = [series.sweptThrough for series in pending]
+        stored = stored_occurrences(
+            [series.id for series in pending], None if None in marks else min(marks, default=None), now
+        )
+        overdue = [
+            occurrence_session(series, moment)
+            for series in pending
+            for moment in occurrences(series, series.sweptThrough, now)
+            if (series.id, moment) not in stored
+            and now > moment + timedelta(minutes=waiting_minutes(series.duration))
+        ]
+        if pending:
+            # Everything before the window has waited its longest and is stored now.
+            SessionSeries.objects.filter(id__in=[series.id for series in pending]).update(sweptThrough=window_start)
+        if overdue:
+            unscheduled = created_deltas(overdue, sign=-1)
+            for session in overdue:
+                session.status = 'Absent'
+            Session.objects.bulk_create(overdue)
+            moved = merge_deltas(moved, unscheduled, created_deltas(overdue))
+            updated += len(overdue)
+
+        apply_deltas(moved)
+        if updated:
+            trainer_ids = {trainer_id for trainer_id, *_ in moved}
+            bump(*session_scopes(*trainer_ids))
+            live_events.sessions_changed(trainer_ids, 'absence-sweep')
+
+    return updated
@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import User, Session, Availability
+from .models import User, Session, SessionRollup, SessionSeries, Availability
 
 admin.site.register(User)
 admin.site.register(Session)
+admin.site.register(SessionRollup)
+admin.site.register(SessionSeries)
 admin.site.register(Availability)
@@ -1,9 +1,9 @@
 from rest_framework.authtoken.views import ObtainAuthToken
-from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth import authenticate
 from core.serializers import UserSerializer
+from core.signed_tokens import issue_tokens
 
 class ObtainAuthTokenByEmail(ObtainAuthToken):
     def post(self, request, *args, **kwargs):
@@ -20,9 +20,8 @@ class ObtainAuthTokenByEmail(ObtainAuthToken):
                 {"detail": "Invalid email or password."},
                 status=status.HTTP_401_UNAUTHORIZED
             )
-        token, _ = Token.objects.get_or_create(user=user)
         user_data = UserSerializer(user).data
         return Response({
-            "token": token.key,
+            **issue_tokens(user),
             "user": user_data
         }, status=status.HTTP_200_OK)
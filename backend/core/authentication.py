@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.signed_tokens import PROCESS_LOCAL_CACHES
+
+TOKEN_CACHE_PREFIX = 'auth:token:'
+
+
+def token_cache():
+    return caches[getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')]
+
+
+def token_cache_shared():
+    """Whether an invalidation reaches every worker that may hold an entry."""
+    alias = getattr(settings, 'AUTH_TOKEN_CACHE_ALIAS', 'default')
+    return settings.CACHES.get(alias, {}).get('BACKEND') not in PROCESS_LOCAL_CACHES
+
+
+def token_cache_key(key):
+    return f"{TOKEN_CACHE_PREFIX}{key}"
+
+
+def forget_tokens(*keys):
+    """Drop cached resolutions for the given token keys."""
+    token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in ``TokenAuthentication`` that caches token-to-user resolution.
+
+    The resolved token, with its user attached, is kept in the
+    ``AUTH_TOKEN_CACHE_ALIAS`` cache for ``AUTH_TOKEN_CACHE_TTL`` seconds, so
+    a warm request authenticates without touching the database. Entries are
+    dropped by the signal handlers in ``core.signals`` when the token is
+    deleted or its user is saved, which covers deactivation and password
+    changes. Those deletes only reach the process that runs them, so on a
+    process-local backend caching stays off and every request is resolved
+    against the database exactly like ``TokenAuthentication``.
+    """
+
+    def authenticate_credentials(self, key):
+        if not token_cache_shared():
+            return super().authenticate_credentials(key)
+
+        cache = token_cache()
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return (cached.user, cached)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, token, timeout=getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300))
+        return (user, token)
@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from core.occupancy import OccupancyIndex
+
+NO_SLOT = "No eligible trainer has a free slot in the requested window."
+
+
+class AutoScheduler:
+    """
+    Propose trainer assignments for a batch of session requests.
+
+    Each request carries ``duration``, ``windowStart``/``windowEnd`` and
+    optionally a ``trainers`` shortlist; ``location`` is only copied onto the
+    created session, since rooms are not booked resources here. The solver
+    works on the occupancy bitmaps of ``core.occupancy``:
+
+    1. Requests are ordered most-constrained first: fewest trainers that can
+       take them at all, then earliest window end.
+    2. Each request goes to the eligible trainer with the least booked minutes
+       in the planning window, at that trainer's earliest free slot, and the
+       slot is booked so later requests see it.
+    3. Requests left over are repaired with one-step ejection: a request
+       already placed on a trainer whose slot intersects the leftover's window
+       is moved to another trainer if that frees room for the leftover.
+    """
+
+    def __init__(self, trainer_ids, requests, step=15):
+        self.trainer_ids = list(trainer_ids)
+        self.requests = requests
+        self.step = step
+        self.assignments = {}
+        self.eligible = [self.shortlisted(request.get('trainers')) for request in requests]
+
+        self.window_start = min(r['windowStart'] for r in requests)
+        self.window_end = max(r['windowEnd'] for r in requests)
+        self.index = OccupancyIndex.load(self.trainer_ids, self.window_start, self.window_end)
+        self.load = {
+            trainer_id: sum(
+                duration for start, duration in self.index.sessions[trainer_id]
+                if self.window_start <= start < self.window_end
+            )
+            for trainer_id in self.trainer_ids
+        }
+
+    def shortlisted(self, shortlist):
+        if not shortlist:
+            return self.trainer_ids
+        shortlist = set(shortlist)
+        return [trainer_id for trainer_id in self.trainer_ids if trainer_id in shortlist]
+
+    def earliest_slot(self, trainer_id, request):
+        slots = self.index.free_slots(
+            trainer_id, request['windowStart'], request['windowEnd'], request['duration'], self.step, limit=1
+        )
+        return slots[0][0] if slots else None
+
+    def best_choice(self, position):
+        # Trainers are tried in order of load, so the search can stop at the
+        # first load level that has any free slot.
+        request = self.requests[position]
+        best = None
+        for trainer_id in sorted(self.eligible[position], key=self.load.__getitem__):
+            if best is not None and self.load[trainer_id] > best[0]:
+                break
+            start = self.earliest_slot(trainer_id, request)
+            if start is not None:
+                candidate = (self.load[trainer_id], start, trainer_id)
+                if best is None or candidate < best:
+                    best = candidate
+        return (best[2], best[1]) if best else None
+
+    def assign(self, position, trainer_id, start):
+        duration = self.requests[position]['duration']
+        self.index.book(trainer_id, start, duration)
+        self.load[trainer_id] += duration
+        self.assignments[position] = (trainer_id, start)
+
+    def release(self, position):
+        trainer_id, start = self.assignments.pop(position)
+        duration = self.requests[position]['duration']
+        self.index.unbook(trainer_id, start, duration)
+        self.load[trainer_id] -= duration
+        return trainer_id, start
+
+    def repair(self, position):
+        request = self.requests[position]
+        for trainer_id in self.eligible[position]:
+            for other, (assigned_to, start) in list(self.assignments.items()):
+                end = start + timedelta(minutes=self.requests[other]['duration'])
+                if assigned_to != trainer_id or start >= request['windowEnd'] or end <= request['windowStart']:
+                    continue
+                self.release(other)
+                slot = self.earliest_slot(trainer_id, request)
+                if slot is not None:
+                    self.assign(position, trainer_id, slot)
+                    alternative = self.best_choice(other)
+                    if alternative is not None:
+                        self.assign(other, *alternative)
+                        return True
+                    self.release(position)
+                self.assign(other, trainer_id, start)
+        return False
+
+    def feasible_trainers(self, position):
+        """Number of eligible trainers with any free slot for a request before anything is assigned."""
+        request = self.requests[position]
+        key = (request['windowStart'], request['windowEnd'], request['duration'], tuple(request.get('trainers') or ()))
+        if key not in self._feasible:
+            self._feasible[key] = sum(
+                1 for trainer_id in self.eligible[position]
+                if self.earliest_slot(trainer_id, request) is not None
+            )
+        return self._feasible[key]
+
+    def solve(self):
+        """Return ``(assignments, unassigned)``: ``{position: (trainer_id, start)}`` and a list of positions."""
+        self._feasible = {}
+        feasible = {position: self.feasible_trainers(position) for position in range(len(self.requests))}
+        order = sorted(
+            range(len(self.requests)),
+            key=lambda p: (feasible[p], self.requests[p]['windowEnd'], self.requests[p]['windowStart']),
+        )
+
+        unassigned = []
+        for position in order:
+            if not feasible[position]:
+                unassigned.append(position)
+                continue
+            choice = self.best_choice(position)
+            if choice is None:
+                unassigned.append(position)
+            else:
+                self.assign(position, *choice)
+
+        unassigned = [position for position in unassigned if not self.repair(position)]
+        return self.assignments, sorted(unassigned)
@@ -0,0 +1,124 @@
+import base64
+import binascii
+import hashlib
+import io
+
+from django.db import transaction
+from django.utils.crypto import salted_hmac
+
+from core.models import UserAvatar
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it only the original is stored.
+    Image = None
+
+AVATAR_SALT = 'core.avatars'
+MAX_AVATAR_BYTES = 5 * 1024 * 1024
+
+# Square thumbnail edge length in pixels, per size variant.
+THUMBNAIL_SIZES = {'small': 48, 'medium': 160}
+AVATAR_SIZES = ('original',) + tuple(THUMBNAIL_SIZES)
+
+
+def parse_data_uri(value):
+    """
+    Split an inline ``data:image/...;base64,...`` avatar into ``(content_type, bytes)``.
+
+    Returns ``None`` when ``value`` is not a data URI and raises ``ValueError``
+    when it is one but cannot be used as an avatar.
+    """
+    if not isinstance(value, str) or not value.startswith('data:'):
+        return None
+    header, _, payload = value[5:].partition(',')
+    content_type, *params = header.split(';')
+    if not content_type.startswith('image/') or 'base64' not in params:
+        raise ValueError('Avatar must be a base64-encoded image.')
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('Avatar is not valid base64.')
+    if len(data) > MAX_AVATAR_BYTES:
+        raise ValueError(f'Avatar must be at most {MAX_AVATAR_BYTES // (1024 * 1024)} MB.')
+    return content_type, data
+
+
+def data_uri(content_type, data):
+    return f"data:{content_type};base64,{base64.b64encode(data).decode()}"
+
+
+def thumbnail(data, edge):
+    """Square ``edge``-pixel thumbnail of ``data`` as ``(content_type, bytes)``, or ``None`` if it cannot be decoded."""
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+            image = ImageOps.fit(image.convert('RGBA' if has_alpha else 'RGB'), (edge, edge), Image.LANCZOS)
+            out = io.BytesIO()
+            if has_alpha:
+                image.save(out, 'PNG', optimize=True)
+                return 'image/png', out.getvalue()
+            image.save(out, 'JPEG', quality=85, optimize=True)
+            return 'image/jpeg', out.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def render_variants(content_type, data):
+    """``{size: (content_type, bytes)}`` for an uploaded image; thumbnails only when Pillow can read it."""
+    variants = {'original': (content_type, data)}
+    if Image is not None:
+        for size, edge in THUMBNAIL_SIZES.items():
+            rendered = thumbnail(data, edge)
+            if rendered is not None:
+                variants[size] = rendered
+    return variants
+
+
+def variant_rows(model, user_id, content_type, data):
+    """Unsaved ``model`` rows for every variant of one upload."""
+    return [
+        model(user_id=user_id, size=size, contentType=kind, etag=hashlib.sha1(blob).hexdigest(), data=blob)
+        for size, (kind, blob) in render_variants(content_type, data).items()
+    ]
+
+
+@transaction.atomic
+def store_avatar(user, content_type, data):
+    """Replace ``user``'s stored avatar and move its URL to a new version."""
+    UserAvatar.objects.filter(user=user).delete()
+    UserAvatar.objects.bulk_create(variant_rows(UserAvatar, user.pk, content_type, data))
+    user.avatar = None
+    user.avatarVersion += 1
+    user.save(update_fields=['avatar', 'avatarVersion'])
+
+
+@transaction.atomic
+def clear_avatar(user):
+    """Drop ``user``'s stored avatar so the ``avatar`` column (a URL or nothing) is used again."""
+    if user.avatarVersion:
+        UserAvatar.objects.filter(user=user).delete()
+        user.avatarVersion = 0
+        user.save(update_fields=['avatarVersion'])
+
+
+def avatar_key(user_id, version):
+    """
+    Secret path segment of a stored avatar's URL.
+
+    Derived from ``SECRET_KEY``, so avatars cannot be fetched by walking user
+    ids; each upload bumps ``version`` and so moves the URL as well.
+    """
+    return salted_hmac(AVATAR_SALT, f'{user_id}:{version}').hexdigest()[:20]
+
+
+def stored_avatar_path(user_id, version):
+    return f"/api/users/{user_id}/avatar/{avatar_key(user_id, version)}"
+
+
+def avatar_url(user, request=None):
+    """URL clients should load ``user``'s avatar from, or ``None`` when there is none."""
+    if not user.avatarVersion:
+        return user.avatar or None
+    url = stored_avatar_path(user.pk, user.avatarVersion)
+    return request.build_absolute_uri(url) if request is not None else url
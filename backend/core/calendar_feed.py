@@ -0,0 +1,178 @@
+import hashlib
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from core.models import Session, SessionSeries
+from core.recurrence import overlapping_series, virtual_sessions
+from core.response_cache import response_cache
+
+FEED_SALT = 'core.calendar_feed'
+EVENT_PREFIX = 'calendar:event:'
+FEED_PREFIX = 'calendar:feed:'
+UID_DOMAIN = 'trainersamay'
+
+EVENT_COLUMNS = ('id', 'batch', 'sessionType', 'date', 'duration', 'location', 'status', 'series_id', 'occurrence')
+CANCELLED_STATUSES = frozenset({'Cancelled'})
+
+
+# --- tokens ------------------------------------------------------------------
+
+def feed_key(user):
+    """
+    Short secret derived from ``user``'s password hash.
+
+    Calendar clients keep a feed URL for months, so feed tokens do not expire;
+    changing the password changes this key and so revokes every URL handed out.
+    """
+    return salted_hmac(FEED_SALT, f'{user.pk}:{user.password}').hexdigest()[:16]
+
+
+def make_feed_token(user):
+    return signing.dumps({'uid': user.pk, 'key': feed_key(user)}, salt=FEED_SALT)
+
+
+def read_feed_token(token):
+    """The ``{'uid', 'key'}`` payload of a feed token, or ``None`` when its signature is bad."""
+    try:
+        return signing.loads(token, salt=FEED_SALT)
+    except signing.BadSignature:
+        return None
+
+
+def token_matches(payload, user):
+    return constant_time_compare(payload.get('key', ''), feed_key(user))
+
+
+# --- window ------------------------------------------------------------------
+
+def feed_window(now=None):
+    """
+    ``[start, end)`` covered by the feed, in whole UTC days around ``now``.
+
+    The window only moves at midnight, so a feed stays cacheable all day.
+    """
+    today = (now or timezone.now()).astimezone(dt_timezone.utc).date()
+    start = datetime.combine(today - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS), time(), tzinfo=dt_timezone.utc)
+    end = datetime.combine(today + timedelta(days=settings.CALENDAR_FEED_FUTURE_DAYS), time(), tzinfo=dt_timezone.utc)
+    return start, end
+
+
+# --- rendering ---------------------------------------------------------------
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545, section 3.3.11)."""
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Split a content line into CRLF-joined parts of at most 75 octets, without breaking a character."""
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > 75:
+            parts.append(''.join(current))
+            current, size = [' '], 1
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n'.join(parts)
+
+
+def format_utc(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_uid(row):
+    """
+    Stable UID of a feed row.
+
+    Exceptions share the UID of the occurrence they replace, so a client
+    sees a moved or cancelled occurrence as the same event changing.
+    """
+    if row['series_id'] is not None and row['occurrence'] is not None:
+        return f"series-{row['series_id']}-{format_utc(row['occurrence'])}@{UID_DOMAIN}"
+    return f"session-{row['id']}@{UID_DOMAIN}"
+
+
+def render_event(row, stamp):
+    """One ``VEVENT`` block for a session row, ``DTSTAMP``-ed with when it was rendered."""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{event_uid(row)}',
+        f'DTSTAMP:{format_utc(stamp)}',
+        f"DTSTART:{format_utc(row['date'])}",
+        f"DTEND:{format_utc(row['date'] + timedelta(minutes=row['duration']))}",
+        f"SUMMARY:{escape_text(row['sessionType'])} - {escape_text(row['batch'])}",
+        f"LOCATION:{escape_text(row['location'])}",
+        f"DESCRIPTION:{escape_text('Status: ' + row['status'])}",
+        f"STATUS:{'CANCELLED' if row['status'] in CANCELLED_STATUSES else 'CONFIRMED'}",
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) + '\r\n' for line in lines)
+
+
+def event_key(row):
+    """Cache key of a row's block; any change to the row gives a new key, so nothing needs invalidating."""
+    fingerprint = '|'.join(
+        value.isoformat() if isinstance(value, datetime) else str(value)
+        for value in (row[column] for column in EVENT_COLUMNS)
+    )
+    return EVENT_PREFIX + hashlib.sha1(fingerprint.encode()).hexdigest()
+
+
+def feed_rows(trainer_id, start, end):
+    """Stored sessions and untouched series occurrences of a trainer starting in ``[start, end)``, by start."""
+    rows = [
+        dict(zip(EVENT_COLUMNS, values))
+        for values in Session.objects.filter(trainer_id=trainer_id, date__gte=start, date__lt=end)
+        .values_list(*EVENT_COLUMNS)
+    ]
+    series = overlapping_series(SessionSeries.objects.filter(trainer_id=trainer_id), start, end)
+    rows += [
+        {column: getattr(session, column) for column in EVENT_COLUMNS}
+        for session in virtual_sessions(series, start, end)
+    ]
+    rows.sort(key=lambda row: (row['date'], event_uid(row)))
+    return rows
+
+
+def render_calendar(trainer, start, end):
+    """
+    The ``VCALENDAR`` text of ``trainer``'s feed over ``[start, end)``.
+
+    ``VEVENT`` blocks are cached per row content in the response cache and
+    fetched with one ``get_many``, so regenerating a feed after a change
+    renders only the sessions that changed.
+    """
+    rows = feed_rows(trainer.pk, start, end)
+    keys = [event_key(row) for row in rows]
+    cache = response_cache()
+    blocks = cache.get_many(keys)
+    rendered = {}
+    now = timezone.now()
+    for key, row in zip(keys, rows):
+        if key not in blocks:
+            rendered[key] = blocks[key] = render_event(row, now)
+    if rendered:
+        cache.set_many(rendered, timeout=settings.CALENDAR_EVENT_CACHE_TTL)
+
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//TrainerSamay//Trainer schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(trainer.name)} - TrainerSamay',
+        'REFRESH-INTERVAL;VALUE=DURATION:PT15M',
+        'X-PUBLISHED-TTL:PT15M',
+    ]
+    return ''.join(
+        [fold(line) + '\r\n' for line in header] + [blocks[key] for key in keys] + ['END:VCALENDAR\r\n']
+    )
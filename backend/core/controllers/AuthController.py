@@ -4,8 +4,10 @@ from rest_framework import status
 from rest_framework.permissions import AllowAny
 from django.contrib.auth.hashers import check_password
 from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
 from core.models import User
 from core.serializers import UserSerializer
+from core.signed_tokens import REFRESH_SALT, deny, issue_tokens, read_token, signed_mode
 
 
 class AuthController(APIView):
@@ -35,11 +37,52 @@ class AuthController(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
         data = UserSerializer(user).data
 
         return Response({
             'user': data,
-            'token': token.key,
+            **issue_tokens(user),
             'message': 'Login successful'
         }, status=status.HTTP_200_OK)
+
+
+class TokenRefreshController(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        if not signed_mode():
+            return Response(
+                {'message': 'Token refresh is only available with signed tokens.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        refresh_token = request.data.get('refreshToken')
+        if not refresh_token:
+            return Response({'message': 'refreshToken is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload = read_token(refresh_token, REFRESH_SALT)
+        user = User.objects.filter(id=payload['uid'], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        # Refresh tokens are single-use: the presented one is retired and a
+        # new pair is issued with the user's current role.
+        deny(payload)
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+class LogoutController(APIView):
+    def post(self, request):
+        if isinstance(request.auth, dict):
+            deny(request.auth)
+        elif isinstance(request.auth, Token):
+            # Deleting it also drops the cached resolution (core.signals).
+            Token.objects.filter(key=request.auth.key).delete()
+        refresh_token = request.data.get('refreshToken')
+        if refresh_token:
+            try:
+                deny(read_token(refresh_token, REFRESH_SALT))
+            except AuthenticationFailed:
+                pass
+        return Response({'message': 'Logged out.'}, status=status.HTTP_200_OK)
@@ -1,21 +1,51 @@
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from core import live_events
+from core.filters import parse_id
 from core.models import Availability, User
-from core.serializers import AvailabilitySerializer, UserSerializer
+from core.serializers import AvailabilitySerializer, UserSerializer, WeeklyScheduleSerializer
+from django.db import connection, transaction
+from core.fast_serializers import (
+    AvailabilityValuesSerializer,
+    UserValuesSerializer,
+    ValuesListMixin,
+    requested_expansions,
+    split_param,
+)
+from core.response_cache import CachedListMixin
+from core.versioning import ConditionalGetMixin, availability_scopes, bump
 from django.shortcuts import get_object_or_404
 
 
-class AvailabilityListController(generics.ListAPIView):
+class AvailabilityListController(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     queryset = Availability.objects.all()
     serializer_class = AvailabilitySerializer
+    values_serializer_class = AvailabilityValuesSerializer
 
+    def version_scopes(self):
+        scopes = ['availabilities']
+        if 'trainer' in requested_expansions(self.request):
+            scopes.append('users')
+        return scopes
+
+
+class TrainerAvailabilitiesController(ConditionalGetMixin, APIView):
+    def version_scopes(self):
+        # Scoped by the parsed id: writes bump ``7``, so ``07`` must read the same stamp.
+        scopes = [f"availabilities:trainer:{parse_id(self.kwargs['trainerId'], 'trainerId')}"]
+        if 'trainer' in requested_expansions(self.request):
+            scopes.append('users')
+        return scopes
 
-class TrainerAvailabilitiesController(APIView):
     def get(self, request, trainerId):
-        avails = Availability.objects.filter(trainer__id=trainerId)
-        serializer = AvailabilitySerializer(avails, many=True)
-        return Response(serializer.data)
+        serializer = AvailabilityValuesSerializer(
+            context={'request': request},
+            only=split_param(request.query_params.get('fields')),
+            expand=split_param(request.query_params.get('expand')),
+        )
+        avails = serializer.prepare(Availability.objects.filter(trainer__id=parse_id(trainerId, 'trainerId')))
+        return Response(serializer.serialize(avails))
 
     def put(self, request, trainerId):
         trainer = get_object_or_404(User, id=trainerId)
@@ -26,19 +56,62 @@ class TrainerAvailabilitiesController(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        Availability.objects.filter(trainer=trainer).delete()
+        schedule = WeeklyScheduleSerializer(data=request.data)
+        schedule.is_valid(raise_exception=True)
 
-        for a in request.data:
-            Availability.objects.create(
-                trainer=trainer,
-                day=a.get("day"),
-                startTime=a.get("startTime"),
-                endTime=a.get("endTime")
-            )
+        with transaction.atomic():
+            apply_weekly_schedule(trainer, schedule.validated_data)
 
         return Response({"success": True}, status=status.HTTP_200_OK)
 
 
-class AllTrainersController(generics.ListAPIView):
+def apply_weekly_schedule(trainer, entries):
+    """
+    Bring a trainer's stored availability in line with ``entries``.
+
+    Days that disappeared are removed with one DELETE, and new or changed days
+    are written with one bulk upsert on ``(trainer, day)``. Days whose times
+    did not change are not touched, so re-saving an unchanged schedule issues
+    no writes. Returns ``True`` when anything was written.
+    """
+    stored = {
+        a.day: a for a in Availability.objects.select_for_update().filter(trainer=trainer)
+    }
+    incoming = {entry['day']: entry for entry in entries}
+
+    removed = [day for day in stored if day not in incoming]
+    upserts = [
+        Availability(trainer=trainer, day=day, startTime=entry['startTime'], endTime=entry['endTime'])
+        for day, entry in incoming.items()
+        if day not in stored
+        or (stored[day].startTime, stored[day].endTime) != (entry['startTime'], entry['endTime'])
+    ]
+
+    if removed or upserts:
+        bump(*availability_scopes(trainer.id))
+    if removed:
+        Availability.objects.filter(trainer=trainer, day__in=removed).delete()
+    if upserts:
+        # MySQL upserts on any unique key and rejects an explicit target.
+        unique_fields = (
+            ['trainer', 'day'] if connection.features.supports_update_conflicts_with_target else None
+        )
+        Availability.objects.bulk_create(
+            upserts,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['startTime', 'endTime'],
+        )
+        # The upsert sends no signals; deleted days were announced by theirs.
+        for availability in upserts:
+            live_events.availability_saved(availability)
+    return bool(removed or upserts)
+
+
+class AllTrainersController(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     queryset = User.objects.filter(role="trainer")
     serializer_class = UserSerializer
+    values_serializer_class = UserValuesSerializer
+
+    def version_scopes(self):
+        return ['users']
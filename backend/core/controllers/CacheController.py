@@ -0,0 +1,20 @@
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.permissions import IsAdminRole
+from core.response_cache import cache_stats, counter_accuracy
+
+
+class CacheStatsController(APIView):
+    """
+    Hit/miss counters of the response cache, per cached view.
+
+    ``counters`` tells how they were kept (see ``counter_accuracy``): with
+    the default in-memory cache each worker counts only the requests it
+    served, and with ``RESPONSE_CACHE_DIR`` the workers share counters but
+    concurrent increments can be lost. Use them as a trend, not a total.
+    """
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        return Response({'views': cache_stats(), 'counters': counter_accuracy()})
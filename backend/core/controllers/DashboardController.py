@@ -0,0 +1,60 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.models import Availability, Session, SessionSeries, User
+from core.recurrence import overlapping_series, virtual_sessions
+from core.serializers import AvailabilitySerializer, SessionSerializer
+
+ROSTER_FIELDS = ('id', 'name', 'email', 'role', 'is_active')
+
+
+class DashboardController(APIView):
+    """
+    Everything the home dashboard needs in one response.
+
+    Returns the caller's sessions from the start of today up to ``days`` ahead
+    (default 30), the trainer roster without avatars or other heavy columns,
+    and availabilities. Admins see every trainer; trainers only see
+    themselves. Each part is a single query, plus two for the untouched
+    occurrences of recurring series, which are merged into the sessions.
+    """
+    default_days = 30
+    max_days = 366
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get('days', self.default_days))
+        except ValueError:
+            return Response({'days': 'Must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(1, min(days, self.max_days))
+
+        start = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        end = start + timedelta(days=days)
+        sessions = Session.objects.filter(date__gte=start, date__lt=end)
+        series = overlapping_series(SessionSeries.objects.all(), start, end)
+        roster = User.objects.filter(role='trainer')
+        availabilities = Availability.objects.all()
+
+        if request.user.role != 'admin':
+            sessions = sessions.filter(trainer=request.user)
+            series = series.filter(trainer=request.user)
+            roster = roster.filter(id=request.user.id)
+            availabilities = availabilities.filter(trainer=request.user)
+
+        sessions = list(sessions.order_by('date', 'id'))
+        occurrences = virtual_sessions(series, start, end)
+        if occurrences:
+            sessions = sorted(
+                sessions + occurrences,
+                key=lambda session: (session.date, session.id if session.id is not None else -session.series_id),
+            )
+
+        return Response({
+            'sessions': SessionSerializer(sessions, many=True).data,
+            'trainers': list(roster.order_by('name').values(*ROSTER_FIELDS)),
+            'availabilities': AvailabilitySerializer(availabilities, many=True).data,
+        })
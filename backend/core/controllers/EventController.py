@@ -0,0 +1,84 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.live_events import broker, channels_for
+
+
+def stream_user(request):
+    """
+    The user a stream request authenticates as, or ``None``.
+
+    ``EventSource`` cannot send headers, so the API token may also come as
+    ``?token=``; it is checked by the same authentication classes as the API.
+    """
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f'Token {token}'
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except exceptions.APIException:
+        return None
+    return user if user.is_authenticated and user.is_active else None
+
+
+def sse(event_type, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event_type}', f"data: {json.dumps(data, separators=(',', ':'))}"]
+    return '\n'.join(lines) + '\n\n'
+
+
+class EventStreamController(View):
+    """
+    Server-Sent Events stream of session, series and availability changes.
+
+    Trainers receive changes to their own schedule, admins every change; see
+    ``core.live_events`` for the event shapes. The stream opens with a
+    ``ready`` event, after which clients should refetch once and then patch
+    their state from events. A ``resync`` event means events were dropped
+    for a slow client and it should refetch again. Comment lines are sent
+    every ``LIVE_EVENTS_HEARTBEAT`` seconds to keep proxies from closing it.
+
+    Holding a connection open per client needs the ASGI server
+    (``TrainerSamay.asgi``); under WSGI the endpoint answers 501.
+    """
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse({'detail': 'Live updates need the ASGI server.'}, status=501)
+        user = await sync_to_async(stream_user)(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+        response = StreamingHttpResponse(self.events(channels_for(user)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Keep nginx from buffering the stream.
+        return response
+
+    async def events(self, channels):
+        # Subscribed before ``ready`` goes out, so a refetch on ``ready`` misses nothing.
+        subscription = broker().subscribe(channels)
+        try:
+            yield 'retry: 5000\n\n'
+            yield sse('ready', {'channels': channels})
+            event_id = 0
+            while True:
+                event = await subscription.get(timeout=settings.LIVE_EVENTS_HEARTBEAT)
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield sse('resync', {})
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                event_id += 1
+                yield sse(event['type'], event, event_id)
+        finally:
+            subscription.close()
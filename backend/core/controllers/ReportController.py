@@ -0,0 +1,170 @@
+import csv
+from heapq import merge
+
+from django.db.models import DateField, Q, Sum
+from django.db.models.functions import Trunc
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status as http_status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.filters import filter_rollups, filter_sessions
+from core.models import Session, SessionRollup, SessionSeries
+from core.recurrence import SeriesOccurrences
+from core.renderers import OwnMediaTypeMixin
+
+
+class Echo:
+    """File-like object whose ``write`` hands the line back to the csv writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+STATUSES = [choice for choice, _ in Session.STATUS_CHOICES]
+PERIODS = ('day', 'week', 'month')
+
+
+def scoped_sessions(request):
+    """Sessions visible to the caller, narrowed by the shared report filters."""
+    queryset = filter_sessions(Session.objects.all(), request.query_params)
+    if request.user.role != 'admin':
+        queryset = queryset.filter(trainer=request.user)
+    return queryset
+
+
+def scoped_occurrences(request):
+    """Untouched recurring series occurrences visible to the caller, narrowed by the same filters."""
+    series = SessionSeries.objects.all()
+    if request.user.role != 'admin':
+        series = series.filter(trainer=request.user)
+    return SeriesOccurrences.for_params(request.query_params, series)
+
+
+class SessionExportController(OwnMediaTypeMixin, APIView):
+    """
+    Stream the filtered session report as CSV.
+
+    Rows are read through a chunked ``values_list`` iterator joined to the
+    trainer's name, so memory stays flat however much history is exported.
+    Untouched recurring series occurrences are merged in by date.
+    """
+    chunk_size = 2000
+    columns = ('date', 'trainer__name', 'batch', 'sessionType', 'status', 'duration', 'location')
+
+    def get(self, request):
+        include_trainer = request.user.role == 'admin'
+        stored = scoped_sessions(request).order_by('-date', '-id').values_list(*self.columns)
+        occurrences = scoped_occurrences(request).rows(self.columns)[::-1]
+
+        headers = ['Date', 'Time']
+        if include_trainer:
+            headers.append('Trainer')
+        headers += ['Batch', 'Session Type', 'Status', 'Duration', 'Location', 'Notes']
+
+        writer = csv.writer(Echo())
+
+        def stream():
+            yield writer.writerow(headers)
+            rows = merge(
+                stored.iterator(chunk_size=self.chunk_size), occurrences, key=lambda row: row[0], reverse=True
+            )
+            for date, trainer_name, batch, session_type, status, duration, location in rows:
+                local = timezone.localtime(date)
+                row = [local.strftime('%Y-%m-%d'), local.strftime('%H:%M')]
+                if include_trainer:
+                    row.append(trainer_name)
+                row += [
+                    batch, session_type, status, duration, location,
+                    'Trainer was absent.' if status == 'Absent' else '',
+                ]
+                yield writer.writerow(row)
+
+        filename = f"trainersamay-detailed-report-{timezone.localdate().isoformat()}.csv"
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+def scoped_rollups(request):
+    """Daily rollup rows visible to the caller, narrowed by the shared report filters."""
+    queryset = filter_rollups(SessionRollup.objects.filter(count__gt=0), request.query_params)
+    if request.user.role != 'admin':
+        queryset = queryset.filter(trainer=request.user)
+    return queryset
+
+
+def summary_aggregates():
+    """
+    Conditional aggregates shared by every summary grouping.
+
+    Scheduled minutes cover every session that was not cancelled; delivered
+    minutes only count completed sessions.
+    """
+    aggregates = {
+        'total': Sum('count', default=0),
+        'scheduledMinutes': Sum('minutes', filter=~Q(status='Cancelled'), default=0),
+        'deliveredMinutes': Sum('minutes', filter=Q(status='Completed'), default=0),
+    }
+    for status in STATUSES:
+        aggregates[status] = Sum('count', filter=Q(status=status), default=0)
+    return aggregates
+
+
+def summary_row(row):
+    return {
+        'total': row['total'],
+        'byStatus': {status: row[status] for status in STATUSES},
+        'scheduledMinutes': row['scheduledMinutes'],
+        'deliveredMinutes': row['deliveredMinutes'],
+    }
+
+
+class ReportSummaryController(APIView):
+    """
+    Session counts by status and scheduled/delivered minutes, per trainer and per period.
+
+    Both groupings are computed with GROUP BY over the daily rollup table
+    rather than ``trainer_utilization``, and the overall totals are summed
+    from the per-trainer rows, so a report costs two small queries however
+    long the requested range is. Date bounds are applied to whole days.
+    """
+
+    def get(self, request):
+        period = request.query_params.get('period', 'month')
+        if period not in PERIODS:
+            return Response(
+                {'period': f"Must be one of: {', '.join(PERIODS)}."},
+                status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        rollups = scoped_rollups(request).order_by()
+        aggregates = summary_aggregates()
+
+        by_trainer = rollups.values('trainer', 'trainer__name').annotate(**aggregates).order_by('trainer__name')
+        by_period = (
+            rollups.annotate(period=Trunc('day', period, output_field=DateField()))
+            .values('period').annotate(**aggregates).order_by('period')
+        )
+
+        trainers = [
+            {'trainer': row['trainer'], 'trainerName': row['trainer__name'], **summary_row(row)}
+            for row in by_trainer
+        ]
+        periods = [{'period': row['period'], **summary_row(row)} for row in by_period]
+
+        totals = {'total': 0, 'byStatus': dict.fromkeys(STATUSES, 0), 'scheduledMinutes': 0, 'deliveredMinutes': 0}
+        for row in trainers:
+            totals['total'] += row['total']
+            totals['scheduledMinutes'] += row['scheduledMinutes']
+            totals['deliveredMinutes'] += row['deliveredMinutes']
+            for status in STATUSES:
+                totals['byStatus'][status] += row['byStatus'][status]
+
+        return Response({
+            'period': period,
+            'totals': totals,
+            'byTrainer': trainers,
+            'byPeriod': periods,
+        })
@@ -0,0 +1,151 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import live_events
+from core.autoschedule import NO_SLOT, AutoScheduler
+from core.filters import int_param, parse_date_bound, parse_id
+from core.models import Session, User
+from core.occupancy import OccupancyIndex
+from core.permissions import IsAdminRole
+from core.rollups import apply_deltas, created_deltas
+from core.scheduling import MAX_SESSION_MINUTES, validate_slots
+from core.serializers import AutoAssignSerializer
+from core.versioning import bump, session_scopes
+
+
+class FreeSlotsController(APIView):
+    """
+    Earliest open slots of ``duration`` minutes across all trainers, or one ``trainer``.
+
+    The search window defaults to the next seven days and is capped at
+    ``max_days``. Each trainer's availability and bookings are turned into
+    weekly minute bitmaps (see ``core.occupancy``), so the search is a few
+    bitmask operations per trainer-week.
+    """
+    default_days = 7
+    max_days = 62
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            duration = int_param(params, 'duration', None, 1, MAX_SESSION_MINUTES)
+            step = int_param(params, 'step', 15, 1, 60)
+            limit = int_param(params, 'limit', 10, 1, 100)
+        except ValueError as exc:
+            return Response({'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if duration is None:
+            return Response({'duration': 'This parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start = parse_date_bound(params['from'], 'from') if params.get('from') else timezone.now()
+        end = (
+            parse_date_bound(params['to'], 'to', end=True) if params.get('to')
+            else start + timedelta(days=self.default_days)
+        )
+        end = min(end, start + timedelta(days=self.max_days))
+        if end <= start:
+            return Response({'to': 'Must be after from.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        trainers = User.objects.filter(role='trainer', is_active=True)
+        if params.get('trainer'):
+            trainers = trainers.filter(id=parse_id(params['trainer'], 'trainer'))
+        names = dict(trainers.values_list('id', 'name'))
+
+        index = OccupancyIndex.load(list(names), start, end)
+        slots = []
+        for trainer_id, name in names.items():
+            for slot_start, slot_end in index.free_slots(trainer_id, start, end, duration, step, limit):
+                slots.append({
+                    'trainer': trainer_id,
+                    'trainerName': name,
+                    'start': slot_start,
+                    'end': slot_end,
+                })
+        slots.sort(key=lambda slot: (slot['start'], slot['trainerName']))
+
+        return Response({'duration': duration, 'slots': slots[:limit]})
+
+
+class AutoAssignController(APIView):
+    """
+    Propose, and optionally create, trainer assignments for a batch of session requests.
+
+    With ``commit`` false (the default) this is a dry run that only returns the
+    proposal. With ``commit`` true the proposed slots are re-validated and
+    written with ``bulk_create`` in one transaction; if anything changed since
+    the proposal was computed, nothing is written and 409 is returned.
+    """
+    permission_classes = [IsAdminRole]
+
+    def post(self, request):
+        serializer = AutoAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requests = serializer.validated_data['requests']
+
+        names = dict(User.objects.filter(role='trainer', is_active=True).values_list('id', 'name'))
+
+        started = time.perf_counter()
+        assignments, unassigned = AutoScheduler(names, requests, serializer.validated_data['step']).solve()
+        solve_ms = (time.perf_counter() - started) * 1000
+
+        proposals = []
+        for position, (trainer_id, start) in sorted(assignments.items()):
+            req = requests[position]
+            proposals.append({
+                'index': position,
+                'trainer': trainer_id,
+                'trainerName': names[trainer_id],
+                'batch': req['batch'],
+                'sessionType': req['sessionType'],
+                'location': req['location'],
+                'date': start,
+                'duration': req['duration'],
+            })
+
+        result = {
+            'assignments': proposals,
+            'unassigned': [{'index': position, 'reason': NO_SLOT} for position in unassigned],
+            'solveMs': round(solve_ms, 1),
+            'committed': False,
+        }
+        if not serializer.validated_data['commit'] or not proposals:
+            return Response(result)
+
+        sessions = [
+            Session(
+                trainer_id=p['trainer'],
+                batch=p['batch'],
+                sessionType=p['sessionType'],
+                date=p['date'],
+                duration=p['duration'],
+                location=p['location'],
+                status='Scheduled',
+            )
+            for p in proposals
+        ]
+        with transaction.atomic():
+            errors = validate_slots([
+                {'trainer_id': s.trainer_id, 'start': s.date, 'duration': s.duration} for s in sessions
+            ])
+            conflicts = [
+                {'index': p['index'], **error} for p, error in zip(proposals, errors) if error
+            ]
+            if conflicts:
+                return Response(
+                    {'message': 'Schedule changed while solving; nothing was created.', 'conflicts': conflicts},
+                    status=status.HTTP_409_CONFLICT
+                )
+            Session.objects.bulk_create(sessions, batch_size=500)
+            apply_deltas(created_deltas(sessions))
+            trainer_ids = {s.trainer_id for s in sessions}
+            bump(*session_scopes(*trainer_ids))
+            live_events.sessions_changed(trainer_ids, 'auto-assign')
+
+        result['committed'] = True
+        result['created'] = [s.id for s in sessions if s.id is not None]
+        return Response(result, status=status.HTTP_201_CREATED)
@@ -0,0 +1,70 @@
+from django.db import transaction
+from rest_framework import generics
+from core import live_events
+from core.filters import parse_id
+from core.models import SessionSeries
+from core.recurrence import virtual_sessions
+from core.rollups import apply_deltas, created_deltas, merge_deltas
+from core.serializers import SessionSeriesSerializer
+from core.versioning import bump, session_scopes
+
+
+class SeriesListCreateController(generics.ListCreateAPIView):
+    """
+    Recurring session series, optionally for one ``trainer``.
+
+    Creating a series stores one row however many occurrences it has; the
+    occurrences are added to the daily rollups straight away.
+    """
+    serializer_class = SessionSeriesSerializer
+
+    def get_queryset(self):
+        queryset = SessionSeries.objects.order_by('start', 'id')
+        trainer_id = self.request.query_params.get('trainer')
+        if trainer_id:
+            queryset = queryset.filter(trainer__id=parse_id(trainer_id, 'trainer'))
+        return queryset
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        # Validation locks the trainer (see validate_slots) until the series is stored.
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        series = serializer.save()
+        apply_deltas(created_deltas(virtual_sessions([series])))
+
+
+class SeriesDetailController(generics.RetrieveUpdateDestroyAPIView):
+    """
+    One series. Rescheduling it is a single-row update.
+
+    Stored exceptions stay as they are when the pattern changes. Deleting a
+    series keeps its exceptions as one-off sessions and drops the untouched
+    occurrences.
+    """
+    queryset = SessionSeries.objects.all()
+    serializer_class = SessionSeriesSerializer
+    lookup_field = 'id'
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        # Validation locks the trainer (see validate_slots) until the series is stored.
+        return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        before = created_deltas(virtual_sessions([serializer.instance]), sign=-1)
+        # The new pattern may have occurrences before the old sweep mark.
+        series = serializer.save(sweptThrough=None)
+        apply_deltas(merge_deltas(before, created_deltas(virtual_sessions([series]))))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        apply_deltas(created_deltas(virtual_sessions([instance]), sign=-1))
+        # Its stored exceptions become one-off sessions without a signal.
+        trainer_ids = set(instance.exceptions.values_list('trainer_id', flat=True))
+        bump(*session_scopes(*trainer_ids))
+        live_events.sessions_changed(trainer_ids, 'series-deleted')
+        instance.delete()
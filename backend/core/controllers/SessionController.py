@@ -1,19 +1,73 @@
-from rest_framework import generics
-from core.models import Session
-from core.serializers import SessionSerializer
+from django.db import transaction
+from rest_framework import generics, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.fast_serializers import SessionValuesSerializer, ValuesListMixin, requested_expansions
+from core.filters import filter_sessions, int_param, parse_id
+from core.models import Session, SessionSeries
+from core.pagination import SessionKeysetPagination
+from core.recurrence import SeriesOccurrences, is_occurrence, occurrence_session
+from core.permissions import IsAdminRole
+from core.rollups import record_session_change, snapshot
+from core.serializers import BulkSessionUpdateSerializer, SessionSerializer
+from core.session_bulk import BulkConflict, SessionBulkUpdate
+from core.session_import import (
+    ATOMIC, CSV, DEFAULT_CHUNK_SIZE, FORMATS, MAX_CHUNK_SIZE, MODES,
+    ImportFormatError, SessionImporter, csv_rows, detect_format, json_lines_rows,
+)
+from core.versioning import ConditionalGetMixin
 
 
-class SessionListCreateController(generics.ListCreateAPIView):
+class SessionListCreateController(ConditionalGetMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = SessionSerializer
+    values_serializer_class = SessionValuesSerializer
+    pagination_class = SessionKeysetPagination
 
-    def get_queryset(self):
+    def version_scopes(self):
         trainer_id = self.request.query_params.get('trainer')
-        if trainer_id:
-            return Session.objects.filter(trainer__id=trainer_id)
-        return Session.objects.all()
+        # Scoped by the parsed id: writes bump ``7``, so ``?trainer=07`` must read the same stamp.
+        scopes = [f"sessions:trainer:{parse_id(trainer_id, 'trainer')}"] if trainer_id else ['sessions']
+        if 'trainer' in requested_expansions(self.request):
+            scopes.append('users')
+        return scopes
+
+    def get_queryset(self):
+        return filter_sessions(Session.objects.all(), self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Stored sessions merged with the untouched occurrences of recurring series.
+
+        Occurrences are expanded only for the requested window (and, when
+        paging, only up to the end of the page), so a list costs one extra
+        query for the matching series plus one for their exceptions.
+        """
+        serializer = self.get_values_serializer()
+        queryset = serializer.prepare(self.filter_queryset(self.get_queryset()))
+        occurrences = SeriesOccurrences.for_params(request.query_params)
+        extra_rows = lambda after=None, through=None: occurrences.rows(queryset._fields, after, through)
 
+        page = self.paginator.paginate_queryset(queryset, request, view=self, extra_rows=extra_rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        rows = list(queryset)
+        extra = extra_rows()
+        if extra:
+            rows = sorted(rows + extra, key=lambda row: self.paginator.position(row, queryset))
+        return Response(serializer.serialize(rows))
+
+    @transaction.atomic
+    def create(self, request, *args, **kwargs):
+        # Validation locks the trainer (see validate_slots) until the insert commits.
+        return super().create(request, *args, **kwargs)
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save()
+        session = serializer.save()
+        # An exception takes over its occurrence's place in the rollups.
+        replaced = occurrence_session(session.series, session.occurrence) if session.series_id else None
+        record_session_change(old=snapshot(replaced) if replaced else None, new=session)
 
 
 class SessionDetailController(generics.RetrieveUpdateDestroyAPIView):
@@ -21,8 +75,105 @@ class SessionDetailController(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = SessionSerializer
     lookup_field = 'id'
 
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        # Validation locks the trainer (see validate_slots) until the update commits.
+        return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
     def perform_update(self, serializer):
-        serializer.save()
+        before = snapshot(serializer.instance)
+        session = serializer.save()
+        record_session_change(old=before, new=session)
 
+    @transaction.atomic
     def perform_destroy(self, instance):
+        # Deleting an exception brings back the untouched occurrence it replaced.
+        series = instance.series
+        restored = None
+        if series is not None and is_occurrence(series, instance.occurrence):
+            restored = occurrence_session(series, instance.occurrence)
+            # The occurrence is virtual again, so the absence sweep must look at it.
+            SessionSeries.objects.filter(id=series.id, sweptThrough__gt=instance.occurrence).update(
+                sweptThrough=instance.occurrence
+            )
+        record_session_change(old=snapshot(instance), new=restored)
         instance.delete()
+
+
+class SessionImportController(APIView):
+    """
+    Create many sessions from one CSV or JSON-lines file.
+
+    Send the file as the ``file`` field of a multipart form or as the raw
+    body (``Content-Type: text/csv`` or ``application/x-ndjson``). Either way
+    it is read line by line, never held in memory whole. ``?input=`` overrides
+    the detected format, ``?mode=`` is ``all-or-nothing`` (default) or
+    ``best-effort`` and ``?chunk=`` sets how many rows are validated and
+    inserted together. The response reports every failing row by its line
+    number; see ``core.session_import``.
+    """
+    permission_classes = [IsAdminRole]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        params = request.query_params
+        mode = params.get('mode') or ATOMIC
+        if mode not in MODES:
+            return Response({'mode': f"Must be one of: {', '.join(MODES)}."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            chunk_size = int_param(params, 'chunk', DEFAULT_CHUNK_SIZE, 1, MAX_CHUNK_SIZE)
+        except ValueError as exc:
+            return Response({'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'file': 'No file was submitted.'}, status=status.HTTP_400_BAD_REQUEST)
+            lines, detected = upload, detect_format(upload.content_type, upload.name)
+        else:
+            lines, detected = request.stream or [], detect_format(request.content_type)
+        kind = params.get('input') or detected
+        if kind not in FORMATS:
+            return Response(
+                {'input': f"Cannot tell the file format; pass ?input= with one of: {', '.join(FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            rows = csv_rows(lines) if kind == CSV else json_lines_rows(lines)
+            report = SessionImporter(mode, chunk_size).run(rows)
+        except ImportFormatError as exc:
+            return Response({'message': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not report['failed']:
+            return Response(report, status=status.HTTP_201_CREATED)
+        if not report['committed'] and mode == ATOMIC:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+
+class SessionBulkUpdateController(APIView):
+    """
+    Change the status, trainer or start time of every session matching a filter.
+
+    ``{"filter": {...}, "changes": {...}}``; see ``BulkSessionUpdateSerializer``.
+    Runs as set-based statements in one transaction (``core.session_bulk``)
+    and returns how many sessions changed. If any moved session would clash,
+    nothing is written and 409 lists the conflicts.
+    """
+    permission_classes = [IsAdminRole]
+
+    def post(self, request):
+        serializer = BulkSessionUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result = SessionBulkUpdate(
+                serializer.validated_data['filter'], serializer.validated_data['changes']
+            ).run()
+        except BulkConflict as exc:
+            return Response(
+                {'message': 'Some sessions would clash; nothing was changed.', 'conflicts': exc.conflicts},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(result)
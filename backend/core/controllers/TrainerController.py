@@ -1,8 +1,106 @@
-from rest_framework import generics
+import hashlib
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import urlencode
+from rest_framework import exceptions, generics
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.calendar_feed import (
+    FEED_PREFIX, feed_window, make_feed_token, read_feed_token, render_calendar, token_matches,
+)
 from core.models import User
+from core.renderers import OwnMediaTypeMixin
 from core.serializers import UserSerializer
+from core.fast_serializers import UserValuesSerializer, ValuesListMixin
+from core.response_cache import CachedListMixin, cached_views, count, response_cache
+from core.versioning import current, user_scopes
 
 
-class TrainerListController(generics.ListAPIView):
+class TrainerListController(CachedListMixin, ValuesListMixin, generics.ListAPIView):
     queryset = User.objects.filter(role='trainer')
     serializer_class = UserSerializer
+    values_serializer_class = UserValuesSerializer
+
+    def version_scopes(self):
+        return ['users']
+
+
+class TrainerCalendarTokenController(APIView):
+    """
+    Hand out the subscription URL of a trainer's calendar feed.
+
+    Trainers get their own; admins anyone's. The URL stays valid until the
+    trainer's password changes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id):
+        if request.user.role != 'admin' and str(request.user.pk) != str(id):
+            raise exceptions.PermissionDenied("You can only subscribe to your own calendar.")
+        trainer = User.objects.filter(id=id, is_active=True).first()
+        if trainer is None:
+            raise Http404
+        token = make_feed_token(trainer)
+        path = reverse('trainer_calendar_feed', args=[trainer.pk])
+        return Response({'token': token, 'url': request.build_absolute_uri(f"{path}?{urlencode({'token': token})}")})
+
+
+class TrainerCalendarFeedController(OwnMediaTypeMixin, APIView):
+    """
+    A trainer's sessions over a rolling window as an iCalendar feed (``?token=`` from the URL above).
+
+    Public because calendar clients send no Authorization header; the signed
+    token names the trainer. The ETag is derived from the trainer's session
+    version stamp, the user list stamp and the window, so a poll costs one
+    small query whether it ends in a 304 or in the rendered feed served from
+    the response cache. Only a poll after a change renders anything, and
+    then only the events that changed (see ``core.calendar_feed``).
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, id):
+        payload = read_feed_token(request.query_params.get('token', ''))
+        if payload is None or str(payload.get('uid')) != str(id):
+            raise exceptions.PermissionDenied("Invalid calendar token.")
+
+        start, end = feed_window()
+        scopes = [f"sessions:trainer:{payload['uid']}"] + user_scopes()
+        parts = ['calendar', str(payload['uid']), payload.get('key', ''), start.date().isoformat()]
+        parts += [f'{scope}={version}' for scope, (version, _) in sorted(current(scopes).items())]
+        digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        etag = f'"{digest}"'
+
+        if get_conditional_response(request, etag=etag) is not None:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(self.feed(payload, start, end, digest), content_type='text/calendar; charset=utf-8')
+            response['Content-Disposition'] = f'inline; filename="trainer-{payload["uid"]}.ics"'
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def feed(self, payload, start, end, digest):
+        # A password change or deactivation saves the user and moves the
+        # users stamp, so a cached feed is never served to a revoked token.
+        cache = response_cache()
+        key = f'{FEED_PREFIX}{digest}'
+        body = cache.get(key)
+        if body is not None:
+            count(type(self).__name__, 'hits')
+            return body
+
+        count(type(self).__name__, 'misses')
+        trainer = User.objects.filter(id=payload['uid'], is_active=True).first()
+        if trainer is None or not token_matches(payload, trainer):
+            raise exceptions.PermissionDenied("Invalid calendar token.")
+        body = render_calendar(trainer, start, end).encode()
+        cache.set(key, body, timeout=settings.RESPONSE_CACHE_TTL)
+        return body
+
+
+cached_views[TrainerCalendarFeedController.__name__] = TrainerCalendarFeedController
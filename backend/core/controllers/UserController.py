@@ -1,18 +1,30 @@
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from core.models import User
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from core.avatars import AVATAR_SIZES, avatar_key
+from core.fast_serializers import UserValuesSerializer, ValuesListMixin
+from core.filters import parse_id
+from core.models import User, UserAvatar
 from core.serializers import (
     UserSerializer,
     UserCreateSerializer,
     ChangePasswordSerializer
 )
+from core.versioning import ConditionalGetMixin
 
 
-class UserListCreateController(generics.ListCreateAPIView):
+class UserListCreateController(ConditionalGetMixin, ValuesListMixin, generics.ListCreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    values_serializer_class = UserValuesSerializer
+
+    def version_scopes(self):
+        return ['users']
 
     def get_queryset(self):
         role = self.request.query_params.get('role')
@@ -63,5 +75,61 @@ class CurrentUserController(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        user = request.user
+        if getattr(user, 'is_claims_only', False):
+            # Signed access tokens only carry the id and role.
+            user = User.objects.get(pk=user.pk)
+        serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class UserAvatarController(APIView):
+    """
+    Serve a stored avatar variant (``?size=original|small|medium``).
+
+    Public so it can back ``<img>`` tags, which send no Authorization header;
+    instead the URL carries an unguessable ``key`` (``core.avatars.avatar_key``)
+    and any other key gets a 404, so avatars cannot be enumerated by user id.
+    The ETag is the variant's content hash, so a revalidation is answered
+    without reading the image bytes. Sizes without a thumbnail (for example
+    when Pillow was unavailable at upload time) fall back to the original.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request, id, key):
+        try:
+            id = parse_id(id, 'id')
+        except ValidationError:
+            raise Http404
+        size = request.query_params.get('size', 'original')
+        if size not in AVATAR_SIZES:
+            return Response(
+                {'size': f"Must be one of: {', '.join(AVATAR_SIZES)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        variants = {
+            variant: (etag, version)
+            for variant, etag, version in UserAvatar.objects.filter(
+                user_id=id, size__in={size, 'original'}
+            ).values_list('size', 'etag', 'user__avatarVersion')
+        }
+        if not variants:
+            raise Http404
+        served = size if size in variants else 'original'
+        etag, version = variants[served]
+        if not constant_time_compare(key, avatar_key(id, version)):
+            raise Http404
+        etag = f'"{etag}"'
+
+        if get_conditional_response(request, etag=etag) is not None:
+            response = HttpResponseNotModified()
+        else:
+            content_type, data = UserAvatar.objects.filter(user_id=id, size=served).values_list(
+                'contentType', 'data'
+            ).get()
+            response = HttpResponse(bytes(data), content_type=content_type)
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=3600)
+        return response
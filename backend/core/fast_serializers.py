@@ -0,0 +1,277 @@
+import datetime
+
+from rest_framework import fields
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.avatars import stored_avatar_path
+from core.models import User
+
+
+def datetime_formatter():
+    """
+    Return a function formatting datetimes exactly like DRF's ``DateTimeField``.
+
+    The zone and output format are resolved once per response instead of once
+    per value. Values already in UTC with a UTC output zone (the usual case:
+    every backend hands back UTC) skip the zone conversion entirely.
+    """
+    drf_field = fields.DateTimeField()
+    zone = drf_field.default_timezone()
+    output_format = api_settings.DATETIME_FORMAT
+    if output_format is None or output_format.lower() != fields.ISO_8601 or zone is None:
+        return drf_field.to_representation
+
+    utc = datetime.timezone.utc
+    zone_is_utc = getattr(zone, 'key', None) == 'UTC' or zone is utc
+
+    def format_datetime(value):
+        if not value:
+            return None
+        if zone_is_utc and value.tzinfo is utc:
+            return value.replace(tzinfo=None).isoformat() + 'Z'
+        return drf_field.to_representation(value)
+
+    return format_datetime
+
+
+def time_formatter():
+    """Return a function formatting times exactly like DRF's ``TimeField``."""
+    if api_settings.TIME_FORMAT is None or api_settings.TIME_FORMAT.lower() != fields.ISO_8601:
+        return fields.TimeField().to_representation
+    return lambda value: value.isoformat() if value not in (None, '') else None
+
+
+def split_param(value):
+    """``'a, b'`` -> ``['a', 'b']``; ``None`` when the parameter is absent or empty."""
+    items = [item.strip() for item in (value or '').split(',') if item.strip()]
+    return items or None
+
+
+def trainer_summary(origin, trainer_id, name, email, avatar, avatar_version):
+    return {
+        'id': trainer_id,
+        'name': name,
+        'email': email,
+        'avatar': origin + stored_avatar_path(trainer_id, avatar_version) if avatar_version else avatar or None,
+    }
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer that works on ``values_list()`` rows.
+
+    Produces the same dicts as the model's DRF ``ModelSerializer`` for the
+    listed ``fields`` (in the same order) but skips per-row model
+    instantiation and per-field ``to_representation`` dispatch: rows come
+    from the database as tuples, and only the columns that need formatting
+    are touched. ``sources`` maps an output key to its ORM column when they
+    differ.
+
+    ``only`` narrows the output (and the SELECT) to a subset of ``fields``.
+    ``expand`` names entries of ``expansions``, whose columns are fetched in
+    the same query through a JOIN and rendered by ``expand_<name>()`` in
+    place of the plain foreign key. ``key_columns`` are always selected
+    (after the output columns) so that keyset pagination can read them.
+    """
+    fields = ()
+    sources = {}
+    key_columns = ()
+    expansions = {}
+
+    def __init__(self, context=None, only=None, expand=None):
+        self.context = context or {}
+        self.output = self.fields
+        if only:
+            unknown = set(only) - set(self.fields)
+            if unknown:
+                raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+            self.output = tuple(name for name in self.fields if name in only)
+        unknown = set(expand or ()) - set(self.expansions)
+        if unknown:
+            raise ValidationError({'expand': f"Cannot expand: {', '.join(sorted(unknown))}."})
+        self.expand = tuple(name for name in self.expansions if name in (expand or ()))
+
+        request = self.context.get('request')
+        self.origin = request.build_absolute_uri('/')[:-1] if request is not None else ''
+
+    @property
+    def keys(self):
+        """Output keys read directly from a column, in order."""
+        return self.output
+
+    @property
+    def columns(self):
+        return [self.sources.get(name, name) for name in self.keys]
+
+    def extra_columns(self):
+        """Columns selected after :attr:`columns`: missing key columns, then expansions."""
+        columns = [column for column in self.key_columns if column not in self.columns]
+        for name in self.expand:
+            columns += self.expansions[name]
+        return columns
+
+    def converters(self):
+        """``{output key: function}`` for columns whose raw value is not already JSON-ready."""
+        return {}
+
+    def prepare(self, queryset):
+        return queryset.values_list(*self.columns, *self.extra_columns())
+
+    def to_dicts(self, rows):
+        # zip() stops at the last key, so extra columns never leak into the output.
+        keys = self.keys
+        converters = [(keys.index(name), fn) for name, fn in self.converters().items() if name in keys]
+        if not converters:
+            return [dict(zip(keys, row)) for row in rows]
+        data = []
+        for row in rows:
+            row = list(row)
+            for index, fn in converters:
+                row[index] = fn(row[index])
+            data.append(dict(zip(keys, row)))
+        return data
+
+    def serialize(self, rows):
+        if not self.expand:
+            return self.to_dicts(rows)
+        rows = list(rows)
+        data = self.to_dicts(rows)
+        offset = len(self.columns) + len([c for c in self.key_columns if c not in self.columns])
+        for name in self.expand:
+            width = len(self.expansions[name])
+            build = getattr(self, f'expand_{name}')
+            for item, row in zip(data, rows):
+                item[name] = build(*row[offset:offset + width])
+            offset += width
+        return data
+
+
+class TrainerExpansionMixin:
+    """``?expand=trainer``: replace the trainer id with a summary fetched through the same query."""
+    expansions = {
+        'trainer': ('trainer__id', 'trainer__name', 'trainer__email', 'trainer__avatar', 'trainer__avatarVersion'),
+    }
+
+    def expand_trainer(self, *values):
+        return trainer_summary(self.origin, *values)
+
+
+class SessionValuesSerializer(TrainerExpansionMixin, ValuesSerializer):
+    fields = (
+        'id', 'batch', 'sessionType', 'date', 'duration', 'location', 'status', 'occurrence', 'trainer', 'series',
+    )
+    sources = {'trainer': 'trainer_id', 'series': 'series_id'}
+    # ``series_id`` orders untouched series occurrences, which have no id.
+    key_columns = ('date', 'id', 'series_id')
+
+    def converters(self):
+        format_datetime = datetime_formatter()
+        return {'date': format_datetime, 'occurrence': format_datetime}
+
+
+class AvailabilityValuesSerializer(TrainerExpansionMixin, ValuesSerializer):
+    fields = ('id', 'day', 'startTime', 'endTime', 'trainer')
+    sources = {'trainer': 'trainer_id'}
+
+    def converters(self):
+        format_time = time_formatter()
+        return {'startTime': format_time, 'endTime': format_time}
+
+
+class UserValuesSerializer(ValuesSerializer):
+    """
+    Same output as ``UserSerializer``.
+
+    ``groups`` and ``user_permissions`` are filled from one query per
+    requested relation over the page's ids instead of two queries per user.
+    """
+    fields = (
+        'id', 'avatar', 'last_login', 'is_superuser', 'name', 'email',
+        'role', 'is_active', 'is_staff', 'groups', 'user_permissions',
+    )
+    RELATIONS = ('groups', 'user_permissions')
+    key_columns = ('id', 'avatarVersion')
+
+    @property
+    def keys(self):
+        return tuple(name for name in self.output if name not in self.RELATIONS)
+
+    def converters(self):
+        return {'last_login': datetime_formatter()}
+
+    def serialize(self, rows):
+        rows = list(rows)
+        data = self.to_dicts(rows)
+        columns = self.columns + self.extra_columns()
+        id_index, version_index = columns.index('id'), columns.index('avatarVersion')
+
+        if 'avatar' in self.output:
+            for item, row in zip(data, rows):
+                if row[version_index]:
+                    item['avatar'] = self.origin + stored_avatar_path(row[id_index], row[version_index])
+                else:
+                    item['avatar'] = item['avatar'] or None
+
+        relations = [relation for relation in self.RELATIONS if relation in self.output]
+        if relations:
+            related = self.related_ids([row[id_index] for row in rows], relations)
+            for item, row in zip(data, rows):
+                for relation in relations:
+                    item[relation] = related[relation].get(row[id_index], [])
+        return data
+
+    def related_ids(self, user_ids, relations):
+        # Match the order ``instance.<relation>.all()`` returns in UserSerializer.
+        orderings = {
+            'groups': ('id',),
+            'user_permissions': (
+                'permission__content_type__app_label',
+                'permission__content_type__model',
+                'permission__codename',
+            ),
+        }
+        targets = {'groups': 'group_id', 'user_permissions': 'permission_id'}
+        related = {}
+        for relation in relations:
+            through = getattr(User, relation).through
+            by_user = {}
+            if user_ids:
+                pairs = through.objects.filter(user_id__in=user_ids).order_by(*orderings[relation])
+                for user_id, target_id in pairs.values_list('user_id', targets[relation]):
+                    by_user.setdefault(user_id, []).append(target_id)
+            related[relation] = by_user
+        return related
+
+
+def requested_expansions(request):
+    return split_param(request.query_params.get('expand')) or []
+
+
+class ValuesListMixin:
+    """
+    Serve GET lists through ``values_serializer_class`` instead of ``serializer_class``.
+
+    Filtering and pagination run exactly as before; only the row-to-dict step
+    changes, and ``?fields=`` / ``?expand=`` shape it. Whatever is requested,
+    a page costs the same number of queries. Writes keep using the regular
+    DRF serializer.
+    """
+    values_serializer_class = None
+
+    def get_values_serializer(self):
+        params = self.request.query_params
+        return self.values_serializer_class(
+            context=self.get_serializer_context(),
+            only=split_param(params.get('fields')),
+            expand=split_param(params.get('expand')),
+        )
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        queryset = serializer.prepare(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(queryset))
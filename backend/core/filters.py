@@ -0,0 +1,140 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_date_bound(value, param, end=False):
+    """
+    Parse a ``from``/``to`` query value into an aware datetime.
+
+    Accepts either a full ISO datetime or a plain ``YYYY-MM-DD`` date. A plain
+    date used as an upper bound covers that whole day, so ``to=2025-07-01``
+    includes sessions on the 1st.
+    """
+    try:
+        day = parse_date(value)
+        parsed = None if day else parse_datetime(value)
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        parsed = datetime.combine(day, time.min)
+    elif parsed is None:
+        raise ValidationError({param: f"Invalid date '{value}'. Use YYYY-MM-DD or an ISO datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def int_param(params, name, default, low, high):
+    """The integer query value ``name`` in ``[low, high]``, or ``default`` when absent; ``ValueError`` otherwise."""
+    raw = params.get(name)
+    if raw in (None, ''):
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer.")
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}.")
+    return value
+
+
+def parse_id(value, param):
+    """Parse an id query value such as ``trainer``; anything but a positive integer is a 400."""
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if not 0 < parsed < 2 ** 31:
+        raise ValidationError({param: f"Invalid id '{value}'. Use a positive integer."})
+    return parsed
+
+
+def filter_sessions(queryset, params):
+    """
+    Apply the shared session query filters.
+
+    ``trainer``, ``status``, ``from`` and ``to`` match exactly; ``sessionType``
+    is a case-insensitive substring match, like the Reports page search box.
+    """
+    trainer_id = params.get('trainer')
+    if trainer_id:
+        queryset = queryset.filter(trainer__id=parse_id(trainer_id, 'trainer'))
+
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    session_type = params.get('sessionType')
+    if session_type:
+        queryset = queryset.filter(sessionType__icontains=session_type)
+
+    date_from = params.get('from')
+    if date_from:
+        queryset = queryset.filter(date__gte=parse_date_bound(date_from, 'from'))
+
+    date_to = params.get('to')
+    if date_to:
+        queryset = queryset.filter(date__lt=parse_date_bound(date_to, 'to', end=True))
+
+    return queryset
+
+
+def filter_series(queryset, params):
+    """
+    Apply the session list filters that a recurring series can match as a whole.
+
+    Untouched occurrences are always ``Scheduled``, so any other ``status``
+    filter matches no series. ``from``/``to`` are left to the caller, which
+    expands occurrences inside that window.
+    """
+    trainer_id = params.get('trainer')
+    if trainer_id:
+        queryset = queryset.filter(trainer__id=parse_id(trainer_id, 'trainer'))
+
+    status = params.get('status')
+    if status and status != 'Scheduled':
+        queryset = queryset.none()
+
+    session_type = params.get('sessionType')
+    if session_type:
+        queryset = queryset.filter(sessionType__icontains=session_type)
+
+    return queryset
+
+
+def filter_rollups(queryset, params):
+    """
+    Apply the session report filters to ``SessionRollup`` rows.
+
+    Rollups are per day, so ``from``/``to`` are widened to whole days: a
+    bound that falls inside a day includes that day.
+    """
+    trainer_id = params.get('trainer')
+    if trainer_id:
+        queryset = queryset.filter(trainer__id=parse_id(trainer_id, 'trainer'))
+
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    session_type = params.get('sessionType')
+    if session_type:
+        queryset = queryset.filter(sessionType__icontains=session_type)
+
+    date_from = params.get('from')
+    if date_from:
+        start = timezone.localtime(parse_date_bound(date_from, 'from'))
+        queryset = queryset.filter(day__gte=start.date())
+
+    date_to = params.get('to')
+    if date_to:
+        end = timezone.localtime(parse_date_bound(date_to, 'to', end=True))
+        last_day = end.date() if end.time() == time.min else end.date() + timedelta(days=1)
+        queryset = queryset.filter(day__lt=last_day)
+
+    return queryset
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+ADMIN_CHANNEL = 'admin'
+
+_datetime = serializers.DateTimeField()
+_time = serializers.TimeField()
+_broker = None
+
+
+def trainer_channel(trainer_id):
+    return f'trainer:{trainer_id}'
+
+
+def channels_for(user):
+    """Channels a user's stream listens on: every change for admins, their own for anyone else."""
+    return [ADMIN_CHANNEL] if user.role == 'admin' else [trainer_channel(user.pk)]
+
+
+def broker():
+    """The process-wide broker named by ``LIVE_EVENTS_BROKER``."""
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.LIVE_EVENTS_BROKER)()
+    return _broker
+
+
+def publish(event, *trainer_ids):
+    """
+    Send ``event`` to the admin channel and the channels of ``trainer_ids`` once the transaction commits.
+
+    Like version bumps, nothing is sent for a write that is rolled back, and
+    a broker error is logged rather than failing the committed request.
+    """
+    channels = [ADMIN_CHANNEL] + [trainer_channel(trainer_id) for trainer_id in sorted(set(trainer_ids) - {None})]
+    transaction.on_commit(lambda: broker().publish(channels, event), robust=True)
+
+
+# --- events ------------------------------------------------------------------
+# Single-row writes send the row so clients can patch their copy in place;
+# set-based writes (imports, bulk updates, the absence sweep) send one
+# ``sessions`` event per affected trainer, telling clients to refetch.
+
+def session_saved(session, *trainer_ids):
+    publish({
+        'type': 'session',
+        'action': 'saved',
+        'session': {
+            'id': session.id,
+            'trainer': session.trainer_id,
+            'batch': session.batch,
+            'sessionType': session.sessionType,
+            'date': _datetime.to_representation(session.date),
+            'duration': session.duration,
+            'location': session.location,
+            'status': session.status,
+            'series': session.series_id,
+            'occurrence': _datetime.to_representation(session.occurrence) if session.occurrence else None,
+        },
+    }, session.trainer_id, *trainer_ids)
+
+
+def session_deleted(session):
+    # ``series`` tells clients that an untouched occurrence may be back in its place.
+    publish({
+        'type': 'session', 'action': 'deleted', 'id': session.id, 'trainer': session.trainer_id,
+        'series': session.series_id,
+    }, session.trainer_id)
+
+
+def series_changed(series, action, *trainer_ids):
+    publish(
+        {'type': 'series', 'action': action, 'id': series.id, 'trainer': series.trainer_id},
+        series.trainer_id, *trainer_ids,
+    )
+
+
+def sessions_changed(trainer_ids, reason):
+    for trainer_id in sorted(set(trainer_ids) - {None}):
+        publish({'type': 'sessions', 'action': 'changed', 'trainer': trainer_id, 'reason': reason}, trainer_id)
+
+
+def availability_saved(availability):
+    publish({
+        'type': 'availability',
+        'action': 'saved',
+        'trainer': availability.trainer_id,
+        'day': availability.day,
+        'startTime': _time.to_representation(availability.startTime),
+        'endTime': _time.to_representation(availability.endTime),
+    }, availability.trainer_id)
+
+
+def availability_deleted(availability):
+    publish({
+        'type': 'availability', 'action': 'deleted', 'trainer': availability.trainer_id, 'day': availability.day,
+    }, availability.trainer_id)
+
+
+# --- in-process broker -------------------------------------------------------
+
+class Subscription:
+    """
+    One stream's bounded queue of events, bound to the event loop it was created on.
+
+    Events may be published from any thread; they are handed to the loop.
+    When a slow client lets the queue fill up, further events are dropped and
+    ``lagged`` is set, so the stream can tell the client to refetch.
+    """
+
+    def __init__(self, broker, channels, size):
+        self.broker = broker
+        self.channels = channels
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=size)
+        self.lagged = False
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.deliver, event)
+        except RuntimeError:
+            self.close()  # The loop is gone; so is the client.
+
+    def deliver(self, event):
+        if self.queue.full():
+            self.lagged = True
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """The next event, or ``None`` after ``timeout`` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Fan events out to the streams of this process.
+
+    This is the default ``LIVE_EVENTS_BROKER``. With several worker processes
+    point the setting at a class with the same ``publish(channels, event)``
+    and ``subscribe(channels)`` methods that relays events through a shared
+    broker; events are plain JSON-serializable dicts.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+
+    def publish(self, channels, event):
+        with self.lock:
+            targets = set().union(*(self.subscribers.get(channel, ()) for channel in channels))
+        for subscription in targets:
+            subscription.put(event)
+
+    def subscribe(self, channels):
+        """Start receiving ``channels``; must be called from the stream's event loop."""
+        subscription = Subscription(self, channels, settings.LIVE_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            for channel in channels:
+                self.subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscribers[channel].discard(subscription)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
@@ -0,0 +1,338 @@
+import json
+import math
+import statistics
+import time
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from core.absence import mark_absent_sessions
+from core.models import Availability, Session, User
+from core.scheduling import scheduling_timezone
+from core.synthetic import WEEKDAYS, SyntheticDataset, seed
+
+BENCH_DOMAIN = 'bench.invalid'
+BENCH_ADMIN = f'admin@{BENCH_DOMAIN}'
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset (the seed_synthetic generator; kept for later runs) and "
+        "time every API route but the four listed in cases(), plus the absence sweep, reporting "
+        "p50/p95 latency and query counts. Run it against a scratch database, e.g. DATABASE_URL=sqlite:////tmp/bench.sqlite3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trainers', type=int, default=500, help="Trainers to seed.")
+        parser.add_argument('--sessions', type=int, default=1000000, help="Sessions to seed.")
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per route.")
+        parser.add_argument('--only', help="Comma-separated route names to run.")
+        parser.add_argument('--output', help="Write the results as JSON to this path.")
+        parser.add_argument('--compare', help="Baseline JSON from an earlier run to compare p50 latency against.")
+        parser.add_argument(
+            '--threshold', type=float, default=0.25,
+            help="Relative p50 slowdown against --compare that counts as a regression (default: 0.25).",
+        )
+
+    def handle(self, *args, **options):
+        self.ensure_dataset(options['trainers'], options['sessions'])
+
+        only = set(options['only'].split(',')) if options['only'] else None
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, run, restore in self.cases():
+                if only and name not in only:
+                    continue
+                try:
+                    results[name] = self.measure(run, options['repeat'])
+                finally:
+                    if restore is not None:
+                        restore()
+                result = results[name]
+                self.stdout.write(
+                    f"{name:<28} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                    f"queries {result['queries']:>3}  status {','.join(map(str, result['status']))}"
+                )
+
+        report = {
+            'vendor': connection.vendor,
+            'trainers': options['trainers'],
+            'sessions': Session.objects.count(),
+            'repeat': options['repeat'],
+            'created': timezone.now().isoformat(),
+            'routes': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    # --- dataset -----------------------------------------------------------
+
+    def ensure_dataset(self, trainers, sessions):
+        existing = User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}', role='trainer').count()
+        if existing >= trainers:
+            self.stdout.write(f"Reusing the existing benchmark dataset ({existing} trainers).")
+            return
+        if existing:
+            raise CommandError(
+                f"The database holds a smaller benchmark dataset ({existing} trainers); "
+                "use a fresh database to seed a larger one."
+            )
+
+        dataset = SyntheticDataset(trainers, sessions, domain=BENCH_DOMAIN)
+        if dataset.session_count > dataset.capacity():
+            raise CommandError(f"{trainers} trainers cannot hold {sessions} sessions; add --trainers.")
+        started = time.perf_counter()
+        self.stdout.write(f"Seeding {trainers} trainers and {sessions} sessions...")
+        seed(dataset, password=BENCH_PASSWORD)
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f} s.")
+
+    # --- routes ------------------------------------------------------------
+
+    def cases(self):
+        """
+        ``(name, run, restore)`` triples; ``run()`` issues one request as the admin and returns the response.
+
+        Write cases either undo themselves inside ``run`` or come with a
+        ``restore()`` that puts the seeded data back after timing, so every
+        run of the command measures the same dataset.
+
+        Every route in ``core.urls`` is timed except ``auth/refresh/`` (it only
+        answers in ``AUTH_TOKEN_MODE='signed'``), ``auth/logout/`` (it revokes
+        the token the other cases authenticate with), the avatar route
+        (synthetic users have no avatar) and ``events/`` (a stream that stays
+        open, so it has no latency to report).
+        """
+        admin_client = Client()
+        token = admin_client.post(
+            '/api/auth/login/', {'email': BENCH_ADMIN, 'password': BENCH_PASSWORD}, content_type='application/json'
+        ).json()['token']
+        admin_client.defaults['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+        trainers = User.objects.filter(email__endswith=f'@{BENCH_DOMAIN}', role='trainer')
+        trainer = trainers.order_by('id').first()
+        other_trainer = trainers.order_by('-id').first()
+        session_id = Session.objects.filter(trainer=trainer).values_list('id', flat=True).first()
+        now = timezone.now()
+        month_ago = (now - timedelta(days=30)).date().isoformat()
+        today = now.date().isoformat()
+        week = [
+            {'day': day, 'startTime': '08:00', 'endTime': '20:00'} for day, _ in Availability.DAYS
+        ]
+        seeded_week = [
+            {'day': a.day, 'startTime': a.startTime.isoformat(), 'endTime': a.endTime.isoformat()}
+            for a in Availability.objects.filter(trainer=trainer)
+        ]
+        toggle = {'location': 0, 'week': 0, 'status': 0}
+        state = {}
+        scheduled_ids = list(
+            Session.objects.filter(trainer=trainer, status='Scheduled').order_by('id').values_list('id', flat=True)[:100]
+        )
+        available = Availability.objects.filter(trainer=trainer).order_by('id').first()
+        zone = scheduling_timezone()
+        feed_client = Client()
+        feed_url = admin_client.get(f'/api/trainers/{trainer.id}/calendar/').json()['url']
+
+        def future_slot(days_ahead):
+            """The start of the trainer's first available day at least ``days_ahead`` days out."""
+            day = (now + timedelta(days=days_ahead)).astimezone(zone).date()
+            day += timedelta(days=(WEEKDAYS.index(available.day) - day.isoweekday() % 7) % 7)
+            return datetime.combine(day, available.startTime, tzinfo=zone)
+
+        def patch_session(c):
+            toggle['location'] ^= 1
+            return c.patch(
+                f'/api/sessions/{session_id}/', {'location': f"Room {toggle['location']}"},
+                content_type='application/json',
+            )
+
+        def put_availability(c):
+            # Alternate so every timed request writes rather than hitting the no-change path.
+            toggle['week'] ^= 1
+            body = week if toggle['week'] else seeded_week
+            return c.put(f'/api/availabilities/{trainer.id}/', body, content_type='application/json')
+
+        def restore_availability():
+            admin_client.put(f'/api/availabilities/{trainer.id}/', seeded_week, content_type='application/json')
+
+        def create_and_delete_session(c):
+            response = c.post('/api/sessions/', {
+                'trainer': trainer.id, 'batch': 'Bench', 'sessionType': 'Lecture', 'location': 'Room 1',
+                'status': 'Scheduled', 'duration': 30, 'date': future_slot(400).isoformat(),
+            }, content_type='application/json')
+            if response.status_code == 201:
+                c.delete(f"/api/sessions/{response.json()['id']}/")
+            return response
+
+        def import_and_delete_session(c):
+            row = f"{trainer.id},Bench import,Lecture,{future_slot(400).isoformat()},30,Room 1,Scheduled\n"
+            upload = SimpleUploadedFile(
+                'bench.csv', f"trainer,batch,sessionType,date,duration,location,status\n{row}".encode(),
+                content_type='text/csv',
+            )
+            response = c.post('/api/sessions/import/', {'file': upload})
+            for pk in Session.objects.filter(trainer=trainer, batch='Bench import').values_list('id', flat=True):
+                c.delete(f'/api/sessions/{pk}/')
+            return response
+
+        def bulk_update(c):
+            toggle['status'] ^= 1
+            return c.post('/api/sessions/bulk/', {
+                'filter': {'ids': scheduled_ids},
+                'changes': {'status': 'Completed' if toggle['status'] else 'Scheduled'},
+            }, content_type='application/json')
+
+        def restore_statuses():
+            admin_client.post('/api/sessions/bulk/', {
+                'filter': {'ids': scheduled_ids}, 'changes': {'status': 'Scheduled'},
+            }, content_type='application/json')
+
+        def series_body(days_ahead):
+            start = future_slot(days_ahead)
+            return {
+                'trainer': trainer.id, 'batch': 'Bench series', 'sessionType': 'Lecture', 'location': 'Room 1',
+                'duration': 30, 'start': start.isoformat(), 'days': [WEEKDAYS[start.isoweekday() % 7]], 'count': 4,
+            }
+
+        def create_and_delete_series(c):
+            response = c.post('/api/series/', series_body(400), content_type='application/json')
+            if response.status_code == 201:
+                c.delete(f"/api/series/{response.json()['id']}/")
+            return response
+
+        def series_detail(c):
+            # The warm-up request creates the series; restore_series drops it again.
+            if 'series' not in state:
+                state['series'] = c.post('/api/series/', series_body(440), content_type='application/json').json()['id']
+            return c.get(f"/api/series/{state['series']}/")
+
+        def restore_series():
+            if 'series' in state:
+                admin_client.delete(f"/api/series/{state.pop('series')}/")
+
+        def change_password(c):
+            # Another trainer, so the calendar feed token of ``trainer`` stays valid.
+            return c.patch(f'/api/users/{other_trainer.id}/change-password/', {
+                'current_password': BENCH_PASSWORD, 'new_password': BENCH_PASSWORD, 'confirm_password': BENCH_PASSWORD,
+            }, content_type='application/json')
+
+        def sweep(c):
+            mark_absent_sessions()
+
+        def get(path):
+            return lambda c: c.get(path)
+
+        auto_assign = {
+            'commit': False,
+            'requests': [{
+                'batch': f'Bench {i}', 'sessionType': 'Lecture', 'location': 'Room 1', 'duration': 60,
+                'windowStart': (now + timedelta(days=40)).isoformat(),
+                'windowEnd': (now + timedelta(days=47)).isoformat(),
+            } for i in range(20)],
+        }
+
+        routes = [
+            ('auth_login', lambda c: Client().post(
+                '/api/auth/login/', {'email': BENCH_ADMIN, 'password': BENCH_PASSWORD}, content_type='application/json'
+            )),
+            ('auth_token', lambda c: Client().post(
+                '/api/auth/token/', {'email': BENCH_ADMIN, 'password': BENCH_PASSWORD}, content_type='application/json'
+            )),
+            ('auth_me', get('/api/auth/me/')),
+            ('users_list', get('/api/users/')),
+            ('user_detail', get(f'/api/users/{trainer.id}/')),
+            ('user_change_password', change_password),
+            ('trainers_list', get('/api/trainers/')),
+            ('availability_trainers', get('/api/availabilities/trainers/')),
+            ('availability_list', get('/api/availabilities/')),
+            ('trainer_availability', get(f'/api/availabilities/{trainer.id}/')),
+            ('trainer_availability_put', put_availability),
+            ('sessions_trainer', get(f'/api/sessions/?trainer={trainer.id}')),
+            ('sessions_month', get(f'/api/sessions/?from={month_ago}&to={today}&limit=500')),
+            ('sessions_status_month', get(f'/api/sessions/?status=Completed&from={month_ago}&to={today}&limit=500')),
+            ('sessions_first_page', get('/api/sessions/?limit=100')),
+            ('session_detail', get(f'/api/sessions/{session_id}/')),
+            ('session_update', patch_session),
+            ('session_create_delete', create_and_delete_session),
+            ('session_import_delete', import_and_delete_session),
+            ('session_bulk_update', bulk_update),
+            ('series_list', get(f'/api/series/?trainer={trainer.id}')),
+            ('series_detail', series_detail),
+            ('series_create_delete', create_and_delete_series),
+            ('calendar_token', get(f'/api/trainers/{trainer.id}/calendar/')),
+            ('calendar_feed', lambda c: feed_client.get(feed_url)),
+            ('cache_stats', get('/api/cache/stats/')),
+            ('dashboard', get('/api/dashboard/')),
+            ('report_summary', get(f'/api/reports/summary/?from={month_ago}&to={today}&period=day')),
+            ('report_csv_month', lambda c: c.get(f'/api/reports/sessions.csv?from={month_ago}&to={today}')),
+            ('free_slots', get('/api/scheduling/free-slots/?duration=60')),
+            ('auto_assign_dry_run', lambda c: c.post(
+                '/api/scheduling/auto-assign/', auto_assign, content_type='application/json'
+            )),
+            ('mark_absent_sessions', sweep),
+        ]
+        restores = {
+            'trainer_availability_put': restore_availability,
+            'session_bulk_update': restore_statuses,
+            'series_detail': restore_series,
+        }
+        return [(name, partial(run, admin_client), restores.get(name)) for name, run in routes]
+
+    def measure(self, run, repeat):
+        run()  # Warm-up: fills caches and lazy imports, like a long-running worker.
+        timings, queries, statuses = [], [], set()
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = run()
+                if response is not None and getattr(response, 'streaming', False):
+                    for _chunk in response.streaming_content:
+                        pass
+                elapsed = (time.perf_counter() - started) * 1000
+            timings.append(elapsed)
+            queries.append(len(captured))
+            statuses.add(response.status_code if response is not None else 0)
+        timings.sort()
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'max_ms': round(timings[-1], 3),
+            'queries': int(statistics.median(queries)),
+            'status': sorted(statuses),
+        }
+
+    def compare(self, results, baseline_path, threshold):
+        with open(baseline_path) as fh:
+            baseline = json.load(fh)['routes']
+        regressions = []
+        self.stdout.write(f"\nComparison with {baseline_path} (p50):")
+        for name, result in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]['p50_ms'], result['p50_ms']
+            change = (after - before) / before if before else 0.0
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressions.append(name)
+            queries = f"{baseline[name]['queries']} -> {result['queries']} queries"
+            self.stdout.write(f"{name:<28} {before:8.2f} -> {after:8.2f} ms ({change:+.0%}), {queries}{flag}")
+        if regressions:
+            raise CommandError(f"p50 regressed by more than {threshold:.0%}: {', '.join(regressions)}")
@@ -0,0 +1,144 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Session, User
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard the seeded rows once the benchmark has finished."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large trainer_utilization table and record query plans and timings "
+        "for the hot session queries with and without the composite indexes. "
+        "All seeded rows are rolled back; run it against a scratch database on "
+        "backends without transactional DDL (MySQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help="Sessions to seed.")
+        parser.add_argument('--trainers', type=int, default=50, help="Trainers to seed.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per query.")
+        parser.add_argument('--output', help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        results = {}
+        try:
+            with transaction.atomic():
+                trainer_ids = self.seed(options['rows'], options['trainers'])
+                queries = self.hot_queries(trainer_ids)
+
+                # Index DDL is issued directly rather than through the schema
+                # editor context, which SQLite refuses inside a transaction.
+                editor = connection.schema_editor()
+                indexes = Session._meta.indexes
+                table = editor.quote_name(Session._meta.db_table)
+                for index in indexes:
+                    editor.execute(editor.sql_delete_index % {
+                        'table': table, 'name': editor.quote_name(index.name),
+                    })
+                for name, queryset in queries.items():
+                    results[name] = {'before': self.measure(queryset, options['repeat'])}
+
+                for index in indexes:
+                    editor.execute(index.create_sql(Session, editor))
+                for name, queryset in queries.items():
+                    results[name]['after'] = self.measure(queryset, options['repeat'])
+
+                raise RollbackBenchmark
+        except RollbackBenchmark:
+            pass
+
+        report = {
+            'vendor': connection.vendor,
+            'rows': options['rows'],
+            'trainers': options['trainers'],
+            'queries': results,
+        }
+        for name, result in results.items():
+            before, after = result['before']['median_ms'], result['after']['median_ms']
+            speedup = before / after if after else float('inf')
+            self.stdout.write(f"{name}: {before:.2f} ms -> {after:.2f} ms ({speedup:.1f}x)")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def seed(self, rows, trainers):
+        rng = random.Random(42)
+        emails = [f"benchmark-trainer-{i}@example.invalid" for i in range(trainers)]
+        User.objects.bulk_create([
+            User(name=f"Benchmark Trainer {i}", email=email, role='trainer', password='!')
+            for i, email in enumerate(emails)
+        ])
+        # Read the ids back: MySQL's bulk_create does not set primary keys.
+        ids = dict(User.objects.filter(email__startswith='benchmark-trainer-').values_list('email', 'id'))
+        trainer_ids = [ids[email] for email in emails]
+        start = timezone.now() - timedelta(days=730)
+        statuses = [choice for choice, _ in Session.STATUS_CHOICES]
+
+        batch = []
+        for i in range(rows):
+            batch.append(Session(
+                trainer_id=rng.choice(trainer_ids),
+                batch=f"Batch {i % 40}",
+                sessionType='Lecture',
+                date=start + timedelta(minutes=rng.randrange(0, 1095 * 24 * 60)),
+                duration=rng.choice([30, 45, 60, 90, 120]),
+                location='Room 1',
+                status=rng.choice(statuses),
+            ))
+            if len(batch) == 5000:
+                Session.objects.bulk_create(batch)
+                batch = []
+        Session.objects.bulk_create(batch)
+        return trainer_ids
+
+    def hot_queries(self, trainer_ids):
+        now = timezone.now()
+        trainer_id = trainer_ids[0]
+        return {
+            'trainer_date_window': Session.objects.filter(
+                trainer_id=trainer_id, date__gte=now - timedelta(days=30), date__lt=now
+            ).order_by('date', 'id'),
+            'trainer_upcoming': Session.objects.filter(
+                trainer_id=trainer_id, date__gte=now
+            ).order_by('date')[:20],
+            'absence_sweep': Session.objects.filter(
+                status='Scheduled', date__lt=now, date__gte=now - timedelta(days=1)
+            ),
+            'status_report_window': Session.objects.filter(
+                status='Completed', date__gte=now - timedelta(days=90), date__lt=now
+            ),
+            # Admin-wide windows (dashboard, CSV export, report summary) filter on date alone.
+            'admin_date_window': Session.objects.filter(
+                date__gte=now - timedelta(days=7), date__lt=now
+            ).order_by('date', 'id'),
+            # A deep unfiltered keyset page, in the shape SessionKeysetPagination issues.
+            'keyset_page': Session.objects.filter(
+                Q(date__gt=now - timedelta(days=365)) | Q(id__gt=0), date__gte=now - timedelta(days=365)
+            ).order_by('date', 'id')[:100],
+        }
+
+    def measure(self, queryset, repeat):
+        plan = queryset.explain()
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.values_list('id', flat=True))
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'plan': plan,
+            'median_ms': statistics.median(timings),
+            'min_ms': min(timings),
+        }
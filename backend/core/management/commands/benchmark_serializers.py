@@ -0,0 +1,135 @@
+import json
+import random
+import statistics
+import time
+from datetime import time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from core.fast_serializers import AvailabilityValuesSerializer, SessionValuesSerializer, UserValuesSerializer
+from core.models import Availability, Session, User
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers import AvailabilitySerializer, SessionSerializer, UserSerializer
+
+
+class RollbackBenchmark(Exception):
+    """Raised to discard the seeded rows once the benchmark has finished."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the DRF ModelSerializers against the values()-based "
+        "list serializers, and of DRF's JSONRenderer against FastJSONRenderer. "
+        "All seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help="Sessions to seed.")
+        parser.add_argument('--trainers', type=int, default=200, help="Trainers to seed.")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case.")
+        parser.add_argument('--output', help="Write the results as JSON to this path.")
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        results = {}
+        try:
+            with transaction.atomic():
+                trainer_ids = self.seed(options['rows'], options['trainers'])
+                cases = {
+                    'sessions': (Session.objects.order_by('id'), SessionSerializer, SessionValuesSerializer),
+                    'availabilities': (
+                        Availability.objects.order_by('id'), AvailabilitySerializer, AvailabilityValuesSerializer
+                    ),
+                    'users': (User.objects.filter(id__in=trainer_ids).order_by('id'), UserSerializer, UserValuesSerializer),
+                }
+                for name, (queryset, drf_class, values_class) in cases.items():
+                    values_serializer = values_class()
+                    drf, drf_data = self.measure(lambda: drf_class(queryset.all(), many=True).data, repeat)
+                    lean, lean_data = self.measure(
+                        lambda: values_serializer.serialize(values_serializer.prepare(queryset.all())), repeat
+                    )
+                    if json.dumps(drf_data) != json.dumps(lean_data):
+                        self.stderr.write(self.style.WARNING(f"{name}: outputs differ"))
+                    rows = len(lean_data)
+                    results[name] = {
+                        'rows': rows,
+                        'drf_rows_per_s': rows / drf if drf else None,
+                        'values_rows_per_s': rows / lean if lean else None,
+                    }
+                    results[name].update(self.measure_renderers(lean_data, repeat))
+                raise RollbackBenchmark
+        except RollbackBenchmark:
+            pass
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name} ({result['rows']} rows): serialize {result['drf_rows_per_s']:,.0f} -> "
+                f"{result['values_rows_per_s']:,.0f} rows/s; render {result['json_rows_per_s']:,.0f} -> "
+                f"{result['fast_json_rows_per_s']:,.0f} rows/s"
+            )
+        if orjson is None:
+            self.stdout.write("orjson is not installed; FastJSONRenderer fell back to DRF's encoder.")
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'orjson': orjson is not None, 'cases': results}, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def seed(self, rows, trainers):
+        rng = random.Random(42)
+        users = User.objects.bulk_create([
+            User(
+                name=f"Benchmark Trainer {i}",
+                email=f"benchmark-trainer-{i}@example.invalid",
+                role='trainer',
+                password='!',
+            )
+            for i in range(trainers)
+        ])
+        trainer_ids = [u.id for u in users]
+
+        days = [day for day, _ in Availability.DAYS]
+        Availability.objects.bulk_create([
+            Availability(trainer_id=trainer_id, day=day, startTime=dtime(9), endTime=dtime(17))
+            for trainer_id in trainer_ids for day in days[1:6]
+        ])
+
+        start = timezone.now() - timedelta(days=365)
+        statuses = [choice for choice, _ in Session.STATUS_CHOICES]
+        Session.objects.bulk_create(
+            (
+                Session(
+                    trainer_id=rng.choice(trainer_ids),
+                    batch=f"Batch {i % 40}",
+                    sessionType='Lecture',
+                    date=start + timedelta(minutes=15 * rng.randrange(0, 730 * 96)),
+                    duration=rng.choice([30, 45, 60, 90, 120]),
+                    location='Room 1',
+                    status=rng.choice(statuses),
+                )
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        return trainer_ids
+
+    def measure(self, fn, repeat):
+        """Median seconds of ``fn()`` over ``repeat`` runs, and its last result."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings), result
+
+    def measure_renderers(self, data, repeat):
+        rows = len(data)
+        plain, _ = self.measure(lambda: JSONRenderer().render(data), repeat)
+        fast, _ = self.measure(lambda: FastJSONRenderer().render(data), repeat)
+        return {
+            'json_rows_per_s': rows / plain if plain else None,
+            'fast_json_rows_per_s': rows / fast if fast else None,
+        }
@@ -1,24 +1,45 @@
+import time
+
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
-from core.models import Session
+from django.db import close_old_connections
+
+from core.absence import mark_absent_sessions
+
 
 class Command(BaseCommand):
     help = "Automatically mark overdue scheduled sessions as Absent"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Stay resident and sweep every --interval seconds instead of exiting.",
+        )
+        parser.add_argument(
+            '--interval', type=float, default=60,
+            help="Seconds between sweeps in --loop mode (default: 60).",
+        )
+
     def handle(self, *args, **options):
-        now = timezone.now()
-        sessions = Session.objects.filter(status="Scheduled")
-        updated_count = 0
-
-        for session in sessions:
-            waiting_minutes = session.duration * 0.5 if session.duration <= 60 else 30
-            cutoff = session.date + timedelta(minutes=waiting_minutes)
-            if now > cutoff:
-                session.status = "Absent"
-                session.save()
-                updated_count += 1
+        if not options['loop']:
+            self.sweep()
+            return
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    self.sweep()
+                except Exception as exc:
+                    self.stderr.write(self.style.ERROR(f"Sweep failed: {exc}"))
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping absence sweep.")
+
+    def sweep(self):
+        started = time.perf_counter()
+        updated_count = mark_absent_sessions()
+        elapsed_ms = (time.perf_counter() - started) * 1000
 
         self.stdout.write(self.style.SUCCESS(
-            f"Marked {updated_count} session(s) as Absent."
+            f"Marked {updated_count} session(s) as Absent in {elapsed_ms:.1f} ms."
         ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily session rollup table from trainer_utilization"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='day_from', help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='day_to', help="Day to stop before (YYYY-MM-DD, exclusive).")
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for option in ('day_from', 'day_to'):
+            value = options[option]
+            if value:
+                bounds[option] = parse_date(value)
+                if bounds[option] is None:
+                    raise CommandError(f"Invalid date '{value}'. Use YYYY-MM-DD.")
+
+        started = time.perf_counter()
+        written = rebuild_rollups(**bounds)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rollup row(s) in {elapsed:.2f} s."
+        ))
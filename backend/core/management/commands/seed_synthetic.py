@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import User
+from core.synthetic import SyntheticDataset, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible production-scale dataset: trainers, weekly availability and "
+        "recurring session histories. Rows are written with batched bulk_create, one "
+        "transaction per batch, and the daily rollups are rebuilt afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trainers', type=int, default=500, help="Trainers to create (default: 500).")
+        parser.add_argument('--sessions', type=int, default=1000000, help="Sessions to create (default: 1000000).")
+        parser.add_argument('--days-back', type=int, default=730, help="Days of history before today (default: 730).")
+        parser.add_argument('--days-ahead', type=int, default=30, help="Days scheduled after today (default: 30).")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed (default: 42).")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk_create (default: 5000).")
+        parser.add_argument(
+            '--domain', default='synthetic.invalid',
+            help="Email domain of the generated users (default: synthetic.invalid).",
+        )
+        parser.add_argument(
+            '--password',
+            help="Password for the generated admin (admin@<domain>) and trainers; unusable when omitted.",
+        )
+
+    def handle(self, *args, **options):
+        if options['trainers'] < 1:
+            raise CommandError("--trainers must be at least 1.")
+        dataset = SyntheticDataset(
+            options['trainers'],
+            options['sessions'],
+            days_back=options['days_back'],
+            days_ahead=options['days_ahead'],
+            seed=options['seed'],
+            domain=options['domain'],
+        )
+        if dataset.session_count > dataset.capacity():
+            raise CommandError(
+                f"{dataset.trainer_count} trainers can hold at most {dataset.capacity()} sessions in "
+                f"{options['days_back'] + options['days_ahead']} days; add --trainers or --days-back."
+            )
+        if User.objects.filter(email__endswith=f"@{options['domain']}").exists():
+            raise CommandError(
+                f"Users @{options['domain']} already exist; use a fresh database or another --domain."
+            )
+
+        started = time.perf_counter()
+        counts = seed(dataset, options['password'], options['batch_size'], self.progress)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['trainers']} trainers, {counts['availabilities']} availabilities, "
+            f"{counts['sessions']} sessions and {counts['rollups']} rollup rows in {elapsed:.1f} s."
+        ))
+
+    def progress(self, label, total):
+        """Progress callback printing about every 5% (or every batch when ``total`` is unknown)."""
+        step = max(total // 20, 1) if total else 1
+        state = {'next': step}
+
+        def report(written, rate):
+            if written >= state['next'] or written == total:
+                state['next'] = written + step
+                done = f"{written:,}/{total:,}" if total else f"{written:,}"
+                self.stdout.write(f"  {label}: {done} ({rate:,.0f} rows/s)")
+
+        return report
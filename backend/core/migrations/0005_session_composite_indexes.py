@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_user_table'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['trainer', 'date'], name='utilization_trainer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['status', 'date'], name='utilization_status_date_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    Session = apps.get_model('core', 'Session')
+    SessionRollup = apps.get_model('core', 'SessionRollup')
+    rows = (
+        Session.objects.annotate(day=TruncDate('date'))
+        .values('trainer_id', 'day', 'sessionType', 'status')
+        .annotate(n=Count('id'), total=Sum('duration'))
+        .order_by()
+    )
+    SessionRollup.objects.bulk_create(
+        [
+            SessionRollup(
+                trainer_id=row['trainer_id'],
+                day=row['day'],
+                sessionType=row['sessionType'],
+                status=row['status'],
+                count=row['n'],
+                minutes=row['total'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_session_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('sessionType', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('Scheduled', 'Scheduled'), ('Started', 'Started'), ('Completed', 'Completed'), ('Cancelled', 'Cancelled'), ('Absent', 'Absent')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('minutes', models.IntegerField(default=0)),
+                ('trainer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'trainer_utilization_daily',
+                'indexes': [models.Index(fields=['day'], name='utilization_daily_day_idx')],
+                'unique_together': {('trainer', 'day', 'sessionType', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
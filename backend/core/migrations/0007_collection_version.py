@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_session_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('scope', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updatedAt', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'collection_version',
+            },
+        ),
+    ]
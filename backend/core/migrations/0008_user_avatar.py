@@ -0,0 +1,129 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:49
+
+import base64
+import binascii
+import hashlib
+import io
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+# Frozen copies of the core.avatars helpers as of this migration, so later
+# changes to that module (or to core.models, which it imports) cannot change
+# what this migration does. Unlike uploads, existing avatars are moved
+# whatever their size.
+THUMBNAIL_SIZES = {'small': 48, 'medium': 160}
+
+
+def parse_data_uri(value):
+    if not isinstance(value, str) or not value.startswith('data:'):
+        return None
+    header, _, payload = value[5:].partition(',')
+    content_type, *params = header.split(';')
+    if not content_type.startswith('image/') or 'base64' not in params:
+        raise ValueError('Avatar must be a base64-encoded image.')
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError('Avatar is not valid base64.')
+    return content_type, data
+
+
+def data_uri(content_type, data):
+    return f"data:{content_type};base64,{base64.b64encode(data).decode()}"
+
+
+def thumbnail(data, edge):
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+            image = ImageOps.fit(image.convert('RGBA' if has_alpha else 'RGB'), (edge, edge), Image.LANCZOS)
+            out = io.BytesIO()
+            if has_alpha:
+                image.save(out, 'PNG', optimize=True)
+                return 'image/png', out.getvalue()
+            image.save(out, 'JPEG', quality=85, optimize=True)
+            return 'image/jpeg', out.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def variant_rows(model, user_id, content_type, data):
+    variants = {'original': (content_type, data)}
+    if Image is not None:
+        for size, edge in THUMBNAIL_SIZES.items():
+            rendered = thumbnail(data, edge)
+            if rendered is not None:
+                variants[size] = rendered
+    return [
+        model(user_id=user_id, size=size, contentType=kind, etag=hashlib.sha1(blob).hexdigest(), data=blob)
+        for size, (kind, blob) in variants.items()
+    ]
+
+
+def move_inline_avatars(apps, schema_editor):
+    """
+    Store every ``data:`` avatar as UserAvatar variants and clear it from the user row.
+
+    Values that are not a base64 image cannot be served as an avatar and are
+    dropped, so no user row keeps an inline blob that lists would send.
+    """
+    User = apps.get_model('core', 'User')
+    UserAvatar = apps.get_model('core', 'UserAvatar')
+    inline = User.objects.filter(avatar__startswith='data:').values_list('id', flat=True)
+    for user_id in list(inline):
+        # One row at a time so only a single blob is held in memory.
+        avatar = User.objects.filter(pk=user_id).values_list('avatar', flat=True).get()
+        try:
+            upload = parse_data_uri(avatar)
+        except ValueError:
+            User.objects.filter(pk=user_id).update(avatar=None)
+            continue
+        UserAvatar.objects.bulk_create(variant_rows(UserAvatar, user_id, *upload))
+        User.objects.filter(pk=user_id).update(avatar=None, avatarVersion=1)
+
+
+def restore_inline_avatars(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    UserAvatar = apps.get_model('core', 'UserAvatar')
+    originals = UserAvatar.objects.filter(size='original').values_list('user_id', 'contentType', 'data')
+    for user_id, content_type, data in originals.iterator(chunk_size=50):
+        User.objects.filter(pk=user_id).update(avatar=data_uri(content_type, bytes(data)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_collection_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatarVersion',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='UserAvatar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('size', models.CharField(max_length=10)),
+                ('contentType', models.CharField(max_length=50)),
+                ('etag', models.CharField(max_length=40)),
+                ('data', models.BinaryField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='avatar_variants', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'trainer_member_avatar',
+                'unique_together': {('user', 'size')},
+            },
+        ),
+        migrations.RunPython(move_inline_avatars, restore_inline_avatars),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_user_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='occurrence',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='SessionSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch', models.CharField(max_length=100)),
+                ('sessionType', models.CharField(max_length=50)),
+                ('duration', models.IntegerField()),
+                ('location', models.CharField(max_length=100)),
+                ('start', models.DateTimeField()),
+                ('days', models.JSONField()),
+                ('until', models.DateField(blank=True, null=True)),
+                ('count', models.PositiveIntegerField(blank=True, null=True)),
+                ('lastStart', models.DateTimeField()),
+                ('trainer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'trainer_utilization_series',
+            },
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exceptions', to='core.sessionseries'),
+        ),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.UniqueConstraint(fields=('series', 'occurrence'), name='utilization_series_occurrence_uniq'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionseries',
+            index=models.Index(fields=['trainer', 'start'], name='series_trainer_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionseries',
+            index=models.Index(fields=['lastStart'], name='series_last_start_idx'),
+        ),
+    ]
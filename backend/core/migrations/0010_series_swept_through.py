@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_session_series'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionseries',
+            name='sweptThrough',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
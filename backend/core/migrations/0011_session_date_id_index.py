@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-17 03:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_series_swept_through'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['date', 'id'], name='utilization_date_id_idx'),
+        ),
+    ]
@@ -28,7 +28,10 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    # External avatar URL. Uploaded images live in ``UserAvatar``; a non-zero
+    # ``avatarVersion`` means one is stored and is part of its URL.
     avatar = models.TextField(blank=True, null=True)
+    avatarVersion = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
 
@@ -44,9 +47,72 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = "trainer_member"
 
 
+class UserAvatar(models.Model):
+    """One size variant (``original``, ``small`` or ``medium``) of a user's uploaded avatar."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='avatar_variants')
+    size = models.CharField(max_length=10)
+    contentType = models.CharField(max_length=50)
+    etag = models.CharField(max_length=40)
+    data = models.BinaryField()
+
+    class Meta:
+        db_table = 'trainer_member_avatar'
+        unique_together = ('user', 'size')
+
+    def __str__(self):
+        return f"{self.user_id} {self.size}"
+
+
+class SessionSeries(models.Model):
+    """
+    Sessions that recur weekly on ``days`` from ``start``, until ``until`` or for ``count`` occurrences.
+
+    Occurrences are computed on read (see ``core.recurrence``); only
+    exceptions, meaning occurrences that were moved, edited or changed
+    status, are stored, as ``Session`` rows pointing back here.
+    """
+    trainer = models.ForeignKey(User, on_delete=models.CASCADE)
+    batch = models.CharField(max_length=100)
+    sessionType = models.CharField(max_length=50)
+    duration = models.IntegerField()
+    location = models.CharField(max_length=100)
+    # First occurrence's start; its local time of day is kept across DST changes.
+    start = models.DateTimeField()
+    days = models.JSONField()  # Day names, as in ``Availability.DAYS``.
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+    # Start of the last occurrence, so window queries can skip finished series.
+    lastStart = models.DateTimeField()
+    # Every occurrence starting before this is stored, so the absence sweep
+    # skips the series once ``lastStart`` falls behind it. ``None`` until the
+    # first sweep and after the pattern changes.
+    sweptThrough = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'trainer_utilization_series'
+        indexes = [
+            models.Index(fields=['trainer', 'start'], name='series_trainer_start_idx'),
+            models.Index(fields=['lastStart'], name='series_last_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.sessionType} - {self.batch} (weekly from {self.start})"
+
+
 class Session(models.Model):
     class Meta:
         db_table = 'trainer_utilization'
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'occurrence'], name='utilization_series_occurrence_uniq'),
+        ]
+        indexes = [
+            # Per-trainer calendars, dashboards and date-window listings.
+            models.Index(fields=['trainer', 'date'], name='utilization_trainer_date_idx'),
+            # Absence sweep and status-filtered reports.
+            models.Index(fields=['status', 'date'], name='utilization_status_date_idx'),
+            # Unfiltered keyset pages (ORDER BY date, id) and admin-wide date windows.
+            models.Index(fields=['date', 'id'], name='utilization_date_id_idx'),
+        ]
 
     STATUS_CHOICES = (
         ('Scheduled', 'Scheduled'),
@@ -64,11 +130,36 @@ class Session(models.Model):
     duration = models.IntegerField()
     location = models.CharField(max_length=100)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # Set on exceptions of a recurring series: the series and the original
+    # start of the occurrence this row replaces. Deleting the series keeps
+    # its stored rows as one-off sessions.
+    series = models.ForeignKey(SessionSeries, null=True, blank=True, on_delete=models.SET_NULL, related_name='exceptions')
+    occurrence = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.sessionType} - {self.batch} ({self.date})"
 
 
+class SessionRollup(models.Model):
+    """Daily per-trainer session counts and minutes, kept in step with ``Session`` writes."""
+    trainer = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    sessionType = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=Session.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    minutes = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'trainer_utilization_daily'
+        unique_together = ('trainer', 'day', 'sessionType', 'status')
+        indexes = [
+            models.Index(fields=['day'], name='utilization_daily_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trainer_id} {self.day} {self.sessionType} {self.status}: {self.count}"
+
+
 class Availability(models.Model):
     DAYS = (
         ('Sunday', 'Sunday'),
@@ -91,3 +182,16 @@ class Availability(models.Model):
 
     def __str__(self):
         return f"{self.trainer} - {self.day} {self.startTime}-{self.endTime}"
+
+
+class CollectionVersion(models.Model):
+    """Version stamp per cached collection (for example ``sessions:trainer:7``), bumped on every write."""
+    scope = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updatedAt = models.DateTimeField()
+
+    class Meta:
+        db_table = 'collection_version'
+
+    def __str__(self):
+        return f"{self.scope} v{self.version}"
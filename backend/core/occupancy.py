@@ -0,0 +1,156 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+from math import ceil
+
+from core.models import Availability, Session
+from core.recurrence import busy_occurrences
+from core.scheduling import MAX_SESSION_LENGTH, NON_BLOCKING_STATUSES, scheduling_timezone
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WEEKDAYS = [day for day, _ in Availability.DAYS]  # Sunday first, like the model choices.
+
+# A trainer's week is a 10080-bit integer with bit ``i`` standing for minute
+# ``i`` after Sunday 00:00 in the scheduling time zone. Python ints are
+# arbitrary-precision bitsets whose &, |, ~ and shifts run word-at-a-time in
+# C, so every step of a free-slot search is a handful of whole-week operations.
+
+
+def span_mask(start, end):
+    """Bits ``[start, end)`` of a week, clipped to the week."""
+    start, end = max(start, 0), min(end, MINUTES_PER_WEEK)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+@lru_cache(maxsize=16)
+def aligned_mask(step):
+    """Bits at every ``step``-th minute of the week, i.e. the allowed slot starts."""
+    mask = 0
+    for minute in range(0, MINUTES_PER_WEEK, step):
+        mask |= 1 << minute
+    return mask
+
+
+def run_starts(mask, length):
+    """
+    Bits ``i`` of ``mask`` such that bits ``i .. i + length - 1`` are all set.
+
+    Each pass doubles the run length already verified, so this takes
+    ``O(log length)`` whole-week operations.
+    """
+    result, covered = mask, 1
+    while covered < length:
+        step = min(covered, length - covered)
+        result &= result >> step
+        covered += step
+    return result
+
+
+def availability_mask(windows):
+    """Weekly availability bitmap from ``{day name: (startTime, endTime)}``."""
+    mask = 0
+    for offset, day in enumerate(WEEKDAYS):
+        if day in windows:
+            start, end = windows[day]
+            base = offset * MINUTES_PER_DAY
+            mask |= span_mask(base + start.hour * 60 + start.minute, base + end.hour * 60 + end.minute)
+    return mask
+
+
+class OccupancyIndex:
+    """Availability and booked-session bitmaps for a set of trainers over a window."""
+
+    def __init__(self):
+        self.zone = scheduling_timezone()
+        self.available = {}
+        self.sessions = defaultdict(list)
+        self._busy = defaultdict(dict)  # trainer_id -> {week_start: busy bitmap}
+
+    @classmethod
+    def load(cls, trainer_ids, start, end):
+        """Load availability, blocking sessions and untouched series occurrences for ``trainer_ids``."""
+        index = cls()
+        windows = defaultdict(dict)
+        rows = Availability.objects.filter(trainer_id__in=trainer_ids).values_list(
+            'trainer_id', 'day', 'startTime', 'endTime'
+        )
+        for trainer_id, day, window_start, window_end in rows:
+            windows[trainer_id][day] = (window_start, window_end)
+        index.available = {trainer_id: availability_mask(windows[trainer_id]) for trainer_id in trainer_ids}
+
+        sessions = (
+            Session.objects.filter(
+                trainer_id__in=trainer_ids,
+                date__gt=start - MAX_SESSION_LENGTH,
+                date__lt=end,
+            )
+            .exclude(status__in=NON_BLOCKING_STATUSES)
+            .values_list('trainer_id', 'date', 'duration')
+        )
+        for trainer_id, date, duration in sessions:
+            index.book(trainer_id, date, duration)
+        for trainer_id, date, duration in busy_occurrences(trainer_ids, start - MAX_SESSION_LENGTH, end):
+            index.book(trainer_id, date, duration)
+        return index
+
+    def book(self, trainer_id, start, duration):
+        """Mark ``[start, start + duration)`` as busy for ``trainer_id``."""
+        self.sessions[trainer_id].append((start, duration))
+        for week, busy in self._busy[trainer_id].items():
+            minute = self.minute_of_week(start, week)
+            self._busy[trainer_id][week] = busy | span_mask(minute, minute + duration)
+
+    def unbook(self, trainer_id, start, duration):
+        """Undo a previous :meth:`book` of the same interval."""
+        self.sessions[trainer_id].remove((start, duration))
+        self._busy[trainer_id].clear()
+
+    def week_start(self, moment):
+        local = moment.astimezone(self.zone)
+        days_back = (local.weekday() + 1) % 7  # weekday() is Monday=0; weeks start on Sunday.
+        return datetime.combine(local.date() - timedelta(days=days_back), time.min, tzinfo=self.zone)
+
+    def minute_of_week(self, moment, week_start, round_up=False):
+        minutes = (moment.astimezone(self.zone) - week_start).total_seconds() / 60
+        return ceil(minutes) if round_up else int(minutes)
+
+    def busy_mask(self, trainer_id, week_start):
+        """Booked minutes of ``trainer_id`` in the week, computed once and then kept up to date by :meth:`book`."""
+        weeks = self._busy[trainer_id]
+        if week_start not in weeks:
+            busy = 0
+            for start, duration in self.sessions[trainer_id]:
+                minute = self.minute_of_week(start, week_start)
+                if -MINUTES_PER_DAY <= minute < MINUTES_PER_WEEK:
+                    busy |= span_mask(minute, minute + duration)
+            weeks[week_start] = busy
+        return weeks[week_start]
+
+    def free_mask(self, trainer_id, week_start):
+        return self.available.get(trainer_id, 0) & ~self.busy_mask(trainer_id, week_start)
+
+    def free_slots(self, trainer_id, start, end, duration, step=15, limit=10):
+        """
+        Earliest non-overlapping free slots of ``duration`` minutes within ``[start, end)``.
+
+        Slots start on multiples of ``step`` minutes after midnight. Returns a
+        list of ``(slot_start, slot_end)`` aware datetimes.
+        """
+        slots = []
+        week = self.week_start(start)
+        while week < end and len(slots) < limit:
+            window = span_mask(
+                self.minute_of_week(start, week, round_up=True),
+                self.minute_of_week(end, week),
+            )
+            candidates = run_starts(self.free_mask(trainer_id, week) & window, duration) & aligned_mask(step)
+            while candidates and len(slots) < limit:
+                minute = (candidates & -candidates).bit_length() - 1
+                slot_start = week + timedelta(minutes=minute)
+                slots.append((slot_start, slot_start + timedelta(minutes=duration)))
+                candidates &= ~span_mask(minute, minute + duration)
+            week += timedelta(days=7)
+        return slots
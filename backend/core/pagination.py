@@ -0,0 +1,120 @@
+import base64
+from heapq import merge
+from itertools import islice
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class SessionKeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over ``(date, id)``.
+
+    Each page is fetched with ``WHERE (date, id) > (cursor) ORDER BY date, id
+    LIMIT n``, so the cost of a page does not depend on how deep the client
+    has paged. Pagination is opt-in: it only kicks in when the request carries
+    ``limit`` or ``cursor``, and plain list requests keep returning an array.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = 100
+    max_limit = 1000
+
+    def is_requested(self, request):
+        params = request.query_params
+        return self.cursor_query_param in params or self.limit_query_param in params
+
+    def get_limit(self, request):
+        raw = request.query_params.get(self.limit_query_param)
+        if not raw:
+            return self.default_limit
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({self.limit_query_param: 'Must be an integer.'})
+        if limit < 1:
+            raise ValidationError({self.limit_query_param: 'Must be a positive integer.'})
+        return min(limit, self.max_limit)
+
+    def encode_cursor(self, date, pk):
+        raw = f"{date.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            date_str, pk = base64.urlsafe_b64decode(padded).decode().rsplit('|', 1)
+            date = parse_datetime(date_str)
+            if date is None:
+                raise ValueError
+            return date, int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+
+    def paginate_queryset(self, queryset, request, view=None, extra_rows=None):
+        """
+        One page of ``queryset``, merged with ``extra_rows`` when given.
+
+        ``extra_rows(after, through)`` returns rows that are not in the
+        database (untouched series occurrences) in page order, behind the
+        ``after`` position and up to the ``through`` date when that is set.
+        """
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.limit = self.get_limit(request)
+
+        after = None
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            after = date, pk = self.decode_cursor(cursor)
+            # Written as a range on ``date`` so the (date, id) index is walked
+            # in order; an OR of the two cases makes planners merge and sort.
+            queryset = queryset.filter(Q(date__gt=date) | Q(id__gt=pk), date__gte=date)
+
+        # Fetch one extra row to learn whether another page exists.
+        page = list(queryset.order_by('date', 'id')[:self.limit + 1])
+        if extra_rows is not None:
+            # A full page of stored rows bounds how far the extra rows can reach.
+            through = self.position(page[-1], queryset)[0] if len(page) > self.limit else None
+            extra = extra_rows(after, through)
+            if extra:
+                key = lambda row: self.position(row, queryset)
+                page = list(islice(merge(page, extra, key=key), self.limit + 1))
+        self.has_next = len(page) > self.limit
+        page = page[:self.limit]
+        self.last = self.position(page[-1], queryset) if page else None
+        return page
+
+    def position(self, row, queryset):
+        """
+        ``(date, id)`` of a page row: a model instance or a ``values_list()`` tuple.
+
+        Untouched series occurrences have no id and take ``-series_id`` in its
+        place, which sorts them ahead of stored sessions at the same time.
+        """
+        if isinstance(row, tuple):
+            columns = queryset._fields
+            pk = row[columns.index('id')]
+            if pk is None:
+                pk = -row[columns.index('series_id')]
+            return row[columns.index('date')], pk
+        return row.date, row.id
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.last))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
@@ -0,0 +1,9 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsAdminRole(BasePermission):
+    """Allow access only to users whose ``role`` is ``admin``."""
+    message = 'Only admins can perform this action.'
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'admin')
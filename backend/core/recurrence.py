@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from core.filters import filter_series, parse_date_bound
+from core.models import Availability, Session, SessionSeries
+from core.scheduling import scheduling_timezone
+
+WEEKDAYS = [day for day, _ in Availability.DAYS]  # Sunday first, like date.isoweekday() % 7.
+
+# Most occurrences one series may have: ten years of a weekly slot.
+MAX_SERIES_OCCURRENCES = 520
+
+# Occurrences nobody has touched yet are plain scheduled sessions.
+OCCURRENCE_STATUS = 'Scheduled'
+
+
+def occurrences(series, start=None, end=None, limit=MAX_SERIES_OCCURRENCES):
+    """
+    Yield the starts of ``series``' occurrences in ``[start, end)``, in order, as UTC datetimes.
+
+    Occurrence ``k`` falls on the ``k % len(days)``-th selected weekday of
+    week ``k // len(days)`` after the first one, so the weeks before ``start``
+    are skipped arithmetically instead of walked. Occurrences keep the first
+    one's local time of day in the scheduling time zone across DST changes.
+    No more than ``limit`` occurrences are ever generated.
+    """
+    zone = scheduling_timezone()
+    local = series.start.astimezone(zone)
+    first_day, at = local.date(), local.time()
+    first_weekday = first_day.isoweekday() % 7
+    offsets = sorted({(WEEKDAYS.index(day) - first_weekday) % 7 for day in series.days})
+    if not offsets:
+        return
+    if series.count is not None:
+        limit = min(series.count, limit)
+
+    week = 0
+    if start is not None:
+        week = max(0, (start.astimezone(zone).date() - first_day).days // 7)
+    while True:
+        for position, offset in enumerate(offsets):
+            if week * len(offsets) + position >= limit:
+                return
+            day = first_day + timedelta(days=7 * week + offset)
+            if series.until is not None and day > series.until:
+                return
+            moment = datetime.combine(day, at, tzinfo=zone).astimezone(dt_timezone.utc)
+            if end is not None and moment >= end:
+                return
+            if start is None or moment >= start:
+                yield moment
+        week += 1
+
+
+def is_occurrence(series, moment):
+    return next(occurrences(series, moment, moment + timedelta(microseconds=1)), None) == moment
+
+
+def last_start(series):
+    """Start of ``series``' last occurrence, or ``None`` when it has none."""
+    last = None
+    for last in occurrences(series):
+        pass
+    return last
+
+
+def occurrence_session(series, moment):
+    """Unsaved ``Session`` standing for the untouched occurrence of ``series`` at ``moment``."""
+    return Session(
+        trainer_id=series.trainer_id,
+        batch=series.batch,
+        sessionType=series.sessionType,
+        date=moment,
+        duration=series.duration,
+        location=series.location,
+        status=OCCURRENCE_STATUS,
+        series_id=series.id,
+        occurrence=moment,
+    )
+
+
+def stored_occurrences(series_ids, start=None, end=None):
+    """``{(series id, occurrence)}`` of the exceptions stored for ``series_ids``, in one query."""
+    if not series_ids:
+        return set()
+    rows = Session.objects.filter(series_id__in=series_ids)
+    if start is not None:
+        rows = rows.filter(occurrence__gte=start)
+    if end is not None:
+        rows = rows.filter(occurrence__lt=end)
+    return set(rows.values_list('series_id', 'occurrence'))
+
+
+def virtual_sessions(series_list, start=None, end=None):
+    """Unsaved sessions for every occurrence of ``series_list`` in ``[start, end)`` without a stored exception."""
+    series_list = list(series_list)
+    stored = stored_occurrences([series.id for series in series_list], start, end)
+    return [
+        occurrence_session(series, moment)
+        for series in series_list
+        for moment in occurrences(series, start, end)
+        if (series.id, moment) not in stored
+    ]
+
+
+def overlapping_series(queryset, start=None, end=None):
+    """Series in ``queryset`` with an occurrence that can start in ``[start, end)``."""
+    if start is not None:
+        queryset = queryset.filter(lastStart__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start__lt=end)
+    return queryset
+
+
+def busy_occurrences(trainer_ids, start, end, skip_series=(), skip_occurrences=()):
+    """
+    Yield ``(trainer_id, start, duration)`` for untouched occurrences starting in ``[start, end)``.
+
+    These block their slot like stored sessions do. ``skip_series`` leaves out
+    whole series (one being rescheduled) and ``skip_occurrences`` single
+    ``(series id, occurrence)`` pairs (ones being replaced by an exception).
+    """
+    series_list = overlapping_series(SessionSeries.objects.filter(trainer_id__in=trainer_ids), start, end)
+    if skip_series:
+        series_list = series_list.exclude(id__in=skip_series)
+    skip = set(skip_occurrences)
+    for session in virtual_sessions(series_list, start, end):
+        if (session.series_id, session.occurrence) not in skip:
+            yield session.trainer_id, session.date, session.duration
+
+
+class SeriesOccurrences:
+    """
+    Untouched occurrences of the series in ``queryset`` within ``[start, end)``, as session list rows.
+
+    Rows are tuples shaped like a ``values_list()`` over ``Session`` with the
+    given columns, so the list serializers and keyset pagination treat them
+    like stored rows. They have no ``id``; they sort among stored sessions by
+    ``(date, -series id)``, ahead of stored sessions with the same start.
+    """
+
+    def __init__(self, queryset, start=None, end=None):
+        self.queryset = queryset
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def for_params(cls, params, queryset=None):
+        """Occurrences matching the session list filters in ``params`` (see ``core.filters.filter_series``)."""
+        start = parse_date_bound(params['from'], 'from') if params.get('from') else None
+        end = parse_date_bound(params['to'], 'to', end=True) if params.get('to') else None
+        queryset = filter_series(SessionSeries.objects.all() if queryset is None else queryset, params)
+        return cls(overlapping_series(queryset, start, end), start, end)
+
+    def rows(self, columns, after=None, through=None):
+        """
+        Rows ordered by ``(date, -series id)``.
+
+        ``after`` is a ``(date, key)`` pagination position to start behind and
+        ``through`` the last start worth returning, when the caller already
+        knows its page ends there.
+        """
+        start, end = self.start, self.end
+        if after is not None:
+            start = after[0] if start is None else max(start, after[0])
+        if through is not None:
+            bound = through + timedelta(microseconds=1)
+            end = bound if end is None else min(end, bound)
+
+        queryset = self.queryset
+        if any(column.startswith('trainer__') for column in columns):
+            queryset = queryset.select_related('trainer')
+        series_list = list(queryset)
+        stored = stored_occurrences([series.id for series in series_list], start, end)
+
+        keyed = []
+        for series in series_list:
+            fixed = {column: self.series_value(series, column) for column in columns}
+            for moment in occurrences(series, start, end):
+                key = (moment, -series.id)
+                if (series.id, moment) in stored or (after is not None and key <= after):
+                    continue
+                fixed['date'] = fixed['occurrence'] = moment
+                keyed.append((key, tuple(fixed[column] for column in columns)))
+        keyed.sort(key=lambda item: item[0])
+        return [row for _, row in keyed]
+
+    @staticmethod
+    def series_value(series, column):
+        if column == 'id':
+            return None
+        if column == 'status':
+            return OCCURRENCE_STATUS
+        if column == 'series_id':
+            return series.id
+        if column.startswith('trainer__'):
+            return getattr(series.trainer, column[len('trainer__'):])
+        return getattr(series, column, None)
+
+
+def occurrence_slots(series, skip=()):
+    """``validate_slots`` candidates for the untouched occurrences of ``series`` (saved or not)."""
+    return [
+        {'trainer_id': series.trainer_id, 'start': moment, 'duration': series.duration, 'exclude_series': series.id}
+        for moment in occurrences(series)
+        if moment not in skip
+    ]
+
@@ -0,0 +1,58 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; DRF's encoder is used without it.
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when it is installed.
+
+    Output is byte-for-byte what DRF produces for compact UTF-8 JSON, with
+    one exception: values orjson would format differently (datetimes,
+    decimals, lazy strings, ...) are handed to DRF's own encoder, and
+    U+2028/U+2029 are escaped the same way, but floats are always written by
+    orjson. Those below 1e-4 or from 1e16 up then differ in spelling only
+    (``1e16`` for ``1e+16``, ``0.000025`` for ``2.5e-05``) and parse to the
+    same value. Indented output (the browsable API, ``indent`` media-type
+    parameters) and non-default JSON settings still go through the standard
+    renderer.
+
+    orjson is listed in ``requirements-optional.txt``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class OwnMediaTypeMixin:
+    """
+    Skip the 406 for views that write their own response in one media type.
+
+    Clients of a CSV export or an iCalendar feed ask for that type (for
+    example ``Accept: text/calendar``), which none of the API's renderers
+    offers. Negotiation falls back to the first renderer instead, which is
+    only used for error responses.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        return super().perform_content_negotiation(request, force=True)
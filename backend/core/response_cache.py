@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from core.versioning import ConditionalGetMixin
+
+STATS_PREFIX = 'response-cache:stats:'
+
+# View classes using the cache, by name; the stats endpoint reports on these.
+cached_views = {}
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def counter_accuracy():
+    """
+    How far the hit/miss counters can be trusted with the configured cache.
+
+    ``'process'``: they live in this worker's memory, so each worker reports
+    only its own traffic. ``'approximate'``: the backend increments by read
+    and write (file-based, database), so concurrent requests can lose counts.
+    ``'exact'``: the backend increments atomically in a shared store.
+    """
+    backend = type(response_cache()).__name__
+    if backend == 'LocMemCache':
+        return 'process'
+    if backend in ('RedisCache', 'PyMemcacheCache', 'PyLibMCCache'):
+        return 'exact'
+    return 'approximate'
+
+
+def count(view_name, outcome):
+    cache = response_cache()
+    key = f'{STATS_PREFIX}{view_name}:{outcome}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); the counter starts over.
+        cache.set(key, 1, timeout=None)
+
+
+def cache_stats():
+    """``{view name: {'hits', 'misses', 'hitRate'}}`` for every cached view."""
+    keys = [
+        f'{STATS_PREFIX}{name}:{outcome}' for name in sorted(cached_views) for outcome in ('hits', 'misses')
+    ]
+    counters = response_cache().get_many(keys)
+    stats = {}
+    for name in sorted(cached_views):
+        hits = counters.get(f'{STATS_PREFIX}{name}:hits', 0)
+        misses = counters.get(f'{STATS_PREFIX}{name}:misses', 0)
+        total = hits + misses
+        stats[name] = {'hits': hits, 'misses': misses, 'hitRate': round(hits / total, 4) if total else None}
+    return stats
+
+
+class CachedListMixin(ConditionalGetMixin):
+    """
+    Cache the serialized output of a list view.
+
+    The key is the caller's role plus the ETag computed by
+    :class:`ConditionalGetMixin`, which already covers the view, query string,
+    renderer and the version stamps of ``version_scopes()``. User and
+    Availability save/delete signals bump those stamps, so a write makes every
+    older entry unreachable at once (they age out via ``RESPONSE_CACHE_TTL``)
+    and a hit costs no queries beyond the stamp lookup.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cached_views[cls.__name__] = cls
+
+    def response_cache_key(self, request):
+        digest = self.conditional[0].strip('"')
+        role = getattr(request.user, 'role', None) or 'anonymous'
+        return f'response:{type(self).__name__}:{role}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        cache = response_cache()
+        key = self.response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count(type(self).__name__, 'hits')
+            return Response(data)
+
+        count(type(self).__name__, 'misses')
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TTL)
+        return response
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import Session, SessionRollup, SessionSeries
+from core.recurrence import overlapping_series, virtual_sessions
+
+ROLLUP_FIELDS = ('trainer_id', 'day', 'sessionType', 'status')
+
+
+def session_key(trainer_id, date, session_type, status):
+    return (trainer_id, timezone.localdate(date), session_type, status)
+
+
+def snapshot(session):
+    """Capture the rollup-relevant fields of a session before it is modified."""
+    return {
+        'key': session_key(session.trainer_id, session.date, session.sessionType, session.status),
+        'duration': session.duration,
+    }
+
+
+def record_session_change(old=None, new=None):
+    """
+    Move one session's contribution between rollup buckets.
+
+    ``old`` is a :func:`snapshot` taken before the write (``None`` on create)
+    and ``new`` the saved session (``None`` on delete).
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    if old is not None:
+        deltas[old['key']][0] -= 1
+        deltas[old['key']][1] -= old['duration']
+    if new is not None:
+        current = snapshot(new)
+        deltas[current['key']][0] += 1
+        deltas[current['key']][1] += current['duration']
+    apply_deltas(deltas)
+
+
+def created_deltas(sessions, sign=1):
+    """
+    Rollup deltas for sessions inserted in bulk (for example with ``bulk_create``).
+
+    ``sign=-1`` gives the deltas for removing them instead.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for session in sessions:
+        key = session_key(session.trainer_id, session.date, session.sessionType, session.status)
+        deltas[key][0] += sign
+        deltas[key][1] += sign * session.duration
+    return deltas
+
+
+def grouped_deltas(queryset, sign=1, status=None, trainer_id=None, shift=None):
+    """
+    Rollup deltas for every session in ``queryset``, computed with one GROUP BY.
+
+    With ``status``, ``trainer_id`` or ``shift`` (a ``timedelta``) set, each
+    group is moved out of its current bucket and into the bucket it lands in
+    once a bulk UPDATE over ``queryset`` sets that status or trainer, or moves
+    the dates by ``shift``.
+    """
+    moves = status is not None or trainer_id is not None or bool(shift)
+    queryset = queryset.order_by().annotate(day=TruncDate('date'))
+    columns = ['trainer_id', 'day', 'sessionType', 'status']
+    if shift:
+        shifted = ExpressionWrapper(F('date') + shift, output_field=DateTimeField())
+        queryset = queryset.annotate(new_day=TruncDate(shifted))
+        columns.append('new_day')
+    rows = queryset.values(*columns).annotate(n=Count('id'), minutes=Sum('duration'))
+
+    deltas = defaultdict(lambda: [0, 0])
+    for row in rows:
+        key = (row['trainer_id'], row['day'], row['sessionType'], row['status'])
+        if moves:
+            deltas[key][0] -= row['n']
+            deltas[key][1] -= row['minutes']
+            key = (
+                key[0] if trainer_id is None else trainer_id,
+                row['new_day'] if shift else key[1],
+                key[2],
+                key[3] if status is None else status,
+            )
+        deltas[key][0] += sign * row['n']
+        deltas[key][1] += sign * row['minutes']
+    return deltas
+
+
+def merge_deltas(*parts):
+    merged = defaultdict(lambda: [0, 0])
+    for part in parts:
+        for key, (count, minutes) in part.items():
+            merged[key][0] += count
+            merged[key][1] += minutes
+    return merged
+
+
+def apply_deltas(deltas):
+    """Add ``{(trainer_id, day, sessionType, status): [count, minutes]}`` to the rollup table."""
+    with transaction.atomic():
+        for key, (count, minutes) in deltas.items():
+            if not count and not minutes:
+                continue
+            bucket = dict(zip(ROLLUP_FIELDS, key))
+            updated = SessionRollup.objects.filter(**bucket).update(
+                count=F('count') + count, minutes=F('minutes') + minutes
+            )
+            if updated:
+                continue
+            try:
+                with transaction.atomic():
+                    SessionRollup.objects.create(count=count, minutes=minutes, **bucket)
+            except IntegrityError:
+                # Another writer created the bucket in the meantime.
+                SessionRollup.objects.filter(**bucket).update(
+                    count=F('count') + count, minutes=F('minutes') + minutes
+                )
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild_rollups(day_from=None, day_to=None, batch_size=2000):
+    """
+    Recompute the rollup table from ``Session`` for ``[day_from, day_to)``.
+
+    Untouched occurrences of recurring series are counted as well. Either
+    bound may be ``None`` to leave that side open. Returns the number of
+    rollup rows written.
+    """
+    rollups = SessionRollup.objects.all()
+    sessions = Session.objects.all()
+    start = end = None
+    if day_from is not None:
+        start = start_of_day(day_from)
+        rollups = rollups.filter(day__gte=day_from)
+        sessions = sessions.filter(date__gte=start)
+    if day_to is not None:
+        end = start_of_day(day_to)
+        rollups = rollups.filter(day__lt=day_to)
+        sessions = sessions.filter(date__lt=end)
+    occurrences = created_deltas(
+        virtual_sessions(overlapping_series(SessionSeries.objects.all(), start, end), start, end)
+    )
+
+    rows = (
+        sessions.order_by()
+        .annotate(day=TruncDate('date'))
+        .values('trainer_id', 'day', 'sessionType', 'status')
+        .annotate(n=Count('id'), total=Sum('duration'))
+    )
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        buckets = (
+            ((row['trainer_id'], row['day'], row['sessionType'], row['status']), row['n'], row['total'])
+            for row in rows.iterator(chunk_size=batch_size)
+        )
+        for key, count, minutes in buckets:
+            extra_count, extra_minutes = occurrences.pop(key, (0, 0))
+            batch.append(SessionRollup(
+                count=count + extra_count, minutes=minutes + extra_minutes, **dict(zip(ROLLUP_FIELDS, key))
+            ))
+            if len(batch) >= batch_size:
+                SessionRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        # Buckets holding only untouched occurrences.
+        for key, (count, minutes) in occurrences.items():
+            batch.append(SessionRollup(count=count, minutes=minutes, **dict(zip(ROLLUP_FIELDS, key))))
+        SessionRollup.objects.bulk_create(batch, batch_size=batch_size)
+        written += len(batch)
+    return written
@@ -0,0 +1,198 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from core.models import Availability, Session, User
+
+# Upper bound on a session's length. Bounding it lets an overlap check look
+# back a fixed distance on the (trainer, date) index instead of scanning all
+# of a trainer's history for long sessions that might still be running.
+MAX_SESSION_MINUTES = 24 * 60
+MAX_SESSION_LENGTH = timedelta(minutes=MAX_SESSION_MINUTES)
+
+# Furthest a bulk update may move sessions in either direction: one year.
+MAX_SHIFT_MINUTES = 366 * 24 * 60
+
+# Cancelled sessions free their slot.
+NON_BLOCKING_STATUSES = ('Cancelled',)
+
+
+def scheduling_timezone():
+    """Zone in which availability windows are interpreted."""
+    return ZoneInfo(getattr(settings, 'SCHEDULING_TIME_ZONE', settings.TIME_ZONE))
+
+
+class TrainerSchedule:
+    """
+    Busy intervals for a set of trainers over a time window.
+
+    Intervals are kept per trainer in a list sorted by start time. Because no
+    session is longer than ``MAX_SESSION_LENGTH``, an overlap check only has to
+    bisect to the starts within ``[start - MAX_SESSION_LENGTH, end)`` and test
+    those few entries, so checking one slot is logarithmic in the number of
+    sessions loaded.
+    """
+
+    def __init__(self):
+        self._busy = defaultdict(list)
+
+    @classmethod
+    def load(cls, trainer_ids, start, end, skip_series=(), skip_occurrences=()):
+        """
+        Load every blocking session of ``trainer_ids`` that can overlap ``[start, end)`` in one query.
+
+        Untouched occurrences of recurring series block too; ``skip_series``
+        and ``skip_occurrences`` are passed to ``core.recurrence.busy_occurrences``.
+        """
+        from core.recurrence import busy_occurrences  # core.recurrence imports this module.
+
+        schedule = cls()
+        rows = (
+            Session.objects.filter(
+                trainer_id__in=trainer_ids,
+                date__gt=start - MAX_SESSION_LENGTH,
+                date__lt=end,
+            )
+            .exclude(status__in=NON_BLOCKING_STATUSES)
+            .values_list('trainer_id', 'date', 'duration', 'id')
+        )
+        for trainer_id, date, duration, session_id in rows:
+            schedule.add(trainer_id, date, date + timedelta(minutes=duration), session_id)
+        for trainer_id, date, duration in busy_occurrences(
+            trainer_ids, start - MAX_SESSION_LENGTH, end, skip_series, skip_occurrences
+        ):
+            schedule.add(trainer_id, date, date + timedelta(minutes=duration))
+        return schedule
+
+    def add(self, trainer_id, start, end, session_id=None):
+        # Unsaved candidates get id 0 so intervals always compare cleanly.
+        insort(self._busy[trainer_id], (start, end, session_id or 0))
+
+    def discard(self, session_ids):
+        """Drop the stored sessions in ``session_ids``, whichever trainer they are booked for."""
+        for trainer_id, busy in self._busy.items():
+            self._busy[trainer_id] = [interval for interval in busy if interval[2] not in session_ids]
+
+    def find_overlap(self, trainer_id, start, end, exclude_id=None):
+        """Return the first ``(start, end, session_id)`` overlapping ``[start, end)``, or ``None``."""
+        busy = self._busy.get(trainer_id)
+        if not busy:
+            return None
+        lo = bisect_left(busy, (start - MAX_SESSION_LENGTH,))
+        hi = bisect_left(busy, (end,))
+        for interval in busy[lo:hi]:
+            if interval[1] > start and (exclude_id is None or interval[2] != exclude_id):
+                return interval
+        return None
+
+
+class AvailabilityIndex:
+    """Weekly availability windows keyed by ``(trainer_id, day name)``."""
+
+    def __init__(self, windows):
+        self._windows = windows
+
+    @classmethod
+    def load(cls, trainer_ids):
+        rows = Availability.objects.filter(trainer_id__in=trainer_ids).values_list(
+            'trainer_id', 'day', 'startTime', 'endTime'
+        )
+        return cls({(trainer_id, day): (start, end) for trainer_id, day, start, end in rows})
+
+    def check(self, trainer_id, start, end):
+        """Return an error message if ``[start, end)`` falls outside the trainer's window, else ``None``."""
+        zone = scheduling_timezone()
+        local_start, local_end = start.astimezone(zone), end.astimezone(zone)
+        day = local_start.strftime('%A')
+        window = self._windows.get((trainer_id, day))
+        if window is None:
+            return f"Trainer is not available on {day}."
+        window_start, window_end = window
+        if (
+            local_end.date() != local_start.date()
+            or local_start.time() < window_start
+            or local_end.time() > window_end
+        ):
+            return (
+                f"Session must fall within the trainer's {day} availability "
+                f"({window_start:%H:%M}-{window_end:%H:%M})."
+            )
+        return None
+
+
+def lock_trainers(trainer_ids):
+    """
+    Lock the rows of ``trainer_ids`` until the transaction ends.
+
+    Booking checks read a trainer's schedule and then write to it; holding the
+    trainer's row keeps a concurrent booking from passing the same check
+    before this one commits. Rows are locked in id order so two writers
+    touching the same trainers cannot deadlock.
+    """
+    list(User.objects.select_for_update().filter(id__in=trainer_ids).order_by('id').values_list('id', flat=True))
+
+
+def validate_slots(slots):
+    """
+    Check many candidate slots in one pass.
+
+    ``slots`` is a sequence of dicts with ``trainer_id``, ``start``,
+    ``duration`` and optionally ``exclude_id`` (the session being moved),
+    ``exclude_series`` (the recurring series being rescheduled) or
+    ``exclude_occurrence`` (the ``(series id, occurrence)`` an exception
+    replaces), which then do not block the candidate. The
+    sessions and availability windows of every trainer involved are loaded
+    with one query each, and each accepted slot is added to the in-memory
+    schedule so candidates in the same batch cannot double-book each other.
+
+    Must run in the transaction that writes the accepted slots: the trainers
+    involved are locked first (``lock_trainers``), so concurrent requests
+    booking the same trainer are checked one after the other.
+
+    Returns a list parallel to ``slots`` holding ``None`` for a valid slot or
+    a ``{field: message}`` dict describing the problem.
+    """
+    if not slots:
+        return []
+
+    trainer_ids = {slot['trainer_id'] for slot in slots}
+    lock_trainers(trainer_ids)
+    window_start = min(slot['start'] for slot in slots)
+    window_end = max(slot['start'] + timedelta(minutes=slot['duration']) for slot in slots)
+
+    schedule = TrainerSchedule.load(
+        trainer_ids, window_start, window_end,
+        skip_series={slot['exclude_series'] for slot in slots if slot.get('exclude_series') is not None},
+        skip_occurrences={slot['exclude_occurrence'] for slot in slots if slot.get('exclude_occurrence') is not None},
+    )
+    availability = AvailabilityIndex.load(trainer_ids)
+
+    # Sessions being moved must not block their own new slot.
+    moving = {slot['exclude_id'] for slot in slots if slot.get('exclude_id') is not None}
+    if moving:
+        schedule.discard(moving)
+
+    errors = []
+    for slot in slots:
+        start = slot['start']
+        end = start + timedelta(minutes=slot['duration'])
+
+        message = availability.check(slot['trainer_id'], start, end)
+        if message:
+            errors.append({'date': message})
+            continue
+
+        overlap = schedule.find_overlap(slot['trainer_id'], start, end)
+        if overlap is not None:
+            clash_start = overlap[0].astimezone(scheduling_timezone())
+            errors.append({
+                'date': f"Trainer already has a session at {clash_start:%Y-%m-%d %H:%M} that overlaps this slot."
+            })
+            continue
+
+        schedule.add(slot['trainer_id'], start, end, slot.get('exclude_id'))
+        errors.append(None)
+    return errors
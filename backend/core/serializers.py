@@ -1,21 +1,81 @@
+import re
+
 from rest_framework import serializers
-from .models import User, Session, Availability
+from .avatars import avatar_url, clear_avatar, parse_data_uri, store_avatar
+from .filters import parse_date_bound
+from .models import User, Session, SessionSeries, Availability
+from .recurrence import MAX_SERIES_OCCURRENCES, is_occurrence, occurrence_slots, occurrences, stored_occurrences
+from .scheduling import MAX_SESSION_MINUTES, MAX_SHIFT_MINUTES, NON_BLOCKING_STATUSES, scheduling_timezone, validate_slots
+
+
+# --- Avatar Field ---
+class AvatarField(serializers.Field):
+    """
+    Reads as the avatar URL; never the image itself.
+
+    Accepts an inline ``data:image/...;base64,`` upload (stored as variants in
+    ``UserAvatar``), an external URL, or an empty value to remove the avatar.
+    Sending back the URL this field produced leaves the avatar unchanged.
+    """
+    CLEAR = 'clear'
+    OWN_URL = re.compile(r'/api/users/[^/]+/avatar/[^/?]+(\?|$)')
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', '*')
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        super().__init__(**kwargs)
+
+    def validate_empty_values(self, data):
+        if data is None:
+            return True, {'avatar': None, 'avatar_upload': self.CLEAR}
+        return super().validate_empty_values(data)
+
+    def to_representation(self, user):
+        return avatar_url(user, self.context.get('request'))
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            raise serializers.ValidationError('Avatar must be a URL or a data URI.')
+        if not data:
+            return {'avatar': None, 'avatar_upload': self.CLEAR}
+        try:
+            upload = parse_data_uri(data)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+        if upload is not None:
+            return {'avatar_upload': upload}
+        if self.OWN_URL.search(data):
+            return {}
+        return {'avatar': data, 'avatar_upload': self.CLEAR}
+
+
+def save_avatar_upload(user, upload):
+    if upload == AvatarField.CLEAR:
+        clear_avatar(user)
+    elif upload is not None:
+        store_avatar(user, *upload)
 
 
 # --- User Read Serializer (for listing, detail, login responses) ---
 class UserSerializer(serializers.ModelSerializer):
+    avatar = AvatarField(read_only=True)
+
     class Meta:
         model = User
-        exclude = ['password']
+        exclude = ['password', 'avatarVersion']
 
 
 # --- User Create/Update Serializer (with password handling) ---
 class UserCreateSerializer(serializers.ModelSerializer):
+    avatar = AvatarField()
+
     class Meta:
         model = User
         fields = '__all__'
         extra_kwargs = {
             'password': {'write_only': True},
+            'avatarVersion': {'read_only': True},
         }
 
     def validate_password(self, value):
@@ -23,27 +83,202 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop('password', None)
+        upload = validated_data.pop('avatar_upload', None)
         user = super().create(validated_data)
         if password:
             user.set_password(password)
             user.save()
+        save_avatar_upload(user, upload)
         return user
 
     def update(self, instance, validated_data):
         password = validated_data.pop('password', None)
+        upload = validated_data.pop('avatar_upload', None)
         user = super().update(instance, validated_data)
         if password:
             user.set_password(password)
             user.save()
+        save_avatar_upload(user, upload)
         return user
 
 
 # --- Session Serializer ---
 class SessionSerializer(serializers.ModelSerializer):
+    SCHEDULING_FIELDS = ('trainer', 'date', 'duration')
+
     class Meta:
         model = Session
         fields = '__all__'
 
+    def validate_duration(self, value):
+        if value < 1 or value > MAX_SESSION_MINUTES:
+            raise serializers.ValidationError(f'Duration must be between 1 and {MAX_SESSION_MINUTES} minutes.')
+        return value
+
+    def validate(self, data):
+        instance = self.instance
+        current = lambda field: data[field] if field in data else getattr(instance, field, None)
+
+        self.validate_exception(data, current)
+        status = current('status')
+        if status in NON_BLOCKING_STATUSES:
+            return data
+
+        # Only re-check the slot when it moves or becomes blocking again, so
+        # status updates on existing sessions are never rejected.
+        if instance is not None and not (
+            any(field in data and data[field] != getattr(instance, field) for field in self.SCHEDULING_FIELDS)
+            or instance.status in NON_BLOCKING_STATUSES
+        ):
+            return data
+
+        series = current('series')
+        error, = validate_slots([{
+            'trainer_id': current('trainer').id,
+            'start': current('date'),
+            'duration': current('duration'),
+            'exclude_id': instance.id if instance is not None else None,
+            'exclude_occurrence': (series.id, current('occurrence')) if series is not None else None,
+        }])
+        if error:
+            raise serializers.ValidationError(error)
+        return data
+
+    def validate_exception(self, data, current):
+        """
+        A session with ``series`` is an exception replacing that series' ``occurrence``.
+
+        Both are set when the exception is created and cannot be changed later.
+        """
+        if self.instance is not None:
+            if any(field in data and data[field] != getattr(self.instance, field) for field in ('series', 'occurrence')):
+                raise serializers.ValidationError({'series': 'The series and occurrence of a session cannot be changed.'})
+            return
+        series, occurrence = current('series'), current('occurrence')
+        if series is None and occurrence is None:
+            return
+        if series is None or occurrence is None:
+            raise serializers.ValidationError({'occurrence': 'An exception needs both series and occurrence.'})
+        if not is_occurrence(series, occurrence):
+            raise serializers.ValidationError({'occurrence': 'Not an occurrence of this series.'})
+
+
+# --- Session Series Serializer ---
+class SessionSeriesSerializer(serializers.ModelSerializer):
+    """
+    A weekly recurring session; ``until`` or ``count`` bounds it.
+
+    Every occurrence without a stored exception is checked against the
+    trainer's availability and bookings in one ``validate_slots`` pass.
+    """
+    days = serializers.ListField(child=serializers.ChoiceField(choices=Availability.DAYS), allow_empty=False)
+    MAX_REPORTED_CONFLICTS = 10
+
+    class Meta:
+        model = SessionSeries
+        exclude = ['sweptThrough']
+        read_only_fields = ['lastStart']
+
+    def validate_duration(self, value):
+        if value < 1 or value > MAX_SESSION_MINUTES:
+            raise serializers.ValidationError(f'Duration must be between 1 and {MAX_SESSION_MINUTES} minutes.')
+        return value
+
+    def validate_count(self, value):
+        if value is not None and not 1 <= value <= MAX_SERIES_OCCURRENCES:
+            raise serializers.ValidationError(f'Count must be between 1 and {MAX_SERIES_OCCURRENCES}.')
+        return value
+
+    def validate(self, data):
+        instance = self.instance
+        if instance is not None:
+            candidate = SessionSeries(**{
+                field.attname: getattr(instance, field.attname) for field in SessionSeries._meta.concrete_fields
+            })
+            for field, value in data.items():
+                setattr(candidate, field, value)
+        else:
+            candidate = SessionSeries(**data)
+        candidate.days = [day for day, _ in Availability.DAYS if day in candidate.days]
+        data['days'] = candidate.days
+
+        if (candidate.until is None) == (candidate.count is None):
+            raise serializers.ValidationError({'until': 'Set exactly one of until and count.'})
+        starts = list(occurrences(candidate, limit=MAX_SERIES_OCCURRENCES + 1))
+        if not starts:
+            raise serializers.ValidationError({'days': 'The series has no occurrences.'})
+        if len(starts) > MAX_SERIES_OCCURRENCES:
+            raise serializers.ValidationError(
+                {'until': f'A series can have at most {MAX_SERIES_OCCURRENCES} occurrences.'}
+            )
+        data['lastStart'] = starts[-1]
+
+        skip = {moment for _, moment in stored_occurrences([instance.id])} if instance is not None else set()
+        slots = occurrence_slots(candidate, skip)
+        conflicts = [
+            f"{slot['start'].astimezone(scheduling_timezone()):%Y-%m-%d %H:%M}: {error['date']}"
+            for slot, error in zip(slots, validate_slots(slots)) if error
+        ]
+        if conflicts:
+            raise serializers.ValidationError({'start': conflicts[:self.MAX_REPORTED_CONFLICTS]})
+        return data
+
+
+# --- Session Import Row Serializer ---
+class SessionImportRowSerializer(serializers.Serializer):
+    """
+    Field checks for one imported session row.
+
+    Trainer existence and slot conflicts are checked per batch by
+    ``core.session_import`` instead of per row.
+    """
+    trainer = serializers.IntegerField()
+    batch = serializers.CharField(max_length=100)
+    sessionType = serializers.CharField(max_length=50)
+    date = serializers.DateTimeField()
+    duration = serializers.IntegerField(min_value=1, max_value=MAX_SESSION_MINUTES)
+    location = serializers.CharField(max_length=100)
+    status = serializers.ChoiceField(choices=Session.STATUS_CHOICES, default='Scheduled')
+
+
+# --- Bulk Session Update Serializers ---
+class BulkSessionFilterSerializer(serializers.Serializer):
+    """Which sessions a bulk update touches; every given criterion must match."""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    trainer = serializers.IntegerField(required=False)
+    dateFrom = serializers.CharField(required=False)
+    dateTo = serializers.CharField(required=False)
+    location = serializers.CharField(max_length=100, required=False)
+    batch = serializers.CharField(max_length=100, required=False)
+    status = serializers.ChoiceField(choices=Session.STATUS_CHOICES, required=False)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError('Give at least one filter.')
+        if 'dateFrom' in data:
+            data['dateFrom'] = parse_date_bound(data['dateFrom'], 'dateFrom')
+        if 'dateTo' in data:
+            data['dateTo'] = parse_date_bound(data['dateTo'], 'dateTo', end=True)
+        return data
+
+
+class BulkSessionChangeSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Session.STATUS_CHOICES, required=False)
+    trainer = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
+    shiftMinutes = serializers.IntegerField(min_value=-MAX_SHIFT_MINUTES, max_value=MAX_SHIFT_MINUTES, required=False)
+
+    def validate(self, data):
+        if data.get('shiftMinutes') == 0:
+            del data['shiftMinutes']
+        if not data:
+            raise serializers.ValidationError('Give at least one change.')
+        return data
+
+
+class BulkSessionUpdateSerializer(serializers.Serializer):
+    filter = BulkSessionFilterSerializer()
+    changes = BulkSessionChangeSerializer()
+
 
 # --- Availability Serializer ---
 class AvailabilitySerializer(serializers.ModelSerializer):
@@ -52,6 +287,52 @@ class AvailabilitySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+# --- Weekly Schedule Entry Serializer (for availability PUT) ---
+class AvailabilityEntrySerializer(serializers.Serializer):
+    day = serializers.ChoiceField(choices=Availability.DAYS)
+    startTime = serializers.TimeField()
+    endTime = serializers.TimeField()
+
+    def validate(self, data):
+        if data['startTime'] >= data['endTime']:
+            raise serializers.ValidationError({'endTime': 'End time must be after start time.'})
+        return data
+
+
+class WeeklyScheduleSerializer(serializers.ListSerializer):
+    child = AvailabilityEntrySerializer()
+
+    def validate(self, data):
+        days = [entry['day'] for entry in data]
+        duplicates = sorted({day for day in days if days.count(day) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate entries for: {', '.join(duplicates)}.")
+        return data
+
+
+# --- Auto-Assignment Request Serializer ---
+class AssignmentRequestSerializer(serializers.Serializer):
+    batch = serializers.CharField(max_length=100)
+    sessionType = serializers.CharField(max_length=50)
+    # Copied onto the created session; the solver does not check rooms.
+    location = serializers.CharField(max_length=100)
+    duration = serializers.IntegerField(min_value=1, max_value=MAX_SESSION_MINUTES)
+    windowStart = serializers.DateTimeField()
+    windowEnd = serializers.DateTimeField()
+    trainers = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+    def validate(self, data):
+        if data['windowEnd'] <= data['windowStart']:
+            raise serializers.ValidationError({'windowEnd': 'Window end must be after window start.'})
+        return data
+
+
+class AutoAssignSerializer(serializers.Serializer):
+    requests = AssignmentRequestSerializer(many=True, allow_empty=False)
+    commit = serializers.BooleanField(default=False)
+    step = serializers.IntegerField(min_value=1, max_value=60, default=15)
+
+
 # --- Password Change Serializer ---
 class ChangePasswordSerializer(serializers.Serializer):
     current_password = serializers.CharField()
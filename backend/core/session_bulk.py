@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from core import live_events
+from core.models import Session, SessionSeries
+from core.recurrence import OCCURRENCE_STATUS, overlapping_series, virtual_sessions
+from core.rollups import apply_deltas, created_deltas, grouped_deltas, merge_deltas
+from core.scheduling import NON_BLOCKING_STATUSES, validate_slots
+from core.versioning import bump, session_scopes
+
+MAX_REPORTED_CONFLICTS = 50
+
+
+class BulkConflict(Exception):
+    """The change would double-book a trainer or leave their availability; nothing was written."""
+
+    def __init__(self, conflicts):
+        super().__init__(conflicts)
+        self.conflicts = conflicts
+
+
+class SessionBulkUpdate:
+    """
+    Apply one change set to every session matching a filter, in one transaction.
+
+    ``criteria`` and ``changes`` are the validated ``filter`` and ``changes``
+    of ``BulkSessionUpdateSerializer``. Stored sessions are changed with a
+    single UPDATE; their rollup buckets are moved with one GROUP BY that
+    computes where each bucket lands before the write. Untouched occurrences
+    of recurring series that match are stored as exceptions carrying the
+    change, with one ``bulk_create``.
+
+    When the change can create new bookings (another trainer, a time shift,
+    or a cancelled session becoming blocking), every affected session is
+    checked in one ``validate_slots`` pass first; any conflict raises
+    :class:`BulkConflict` before anything is written.
+    """
+
+    def __init__(self, criteria, changes):
+        self.criteria = criteria
+        self.status = changes.get('status')
+        self.trainer_id = changes['trainer'].id if 'trainer' in changes else None
+        self.shift = timedelta(minutes=changes.get('shiftMinutes', 0))
+
+    def stored(self):
+        criteria = self.criteria
+        queryset = Session.objects.all()
+        if 'ids' in criteria:
+            queryset = queryset.filter(id__in=criteria['ids'])
+        if 'trainer' in criteria:
+            queryset = queryset.filter(trainer_id=criteria['trainer'])
+        if 'dateFrom' in criteria:
+            queryset = queryset.filter(date__gte=criteria['dateFrom'])
+        if 'dateTo' in criteria:
+            queryset = queryset.filter(date__lt=criteria['dateTo'])
+        for field in ('location', 'batch', 'status'):
+            if field in criteria:
+                queryset = queryset.filter(**{field: criteria[field]})
+        return queryset
+
+    def occurrences(self):
+        """Unsaved untouched series occurrences matching the filter; ids only ever match stored rows."""
+        criteria = self.criteria
+        if 'ids' in criteria or criteria.get('status', OCCURRENCE_STATUS) != OCCURRENCE_STATUS:
+            return []
+        start, end = criteria.get('dateFrom'), criteria.get('dateTo')
+        series = overlapping_series(SessionSeries.objects.all(), start, end)
+        if 'trainer' in criteria:
+            series = series.filter(trainer_id=criteria['trainer'])
+        for field in ('location', 'batch'):
+            if field in criteria:
+                series = series.filter(**{field: criteria[field]})
+        return virtual_sessions(series, start, end)
+
+    def run(self):
+        """Apply the change and return the affected counts, or raise :class:`BulkConflict`."""
+        with transaction.atomic():
+            stored = self.stored()
+            occurrences = self.occurrences()
+            self.check_conflicts(stored, occurrences)
+
+            deltas = grouped_deltas(stored, status=self.status, trainer_id=self.trainer_id, shift=self.shift)
+            assignments = {}
+            if self.status is not None:
+                assignments['status'] = self.status
+            if self.trainer_id is not None:
+                assignments['trainer_id'] = self.trainer_id
+            if self.shift:
+                assignments['date'] = F('date') + self.shift
+            updated = stored.update(**assignments)
+
+            if occurrences:
+                before = created_deltas(occurrences, sign=-1)
+                for session in occurrences:
+                    self.apply(session)
+                Session.objects.bulk_create(occurrences)
+                deltas = merge_deltas(deltas, before, created_deltas(occurrences))
+
+            apply_deltas(deltas)
+            # UPDATE and bulk_create send no signals, so move the list ETags on explicitly.
+            if updated or occurrences:
+                trainer_ids = {trainer_id for trainer_id, *_ in deltas}
+                bump(*session_scopes(*trainer_ids))
+                live_events.sessions_changed(trainer_ids, 'bulk-update')
+        return {'updated': updated, 'materialized': len(occurrences), 'total': updated + len(occurrences)}
+
+    def apply(self, session):
+        if self.status is not None:
+            session.status = self.status
+        if self.trainer_id is not None:
+            session.trainer_id = self.trainer_id
+        session.date += self.shift
+
+    def check_conflicts(self, stored, occurrences):
+        if self.status in NON_BLOCKING_STATUSES:
+            return
+        slots = []
+        rows = stored.values_list('id', 'trainer_id', 'date', 'duration', 'status', 'series_id', 'occurrence')
+        for pk, trainer_id, date, duration, status, series_id, occurrence in rows:
+            reactivated = self.status is not None and status in NON_BLOCKING_STATUSES
+            if status in NON_BLOCKING_STATUSES and not reactivated:
+                continue
+            if self.trainer_id in (None, trainer_id) and not self.shift and not reactivated:
+                continue
+            slots.append({
+                'trainer_id': self.trainer_id or trainer_id, 'start': date + self.shift, 'duration': duration,
+                'exclude_id': pk, 'label': {'id': pk, 'series': series_id, 'occurrence': occurrence},
+            })
+        if self.trainer_id is not None or self.shift:
+            for session in occurrences:
+                slots.append({
+                    'trainer_id': self.trainer_id or session.trainer_id, 'start': session.date + self.shift,
+                    'duration': session.duration,
+                    'exclude_occurrence': (session.series_id, session.occurrence),
+                    'label': {'id': None, 'series': session.series_id, 'occurrence': session.occurrence},
+                })
+
+        # validate_slots pools the exclusions of all slots, so every session and
+        # occurrence in the update set stops blocking, not just each slot's own:
+        # a series shifted by a week does not clash with its next occurrence.
+        conflicts = [
+            {**slot['label'], **error}
+            for slot, error in zip(slots, validate_slots(slots)) if error
+        ]
+        if conflicts:
+            raise BulkConflict(conflicts[:MAX_REPORTED_CONFLICTS])
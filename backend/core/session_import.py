@@ -0,0 +1,223 @@
+import codecs
+import csv
+import json
+from contextlib import nullcontext
+from itertools import islice
+
+from django.db import transaction
+
+from core import live_events
+from core.models import Session, User
+from core.rollups import apply_deltas, created_deltas
+from core.scheduling import NON_BLOCKING_STATUSES, validate_slots
+from core.serializers import SessionImportRowSerializer
+from core.versioning import bump, session_scopes
+
+ATOMIC = 'all-or-nothing'
+BEST_EFFORT = 'best-effort'
+MODES = (ATOMIC, BEST_EFFORT)
+
+CSV = 'csv'
+JSON_LINES = 'jsonl'
+FORMATS = (CSV, JSON_LINES)
+
+IMPORT_FIELDS = tuple(SessionImportRowSerializer().fields)
+REQUIRED_COLUMNS = tuple(
+    name for name, field in SessionImportRowSerializer().fields.items() if field.required
+)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+MAX_IMPORT_ROWS = 100000
+# Row errors listed in the report; the counts always cover every row.
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """The upload cannot be read as the requested format at all (as opposed to a bad row)."""
+
+
+class RollbackImport(Exception):
+    """Raised to discard an all-or-nothing import that had failing rows."""
+
+
+def detect_format(content_type, filename=''):
+    """``csv`` or ``jsonl`` from an upload's content type or file name; ``None`` when neither says."""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    filename = (filename or '').lower()
+    if content_type in ('text/csv', 'application/csv') or filename.endswith('.csv'):
+        return CSV
+    if content_type in ('application/jsonl', 'application/x-ndjson', 'application/x-jsonlines') or \
+            filename.endswith(('.jsonl', '.ndjson')):
+        return JSON_LINES
+    return None
+
+
+def csv_rows(lines):
+    """
+    Yield ``(line number, row dict)`` for each data row of a CSV with a header row.
+
+    ``lines`` is any iterable of byte lines (an upload or the request body),
+    read one line at a time. Empty cells count as missing so that optional
+    columns such as ``status`` fall back to their defaults.
+    """
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig', errors='replace'))
+    try:
+        header = reader.fieldnames or []
+    except csv.Error as exc:
+        raise ImportFormatError(f"Cannot read the CSV header: {exc}.")
+    missing = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing:
+        raise ImportFormatError(f"Missing CSV column(s): {', '.join(missing)}.")
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield reader.line_num, f"Malformed CSV: {exc}."
+            return
+        yield reader.line_num, {key: value for key, value in row.items() if key in IMPORT_FIELDS and value != ''}
+
+
+def json_lines_rows(lines):
+    """Yield ``(line number, object)`` for each non-blank line of a JSON-lines stream."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, "Line is not valid JSON."
+            continue
+        if not isinstance(row, dict):
+            yield number, "Each line must be a JSON object."
+            continue
+        yield number, row
+
+
+class SessionImporter:
+    """
+    Create sessions from a stream of parsed rows in chunks of ``chunk_size``.
+
+    Rows are field-checked one by one, but everything that needs the database
+    runs once per chunk: the trainer ids of the chunk are resolved with one
+    query and the slots go through one ``validate_slots`` pass, which also
+    catches rows of the same chunk double-booking each other. The valid rows
+    are then written with ``bulk_create`` and the daily rollups updated from
+    the same objects. Each chunk is inserted before the next one is checked,
+    so overlaps across chunks are caught too.
+
+    In ``all-or-nothing`` mode the whole import is one transaction that is
+    rolled back if any row failed; every row is still checked so the report
+    is complete. In ``best-effort`` mode each chunk commits on its own and
+    failing rows are skipped.
+    """
+
+    def __init__(self, mode=ATOMIC, chunk_size=DEFAULT_CHUNK_SIZE, max_rows=MAX_IMPORT_ROWS):
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_rows = max_rows
+        self.received = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Import ``(line, row dict or error message)`` pairs and return the report."""
+        rows = iter(rows)
+        try:
+            with transaction.atomic() if self.mode == ATOMIC else nullcontext():
+                while chunk := list(islice(rows, self.chunk_size)):
+                    room = self.max_rows - self.received
+                    if len(chunk) > room:
+                        if room:
+                            self.import_chunk(chunk[:room])
+                        self.fail(chunk[room][0], f"Imports are limited to {self.max_rows} rows; the rest was not read.")
+                        break
+                    self.import_chunk(chunk)
+                if self.mode == ATOMIC and self.failed:
+                    raise RollbackImport
+        except RollbackImport:
+            self.created = 0
+        return self.report()
+
+    def import_chunk(self, chunk):
+        self.received += len(chunk)
+        valid = []
+        for line, raw in chunk:
+            if isinstance(raw, str):
+                self.fail(line, raw)
+                continue
+            serializer = SessionImportRowSerializer(data=raw)
+            if not serializer.is_valid():
+                self.fail(line, serializer.errors)
+                continue
+            valid.append((line, serializer.validated_data))
+
+        known = set(
+            User.objects.filter(id__in={data['trainer'] for _, data in valid}).values_list('id', flat=True)
+        )
+        accepted = []
+        for line, data in valid:
+            if data['trainer'] not in known:
+                self.fail(line, {'trainer': [f'Invalid pk "{data["trainer"]}" - object does not exist.']})
+            else:
+                accepted.append((line, data))
+
+        # The trainers stay locked from the slot check until the chunk is stored.
+        with transaction.atomic():
+            self.insert_chunk(accepted)
+
+    def insert_chunk(self, accepted):
+        """Check the slots of ``accepted`` rows and insert those that fit."""
+        blocking = [(line, data) for line, data in accepted if data['status'] not in NON_BLOCKING_STATUSES]
+        conflicts = validate_slots([
+            {'trainer_id': data['trainer'], 'start': data['date'], 'duration': data['duration']}
+            for _, data in blocking
+        ])
+        rejected = set()
+        for (line, _), error in zip(blocking, conflicts):
+            if error:
+                rejected.add(line)
+                self.fail(line, {field: [message] for field, message in error.items()})
+
+        sessions = [
+            Session(
+                trainer_id=data['trainer'],
+                batch=data['batch'],
+                sessionType=data['sessionType'],
+                date=data['date'],
+                duration=data['duration'],
+                location=data['location'],
+                status=data['status'],
+            )
+            for line, data in accepted if line not in rejected
+        ]
+        if not sessions:
+            return
+        Session.objects.bulk_create(sessions, batch_size=self.chunk_size)
+        apply_deltas(created_deltas(sessions))
+        # bulk_create sends no signals, so move the list ETags on explicitly.
+        trainer_ids = {session.trainer_id for session in sessions}
+        bump(*session_scopes(*trainer_ids))
+        live_events.sessions_changed(trainer_ids, 'import')
+        self.created += len(sessions)
+
+    def fail(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            if isinstance(errors, str):
+                errors = {'non_field_errors': [errors]}
+            self.errors.append({'line': line, 'errors': errors})
+
+    def report(self):
+        return {
+            'mode': self.mode,
+            'received': self.received,
+            'created': self.created,
+            'failed': self.failed,
+            'committed': bool(self.created),
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errorsTruncated': self.failed > len(self.errors),
+        }
@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core import live_events
+from core.authentication import forget_tokens
+from core.models import Availability, Session, SessionSeries, User
+from core.signed_tokens import revoke_user, signed_mode
+from core.versioning import availability_scopes, bump, session_scopes, user_scopes
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    forget_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    # Any change to the user (deactivation, password, profile) must be seen
+    # by the next request, so cached resolutions for their tokens are dropped.
+    if not created:
+        forget_tokens(*Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+@receiver(pre_save, sender=User)
+def revoke_signed_tokens(sender, instance, **kwargs):
+    # Signed tokens cannot be deleted, so a password change, deactivation or
+    # role change (access tokens carry the role) revokes everything issued to
+    # the user up to the commit. DB tokens are dropped with the user's token
+    # cache instead, so db mode skips the read.
+    if instance.pk is None or not signed_mode():
+        return
+    previous = User.objects.filter(pk=instance.pk).values('password', 'is_active', 'role').first()
+    if previous and (
+        previous['password'] != instance.password
+        or (previous['is_active'] and not instance.is_active)
+        or previous['role'] != instance.role
+    ):
+        transaction.on_commit(lambda: revoke_user(instance.pk))
+
+
+@receiver(post_init, sender=Session)
+@receiver(post_init, sender=SessionSeries)
+def remember_session_trainer(sender, instance, **kwargs):
+    # Lets a save that moves a session to another trainer bump both lists.
+    # Read through __dict__ so a deferred trainer_id is not loaded row by row.
+    instance._loaded_trainer_id = instance.__dict__.get('trainer_id')
+
+
+@receiver(post_save, sender=Session)
+@receiver(post_delete, sender=Session)
+@receiver(post_save, sender=SessionSeries)
+@receiver(post_delete, sender=SessionSeries)
+def bump_session_versions(sender, instance, signal, **kwargs):
+    trainer_ids = {instance.trainer_id, instance._loaded_trainer_id} - {None}
+    bump(*session_scopes(*trainer_ids))
+    instance._loaded_trainer_id = instance.trainer_id
+
+    # The trainer a session moved away from hears about it too.
+    if sender is SessionSeries:
+        live_events.series_changed(instance, 'saved' if signal is post_save else 'deleted', *trainer_ids)
+    elif signal is post_save:
+        live_events.session_saved(instance, *trainer_ids)
+    else:
+        live_events.session_deleted(instance)
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def bump_availability_versions(sender, instance, **kwargs):
+    bump(*availability_scopes(instance.trainer_id))
+
+
+@receiver(post_save, sender=Availability)
+def publish_availability_saved(sender, instance, **kwargs):
+    live_events.availability_saved(instance)
+
+
+@receiver(post_delete, sender=Availability)
+def publish_availability_deleted(sender, instance, **kwargs):
+    live_events.availability_deleted(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_versions(sender, instance, **kwargs):
+    bump(*user_scopes())
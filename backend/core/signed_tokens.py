@@ -0,0 +1,148 @@
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from core.models import User
+
+ACCESS_SALT = 'core.signed_tokens.access'
+REFRESH_SALT = 'core.signed_tokens.refresh'
+DENY_PREFIX = 'auth:deny:'
+REVOKED_BEFORE_PREFIX = 'auth:revoked-before:'
+
+
+def signed_mode():
+    return getattr(settings, 'AUTH_TOKEN_MODE', 'db') == 'signed'
+
+
+# Backends whose entries are private to one process and lost on restart.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def deny_cache():
+    return caches[getattr(settings, 'AUTH_DENY_CACHE_ALIAS', 'default')]
+
+
+def check_deny_cache():
+    """
+    Refuse signed mode when logouts and revocations would not reach every worker.
+
+    A signed token stays valid until it expires unless the deny-list says
+    otherwise, so the deny-list must be shared between workers and survive
+    restarts. Called once at startup from ``CoreConfig.ready``.
+    """
+    if not signed_mode():
+        return
+    alias = getattr(settings, 'AUTH_DENY_CACHE_ALIAS', 'default')
+    if settings.CACHES.get(alias, {}).get('BACKEND') in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f"AUTH_TOKEN_MODE='signed' needs a shared, persistent cache for the deny-list, but "
+            f"AUTH_DENY_CACHE_ALIAS='{alias}' is process-local. Set AUTH_DENY_CACHE_DIR or point "
+            f"AUTH_DENY_CACHE_ALIAS at a shared cache."
+        )
+
+
+def make_token(user, salt, ttl):
+    # Sub-second issue times, so a login right after a revocation is not caught by it.
+    now = time.time()
+    payload = {
+        'uid': user.pk,
+        'role': user.role,
+        'jti': secrets.token_urlsafe(8),
+        'iat': now,
+        'exp': int(now) + ttl,
+    }
+    return signing.dumps(payload, salt=salt, compress=True)
+
+
+def read_token(token, salt):
+    """Verify ``token`` and return its payload, or raise ``AuthenticationFailed``."""
+    try:
+        payload = signing.loads(token, salt=salt)
+    except signing.BadSignature:
+        raise exceptions.AuthenticationFailed('Invalid token.')
+    if payload.get('exp', 0) <= time.time():
+        raise exceptions.AuthenticationFailed('Token has expired.')
+
+    denied = deny_cache().get_many([
+        f"{DENY_PREFIX}{payload['jti']}",
+        f"{REVOKED_BEFORE_PREFIX}{payload['uid']}",
+    ])
+    revoked_before = denied.get(f"{REVOKED_BEFORE_PREFIX}{payload['uid']}")
+    if f"{DENY_PREFIX}{payload['jti']}" in denied or (revoked_before and payload['iat'] <= revoked_before):
+        raise exceptions.AuthenticationFailed('Token has been revoked.')
+    return payload
+
+
+def deny(payload):
+    """Put one token on the deny-list until it would have expired anyway."""
+    remaining = int(payload['exp'] - time.time())
+    if remaining > 0:
+        deny_cache().set(f"{DENY_PREFIX}{payload['jti']}", True, timeout=remaining)
+
+
+def revoke_user(user_id):
+    """Reject every signed token issued to ``user_id`` up to now (forced logout)."""
+    deny_cache().set(
+        f"{REVOKED_BEFORE_PREFIX}{user_id}",
+        time.time(),
+        timeout=settings.SIGNED_REFRESH_TOKEN_TTL,
+    )
+
+
+def issue_tokens(user):
+    """
+    Credentials returned by the login endpoints.
+
+    In the default ``db`` mode this is the permanent DRF token. With
+    ``AUTH_TOKEN_MODE=signed`` it is a short-lived signed access token plus a
+    refresh token, and nothing is written to the database.
+    """
+    if not signed_mode():
+        token, _ = Token.objects.get_or_create(user=user)
+        return {'token': token.key}
+    return {
+        'token': make_token(user, ACCESS_SALT, settings.SIGNED_ACCESS_TOKEN_TTL),
+        'refreshToken': make_token(user, REFRESH_SALT, settings.SIGNED_REFRESH_TOKEN_TTL),
+        'expiresIn': settings.SIGNED_ACCESS_TOKEN_TTL,
+    }
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate HMAC-signed access tokens without touching the database.
+
+    Accepts ``Authorization: Bearer <token>`` and, so existing clients keep
+    working, ``Token <token>`` when the value is a signed token rather than a
+    40-character DB key. ``request.user`` is an unsaved ``User`` carrying only
+    the id and role from the token; views that need the full profile load it.
+    """
+    keywords = ('Bearer', 'Token')
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].decode(errors='ignore') not in self.keywords:
+            return None
+        try:
+            token = auth[1].decode()
+        except UnicodeError:
+            return None
+        if ':' not in token:
+            return None  # A DB token key; leave it to CachedTokenAuthentication.
+
+        payload = read_token(token, ACCESS_SALT)
+        user = User(id=payload['uid'], role=payload['role'], is_active=True)
+        user.is_claims_only = True
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -0,0 +1,256 @@
+import random
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Availability, Session, User
+from core.rollups import rebuild_rollups
+from core.scheduling import scheduling_timezone
+from core.versioning import availability_scopes, bump, session_scopes, user_scopes
+
+FIRST_NAMES = (
+    'Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Kavya', 'Nikhil', 'Sneha',
+    'Rahul', 'Divya', 'Karan', 'Isha', 'Aditya', 'Pooja', 'Sanjay', 'Neha', 'Manish', 'Riya',
+)
+LAST_NAMES = (
+    'Sharma', 'Patel', 'Iyer', 'Reddy', 'Nair', 'Gupta', 'Mehta', 'Rao', 'Das', 'Kulkarni',
+    'Joshi', 'Menon', 'Singh', 'Bose', 'Pillai', 'Chopra', 'Desai', 'Verma', 'Shah', 'Kapoor',
+)
+SESSION_TYPES = ('Lecture', 'Lab', 'Workshop', 'Assessment', 'Mentoring')
+LOCATIONS = ('Room 101', 'Room 102', 'Room 204', 'Lab A', 'Lab B', 'Auditorium', 'Online')
+DURATIONS = (30, 45, 60)
+BATCH_WEEKS = (8, 12, 16)  # How long one batch keeps its weekly slot.
+WEEKDAYS = [day for day, _ in Availability.DAYS]  # Sunday first, like date.isoweekday() % 7.
+
+
+class TrainerPlan:
+    """One synthetic trainer's working week: the days and hours they are available."""
+
+    def __init__(self, index, days, start_hour, end_hour):
+        self.index = index
+        self.days = days
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+
+    def weekly_slots(self):
+        """``(weekday offset from Sunday, hour)`` starts of hour-long slots inside the availability."""
+        return [
+            (WEEKDAYS.index(day), hour)
+            for day in self.days
+            for hour in range(self.start_hour, self.end_hour)
+        ]
+
+
+class SyntheticDataset:
+    """
+    Reproducible, production-shaped data: trainers, weekly availability and session history.
+
+    Each trainer works a fixed set of weekdays and hours. Sessions come from
+    batches that hold one weekly hour slot of a trainer for 8-16 weeks before
+    the next batch takes it over, so histories recur like real timetables and
+    a trainer is never double-booked. Sessions before ``now`` are mostly
+    Completed with some Absent and Cancelled; later ones are Scheduled.
+    Everything is derived from ``seed`` and the current hour, so the same
+    arguments produce the same rows relative to today.
+    """
+
+    def __init__(self, trainers, sessions, days_back=730, days_ahead=30, seed=42, domain='synthetic.invalid'):
+        self.trainer_count = trainers
+        self.session_count = sessions
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.seed = seed
+        self.domain = domain
+        self.now = timezone.now().replace(minute=0, second=0, microsecond=0)
+        rng = random.Random(seed)
+        self.plans = [self.make_plan(rng, i) for i in range(trainers)]
+
+    @staticmethod
+    def make_plan(rng, index):
+        workdays = rng.choice((WEEKDAYS[1:6], WEEKDAYS[1:7], WEEKDAYS[0:5], WEEKDAYS))
+        start_hour = rng.choice((7, 8, 9, 10))
+        return TrainerPlan(index, list(workdays), start_hour, start_hour + rng.choice((8, 9, 10)))
+
+    def admin_email(self):
+        return f'admin@{self.domain}'
+
+    def trainer_email(self, index):
+        return f'trainer{index}@{self.domain}'
+
+    def trainers(self, password=None):
+        """Unsaved trainer ``User`` rows; all share one hashed ``password`` (unusable when ``None``)."""
+        rng = random.Random(self.seed + 1)
+        hashed = make_password(password)
+        return [
+            User(
+                name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                email=self.trainer_email(plan.index),
+                role='trainer',
+                password=hashed,
+            )
+            for plan in self.plans
+        ]
+
+    def availabilities(self, trainer_ids):
+        for plan, trainer_id in zip(self.plans, trainer_ids):
+            for day in plan.days:
+                yield Availability(
+                    trainer_id=trainer_id, day=day, startTime=dtime(plan.start_hour), endTime=dtime(plan.end_hour)
+                )
+
+    def capacity(self):
+        """Most sessions the trainers' weekly slots can hold over the time span."""
+        weeks = (self.days_back + self.days_ahead) // 7
+        return sum(len(plan.weekly_slots()) for plan in self.plans) * weeks
+
+    def quotas(self):
+        """
+        Sessions per trainer, in plan order.
+
+        Each trainer gets an even share; what a trainer's weekly slots cannot
+        hold over the span is shared out again among those with room left.
+        """
+        weeks = (self.days_back + self.days_ahead) // 7
+        room = [len(plan.weekly_slots()) * weeks for plan in self.plans]
+        quotas = [0] * len(self.plans)
+        remaining = self.session_count
+        open_positions = list(range(len(self.plans)))
+        while remaining and open_positions:
+            base, extra = divmod(remaining, len(open_positions))
+            still_open = []
+            for rank, position in enumerate(open_positions):
+                share = min(base + (1 if rank < extra else 0), room[position] - quotas[position])
+                quotas[position] += share
+                remaining -= share
+                if quotas[position] < room[position]:
+                    still_open.append(position)
+            open_positions = still_open
+        return quotas
+
+    def sessions(self, trainer_ids):
+        """
+        Yield exactly ``session_count`` unsaved sessions, spread as evenly over the trainers as their slots allow.
+
+        Raises ``ValueError`` when the trainers' availability cannot hold that
+        many non-overlapping sessions over the configured span.
+        """
+        if self.session_count > self.capacity():
+            raise ValueError(
+                f"{self.trainer_count} trainers can hold at most {self.capacity()} sessions over "
+                f"{self.days_back + self.days_ahead} days; add trainers or days."
+            )
+        rng = random.Random(self.seed + 2)
+        zone = scheduling_timezone()
+        first_sunday = (self.now - timedelta(days=self.days_back)).date()
+        first_sunday -= timedelta(days=first_sunday.isoweekday() % 7)
+        weeks = (self.days_back + self.days_ahead) // 7
+
+        batch_number = 0
+        for quota, plan, trainer_id in zip(self.quotas(), self.plans, trainer_ids):
+            slots = plan.weekly_slots()
+            rng.shuffle(slots)
+            # Busy trainers fill most slots every week, quiet ones only a few.
+            per_slot, remainder = divmod(quota, len(slots))
+            for slot_number, (weekday, hour) in enumerate(slots):
+                wanted = per_slot + (1 if slot_number < remainder else 0)
+                if not wanted:
+                    continue
+                # The slot's busy weeks end at or just before the end of the span.
+                first_week = max(0, weeks - wanted - rng.randrange(4))
+                week = first_week
+                while week < first_week + wanted:
+                    batch_number += 1
+                    batch = f"Batch {batch_number:05d}"
+                    session_type = rng.choice(SESSION_TYPES)
+                    location = rng.choice(LOCATIONS)
+                    duration = rng.choice(DURATIONS)
+                    length = min(rng.choice(BATCH_WEEKS), first_week + wanted - week)
+                    for offset in range(length):
+                        day = first_sunday + timedelta(weeks=week + offset, days=weekday)
+                        date = datetime.combine(day, dtime(hour), tzinfo=zone)
+                        yield Session(
+                            trainer_id=trainer_id,
+                            batch=batch,
+                            sessionType=session_type,
+                            date=date,
+                            duration=duration,
+                            location=location,
+                            status=self.status(rng, date),
+                        )
+                    week += length
+
+    def status(self, rng, date):
+        if date >= self.now:
+            return 'Scheduled'
+        roll = rng.random()
+        if roll < 0.85:
+            return 'Completed'
+        return 'Cancelled' if roll < 0.95 else 'Absent'
+
+
+def write_batches(model, objects, batch_size=5000, progress=None):
+    """
+    ``bulk_create`` ``objects`` in chunks of ``batch_size``, one transaction per chunk.
+
+    ``objects`` may be a generator, so at most one chunk is held in memory.
+    ``progress(written, rows_per_second)`` is called after every chunk.
+    Returns the number of rows written.
+    """
+    started = time.perf_counter()
+    written = 0
+    chunk = []
+
+    def flush():
+        nonlocal written, chunk
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        written += len(chunk)
+        chunk = []
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress(written, written / elapsed if elapsed else 0.0)
+
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) >= batch_size:
+            flush()
+    if chunk:
+        flush()
+    return written
+
+
+def seed(dataset, password=None, batch_size=5000, progress=None):
+    """
+    Write ``dataset`` and rebuild the daily rollups.
+
+    With a ``password`` an admin (``dataset.admin_email()``) is created too and
+    every trainer can log in with it. ``progress(label, total)`` may return a
+    callback for :func:`write_batches`. Returns ``{table: rows written}``.
+    """
+    progress = progress or (lambda label, total: None)
+    with transaction.atomic():
+        if password:
+            User.objects.create_user(dataset.admin_email(), 'Synthetic Admin', 'admin', password)
+        trainers = dataset.trainers(password)
+        User.objects.bulk_create(trainers, batch_size=batch_size)
+    # Read the ids back: MySQL's bulk_create does not set primary keys.
+    ids = dict(
+        User.objects.filter(role='trainer', email__endswith=f'@{dataset.domain}').values_list('email', 'id')
+    )
+    trainer_ids = [ids[trainer.email] for trainer in trainers]
+
+    counts = {'trainers': len(trainer_ids)}
+    counts['availabilities'] = write_batches(
+        Availability, dataset.availabilities(trainer_ids), batch_size, progress('availabilities', None)
+    )
+    counts['sessions'] = write_batches(
+        Session, dataset.sessions(trainer_ids), batch_size, progress('sessions', dataset.session_count)
+    )
+    counts['rollups'] = rebuild_rollups()
+    # bulk_create sends no signals, so move the list ETags on explicitly.
+    with transaction.atomic():
+        bump(*user_scopes(), *availability_scopes(), *session_scopes())
+    return counts
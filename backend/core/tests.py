@@ -1,3 +1,1393 @@
-from django.test import TestCase
+import asyncio
+import base64
+import datetime
+import importlib
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from core.authentication import token_cache, token_cache_key
+from core.autoschedule import AutoScheduler
+from core.calendar_feed import make_feed_token
+from core.absence import mark_absent_sessions
+from core.fast_serializers import AvailabilityValuesSerializer, SessionValuesSerializer, UserValuesSerializer
+from core.live_events import ADMIN_CHANNEL, broker, trainer_channel
+from core.models import Availability, Session, SessionRollup, SessionSeries, User, UserAvatar
+from core.recurrence import last_start, occurrences
+from core.rollups import rebuild_rollups
+from core.scheduling import lock_trainers
+from core.renderers import FastJSONRenderer
+from core.response_cache import response_cache
+from core.serializers import AvailabilitySerializer, SessionSerializer, UserSerializer
+from core.session_import import ATOMIC, BEST_EFFORT, SessionImporter, csv_rows
+from core.signed_tokens import check_deny_cache
+from core.synthetic import SyntheticDataset, seed
+
+
+SHARED_AUTH_CACHES = {
+    **settings.CACHES,
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'trainersamay-test-auth'),
+    },
+}
+
+
+@override_settings(CACHES=SHARED_AUTH_CACHES)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache().clear()
+        self.user = User.objects.create_user('trainer@example.com', 'Trainer', 'trainer', 'old-password')
+        self.token = Token.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {self.token.key}'
+
+    def token_queries(self, path='/api/auth/me/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, [q['sql'] for q in queries if 'authtoken_token' in q['sql']]
+
+    def test_warm_cache_makes_no_auth_queries(self):
+        response, cold = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(cold), 1)
+
+        response, warm = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(warm, [])
+
+    def test_deleted_token_is_rejected(self):
+        self.token_queries()
+        self.token.delete()
+        response, _ = self.token_queries()
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_logout_deletes_the_token(self):
+        self.token_queries()
+        response = self.client.post('/api/auth/logout/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.exists())
+        response, _ = self.token_queries()
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_deactivated_user_is_rejected(self):
+        self.token_queries()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.token_queries()
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_password_change_invalidates_cache(self):
+        self.token_queries()
+        response = self.client.patch(
+            f'/api/users/{self.user.id}/change-password/',
+            {'current_password': 'old-password', 'new_password': 'new-password', 'confirm_password': 'new-password'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response, queries = self.token_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_process_local_cache_is_not_used(self):
+        local = {**settings.CACHES, 'auth': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(CACHES=local):
+            self.token_queries()
+            response, queries = self.token_queries()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(queries), 1)
+            self.assertIsNone(token_cache().get(token_cache_key(self.token.key)))
+
+
+@override_settings(AUTH_TOKEN_MODE='signed')
+class SignedTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('signed@example.com', 'Signed', 'trainer', 'password')
+
+    def login(self):
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'signed@example.com', 'password': 'password'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def get(self, path, token):
+        return self.client.get(path, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_login_issues_signed_tokens_without_db_token(self):
+        tokens = self.login()
+        self.assertIn('refreshToken', tokens)
+        self.assertFalse(Token.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get('/api/reports/summary/', tokens['token'])
+        self.assertEqual(response.status_code, 200)
+        # Only the report's own two aggregate queries run; nothing for auth.
+        self.assertEqual(len(queries), 2)
+        self.assertFalse([q for q in queries if 'authtoken' in q['sql']])
+
+        response = self.get('/api/auth/me/', tokens['token'])
+        self.assertEqual(response.json()['email'], 'signed@example.com')
+
+    def test_refresh_rotates_and_logout_revokes(self):
+        tokens = self.login()
+        response = self.client.post(
+            '/api/auth/refresh/', {'refreshToken': tokens['refreshToken']}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        refreshed = response.json()
+
+        reused = self.client.post(
+            '/api/auth/refresh/', {'refreshToken': tokens['refreshToken']}, content_type='application/json'
+        )
+        self.assertIn(reused.status_code, (401, 403))
+
+        self.client.post('/api/auth/logout/', HTTP_AUTHORIZATION=f"Bearer {refreshed['token']}")
+        self.assertIn(self.get('/api/auth/me/', refreshed['token']).status_code, (401, 403))
+
+    def test_password_change_revokes_issued_tokens(self):
+        tokens = self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('changed')
+            self.user.save()
+        self.assertIn(self.get('/api/auth/me/', tokens['token']).status_code, (401, 403))
+
+        # Logging in again straight away, within the same second, works.
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'signed@example.com', 'password': 'changed'},
+            content_type='application/json',
+        )
+        self.assertEqual(self.get('/api/auth/me/', response.json()['token']).status_code, 200)
+
+    def test_role_change_revokes_issued_tokens(self):
+        self.user.role = 'admin'
+        self.user.save()
+        tokens = self.login()
+        self.assertEqual(self.get('/api/cache/stats/', tokens['token']).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'trainer'
+            self.user.save()
+        self.assertIn(self.get('/api/cache/stats/', tokens['token']).status_code, (401, 403))
+        self.assertIn(self.get('/api/auth/me/', tokens['token']).status_code, (401, 403))
+        response = self.client.post(
+            '/api/auth/refresh/', {'refreshToken': tokens['refreshToken']}, content_type='application/json'
+        )
+        self.assertIn(response.status_code, (401, 403))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_refuses_a_process_local_deny_list(self):
+        with self.assertRaises(ImproperlyConfigured):
+            check_deny_cache()
+        with override_settings(AUTH_TOKEN_MODE='db'):
+            check_deny_cache()
+
+    def test_db_mode_saves_read_nothing_extra(self):
+        with override_settings(AUTH_TOKEN_MODE='db'), CaptureQueriesContext(connection) as queries:
+            self.user.save()
+        table = User._meta.db_table
+        self.assertEqual([q for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']], [])
+
+
+class ValuesSerializerTests(TestCase):
+    """The values()-based list serializers must match the DRF serializers exactly."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('lean@example.com', 'Lean \u2028 Trainer', 'trainer', 'pw')
+        self.user.last_login = datetime.datetime(2025, 3, 1, 8, 30, 15, 123456, tzinfo=datetime.timezone.utc)
+        self.user.save()
+        self.user.groups.add(Group.objects.create(name='coaches'))
+        self.user.user_permissions.add(*Permission.objects.order_by('-id')[:3])
+        User.objects.create_user('other@example.com', 'Other', 'admin', 'pw', avatar='https://example.com/a.png')
+        Session.objects.create(
+            trainer=self.user, batch='B1', sessionType='Lab', duration=45, location='R1', status='Scheduled',
+            date=datetime.datetime(2025, 3, 2, 9, 0, 0, 500, tzinfo=datetime.timezone.utc),
+        )
+        Availability.objects.create(
+            trainer=self.user, day='Monday', startTime=datetime.time(9, 0), endTime=datetime.time(17, 30)
+        )
+
+    def assertSameOutput(self, values_serializer, drf_serializer, queryset):
+        lean = values_serializer.serialize(values_serializer.prepare(queryset))
+        full = drf_serializer(queryset, many=True).data
+        self.assertEqual([list(row.items()) for row in lean], [list(row.items()) for row in full])
+        self.assertEqual(FastJSONRenderer().render(lean), FastJSONRenderer().render(full))
+
+    def test_floats(self):
+        values = [0.1, 123.456, 1e15, 0.0001, -2.5, 1e16, 2.5e-05]
+        fast, standard = FastJSONRenderer().render(values), JSONRenderer().render(values)
+        self.assertEqual(json.loads(fast), json.loads(standard))
+        # Only the spelling of floats outside [1e-4, 1e16) may differ.
+        self.assertEqual(fast.split(b',')[:5], standard.split(b',')[:5])
+
+    def test_sessions(self):
+        self.assertSameOutput(SessionValuesSerializer(), SessionSerializer, Session.objects.order_by('id'))
+
+    def test_availabilities(self):
+        self.assertSameOutput(AvailabilityValuesSerializer(), AvailabilitySerializer, Availability.objects.order_by('id'))
+
+    def test_users(self):
+        self.assertSameOutput(UserValuesSerializer(), UserSerializer, User.objects.order_by('id'))
+
+    def test_user_list_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/users/')
+        self.assertEqual(response.status_code, 200)
+
+        for i in range(5):
+            User.objects.create_user(f'extra{i}@example.com', 'Extra', 'trainer', 'pw')
+        with CaptureQueriesContext(connection) as more:
+            response = self.client.get('/api/users/')
+        self.assertEqual(len(response.json()), 7)
+        self.assertEqual(len(more), len(queries))
+
+    def test_sparse_fields_and_trainer_expansion(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/sessions/?fields=date,id&expand=trainer')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{
+            'id': Session.objects.get().id,
+            'date': '2025-03-02T09:00:00.000500Z',
+            'trainer': {'id': self.user.id, 'name': self.user.name, 'email': self.user.email, 'avatar': None},
+        }])
+
+        response = self.client.get('/api/users/?fields=email,groups')
+        self.assertEqual(response.json()[0], {'email': self.user.email, 'groups': [Group.objects.get().id]})
+
+        response = self.client.get('/api/sessions/?fields=nope')
+        self.assertEqual(response.status_code, 400)
+
+    def test_expanded_page_query_count_is_constant(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/sessions/?expand=trainer&limit=50')
+        other = User.objects.get(email='other@example.com')
+        Session.objects.bulk_create([
+            Session(
+                trainer=other, batch='B', sessionType='Lab', duration=30, location='R', status='Scheduled',
+                date=datetime.datetime(2025, 4, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(hours=i),
+            )
+            for i in range(20)
+        ])
+        with CaptureQueriesContext(connection) as more:
+            response = self.client.get('/api/sessions/?expand=trainer&limit=50')
+        self.assertEqual(len(response.json()['results']), 21)
+        self.assertEqual(len(more), len(queries))
+
+
+class SessionImportTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user('import@example.com', 'Importer', 'trainer', 'pw')
+        for day, _ in Availability.DAYS:
+            Availability.objects.create(
+                trainer=self.trainer, day=day, startTime=datetime.time(0, 0), endTime=datetime.time(23, 59)
+            )
+
+    def upload(self, *rows):
+        header = b'trainer,batch,sessionType,date,duration,location,status\n'
+        return [header] + [row.encode() + b'\n' for row in rows]
+
+    def run_import(self, mode):
+        t = self.trainer.id
+        lines = self.upload(
+            f'{t},B1,Lab,2031-03-03T09:00:00Z,60,R1,',
+            f'{t},B2,Lab,2031-03-03T09:30:00Z,60,R1,',  # overlaps the row above
+            f'{t},B3,Lab,2031-03-03T11:00:00Z,60,R1,Cancelled',
+            '999999,B4,Lab,2031-03-03T12:00:00Z,60,R1,',
+            f'{t},B5,Lab,2031-03-03T13:00:00Z,0,R1,',
+            f'{t},B6,Lab,2031-03-03T14:00:00Z,60,R1,',
+        )
+        return SessionImporter(mode, chunk_size=2).run(csv_rows(lines))
+
+    def test_best_effort_skips_failing_rows(self):
+        report = self.run_import(BEST_EFFORT)
+        self.assertEqual((report['received'], report['created'], report['failed']), (6, 3, 3))
+        self.assertEqual([error['line'] for error in report['errors']], [3, 5, 6])
+        self.assertEqual(set(report['errors'][0]['errors']), {'date'})
+        self.assertEqual(
+            sorted(Session.objects.values_list('batch', flat=True)), ['B1', 'B3', 'B6']
+        )
+
+    def test_all_or_nothing_rolls_back(self):
+        report = self.run_import(ATOMIC)
+        self.assertEqual((report['created'], report['failed'], report['committed']), (0, 3, False))
+        self.assertFalse(Session.objects.exists())
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class SessionSeriesTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user('series@example.com', 'Series', 'admin', 'pw')
+        for day, _ in Availability.DAYS:
+            Availability.objects.create(
+                trainer=self.trainer, day=day, startTime=datetime.time(0, 0), endTime=datetime.time(23, 59)
+            )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.trainer).key}'
+        response = self.client.post('/api/series/', {
+            'trainer': self.trainer.id, 'batch': 'S', 'sessionType': 'Lab', 'duration': 60, 'location': 'R1',
+            'start': '2031-03-03T09:00:00Z', 'days': ['Wednesday', 'Monday'], 'count': 6,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.series = SessionSeries.objects.get()
+
+    def rollups(self):
+        return sorted(SessionRollup.objects.filter(count__gt=0).values_list('day', 'status', 'count', 'minutes'))
+
+    def test_occurrences(self):
+        starts = [moment.isoformat() for moment in occurrences(self.series)]
+        self.assertEqual(starts, [
+            '2031-03-03T09:00:00+00:00', '2031-03-05T09:00:00+00:00', '2031-03-10T09:00:00+00:00',
+            '2031-03-12T09:00:00+00:00', '2031-03-17T09:00:00+00:00', '2031-03-19T09:00:00+00:00',
+        ])
+        window = occurrences(
+            self.series, datetime.datetime(2031, 3, 6, tzinfo=datetime.timezone.utc),
+            datetime.datetime(2031, 3, 17, tzinfo=datetime.timezone.utc),
+        )
+        self.assertEqual([moment.day for moment in window], [10, 12])
+        self.assertFalse(Session.objects.exists())
+
+    def test_list_merges_occurrences_and_exceptions(self):
+        self.client.post('/api/sessions/', {
+            'trainer': self.trainer.id, 'batch': 'One-off', 'sessionType': 'Lab', 'duration': 30, 'location': 'R2',
+            'date': '2031-03-04T09:00:00Z', 'status': 'Scheduled',
+        }, content_type='application/json')
+        response = self.client.post('/api/sessions/', {
+            'trainer': self.trainer.id, 'batch': 'S', 'sessionType': 'Lab', 'duration': 60, 'location': 'R9',
+            'date': '2031-03-11T14:00:00Z', 'status': 'Scheduled',
+            'series': self.series.id, 'occurrence': '2031-03-10T09:00:00Z',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        listed = [(row['date'][:13], row['id'] is None) for row in self.client.get('/api/sessions/').json()]
+        self.assertEqual(listed, [
+            ('2031-03-03T09', True), ('2031-03-04T09', False), ('2031-03-05T09', True), ('2031-03-11T14', False),
+            ('2031-03-12T09', True), ('2031-03-17T09', True), ('2031-03-19T09', True),
+        ])
+
+        paged, url = [], '/api/sessions/?limit=2'
+        while url:
+            page = self.client.get(url).json()
+            paged += [(row['date'][:13], row['id'] is None) for row in page['results']]
+            url = page['next']
+        self.assertEqual(paged, listed)
+
+        self.assertEqual(self.client.get('/api/sessions/?status=Completed').json(), [])
+        incremental = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+    def test_occurrences_block_their_slot(self):
+        response = self.client.post('/api/sessions/', {
+            'trainer': self.trainer.id, 'batch': 'B', 'sessionType': 'Lab', 'duration': 60, 'location': 'R1',
+            'date': '2031-03-12T09:30:00Z', 'status': 'Scheduled',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json())
+
+
+class SessionSlotTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user('slots@example.com', 'Slots', 'admin', 'pw')
+        # 2031-03-03 is a Monday.
+        Availability.objects.create(
+            trainer=self.trainer, day='Monday', startTime=datetime.time(9, 0), endTime=datetime.time(17, 0)
+        )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.trainer).key}'
+
+    def book(self, date, duration=60):
+        return self.client.post('/api/sessions/', {
+            'trainer': self.trainer.id, 'batch': 'B', 'sessionType': 'Lab', 'duration': duration, 'location': 'R1',
+            'date': date, 'status': 'Scheduled',
+        }, content_type='application/json')
+
+    def test_overlap_is_rejected(self):
+        self.assertEqual(self.book('2031-03-03T10:00:00Z').status_code, 201)
+        response = self.book('2031-03-03T10:30:00Z')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('overlaps', str(response.json()['date']))
+        self.assertEqual(self.book('2031-03-03T11:00:00Z').status_code, 201)
+
+        moved = Session.objects.get(date__hour=11)
+        response = self.client.patch(
+            f'/api/sessions/{moved.id}/', {'date': '2031-03-03T10:15:00Z'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_outside_availability_is_rejected(self):
+        response = self.book('2031-03-04T10:00:00Z')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('not available on Tuesday', str(response.json()['date']))
+        self.assertEqual(self.book('2031-03-03T16:30:00Z').status_code, 400)
+        self.assertFalse(Session.objects.exists())
+
+    def test_check_locks_the_trainer(self):
+        with mock.patch('core.scheduling.lock_trainers', wraps=lock_trainers) as lock:
+            self.assertEqual(self.book('2031-03-03T10:00:00Z').status_code, 201)
+        lock.assert_called_once_with({self.trainer.id})
+
+
+class SessionRollupTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('rollups@example.com', 'Rollups', 'admin', 'pw')
+        self.other = User.objects.create_user('rollups2@example.com', 'Other', 'trainer', 'pw')
+        for trainer in (self.admin, self.other):
+            for day, _ in Availability.DAYS:
+                Availability.objects.create(
+                    trainer=trainer, day=day, startTime=datetime.time(0, 0), endTime=datetime.time(23, 59)
+                )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+
+    def rollups(self):
+        return sorted(SessionRollup.objects.filter(count__gt=0).values_list(
+            'trainer_id', 'day', 'sessionType', 'status', 'count', 'minutes'
+        ))
+
+    def test_api_writes_match_a_rebuild(self):
+        ids = []
+        for hour, session_type in ((9, 'Lab'), (11, 'Lecture'), (14, 'Lab')):
+            response = self.client.post('/api/sessions/', {
+                'trainer': self.admin.id, 'batch': 'B', 'sessionType': session_type, 'duration': 45,
+                'location': 'R1', 'date': f'2031-05-06T{hour:02}:00:00Z', 'status': 'Scheduled',
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201, response.content)
+            ids.append(response.json()['id'])
+
+        for change in (
+            {'status': 'Completed'},
+            {'trainer': self.other.id},
+            {'date': '2031-05-07T22:00:00Z', 'duration': 90},
+        ):
+            response = self.client.patch(f'/api/sessions/{ids[0]}/', change, content_type='application/json')
+            self.assertEqual(response.status_code, 200, response.content)
+        response = self.client.patch(
+            f'/api/sessions/{ids[1]}/', {'status': 'Cancelled', 'sessionType': 'Lab'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.client.delete(f'/api/sessions/{ids[2]}/').status_code, 204)
+
+        incremental = self.rollups()
+        self.assertEqual(incremental, [
+            (self.admin.id, datetime.date(2031, 5, 6), 'Lab', 'Cancelled', 1, 45),
+            (self.other.id, datetime.date(2031, 5, 7), 'Lab', 'Completed', 1, 90),
+        ])
+        rebuild_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('etag@example.com', 'Etag', 'admin', 'pw')
+        self.other = User.objects.create_user('etag2@example.com', 'Other', 'trainer', 'pw')
+        for trainer in (self.admin, self.other):
+            Availability.objects.create(
+                trainer=trainer, day='Monday', startTime=datetime.time(0, 0), endTime=datetime.time(23, 59)
+            )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.session = Session.objects.create(
+                trainer=self.admin, batch='B', sessionType='Lab', date='2031-03-03T09:00:00Z', duration=60,
+                location='R1', status='Scheduled',
+            )
+
+    def test_validators_and_not_modified(self):
+        url = f'/api/sessions/?trainer={self.admin.id}'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        # Another query string is another representation.
+        self.assertEqual(self.client.get(url + '&status=Scheduled', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stamp_moves_after_writes(self):
+        urls = [f'/api/sessions/?trainer={trainer.id}' for trainer in (self.admin, self.other)] + ['/api/sessions/']
+        etags = [self.client.get(url)['ETag'] for url in urls]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/sessions/{self.session.id}/', {'status': 'Completed'}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(urls[0], HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+        self.assertEqual(self.client.get(urls[1], HTTP_IF_NONE_MATCH=etags[1]).status_code, 304)
+        etags = [self.client.get(url)['ETag'] for url in urls]
+
+        # Reassigning the session changes both trainers' lists.
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/sessions/{self.session.id}/', {'trainer': self.other.id}, content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        for url, etag in zip(urls, etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etag)
+
+    def test_non_canonical_ids_share_the_stamp(self):
+        urls = [f'/api/sessions/?trainer=0{self.admin.id}', f'/api/availabilities/0{self.admin.id}/']
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        self.assertEqual(len(self.client.get(urls[0]).json()), 1)
+        availability = Availability.objects.get(trainer=self.admin)
+        availability.endTime = datetime.time(12, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/sessions/{self.session.id}/', {'status': 'Completed'}, content_type='application/json')
+            availability.save()
+        for url, etag in zip(urls, etags):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200, url)
+        self.assertEqual(self.client.get('/api/sessions/?trainer=x').status_code, 400)
+        self.assertEqual(self.client.get('/api/availabilities/x/').status_code, 400)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache().clear()
+        self.admin = User.objects.create_user('cache@example.com', 'Cache', 'admin', 'pw')
+        self.trainer = User.objects.create_user('cache2@example.com', 'Trainer', 'trainer', 'pw')
+        self.admin_token = Token.objects.create(user=self.admin).key
+        self.trainer_token = Token.objects.create(user=self.trainer).key
+
+    def get(self, url, token=None):
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {token or self.admin_token}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def stats(self, view):
+        response = self.client.get('/api/cache/stats/', HTTP_AUTHORIZATION=f'Token {self.admin_token}')
+        self.assertEqual(response.json()['counters'], 'process')
+        stats = response.json()['views'][view]
+        return stats['hits'], stats['misses']
+
+    def test_availability_writes_invalidate(self):
+        self.assertEqual(self.get('/api/availabilities/'), [])
+        self.assertEqual(self.get('/api/availabilities/'), [])
+        self.assertEqual(self.stats('AvailabilityListController'), (1, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            availability = Availability.objects.create(
+                trainer=self.trainer, day='Monday', startTime=datetime.time(9, 0), endTime=datetime.time(17, 0)
+            )
+        self.assertEqual([row['day'] for row in self.get('/api/availabilities/')], ['Monday'])
+        with self.captureOnCommitCallbacks(execute=True):
+            availability.endTime = datetime.time(12, 0)
+            availability.save()
+        self.assertEqual([row['endTime'] for row in self.get('/api/availabilities/')], ['12:00:00'])
+        with self.captureOnCommitCallbacks(execute=True):
+            availability.delete()
+        self.assertEqual(self.get('/api/availabilities/'), [])
+        self.assertEqual(self.stats('AvailabilityListController'), (1, 4))
+
+    def test_user_writes_invalidate(self):
+        names = lambda: [row['name'] for row in self.get('/api/availabilities/trainers/')]
+        self.assertEqual(names(), ['Trainer'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trainer.name = 'Renamed'
+            self.trainer.save()
+        self.assertEqual(names(), ['Renamed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('cache3@example.com', 'Added', 'trainer', 'pw')
+        self.assertEqual(sorted(names()), ['Added', 'Renamed'])
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(name='Added').delete()
+        self.assertEqual(names(), ['Renamed'])
+        self.assertEqual(self.stats('AllTrainersController'), (0, 4))
+
+    def test_entries_are_split_per_role(self):
+        self.get('/api/availabilities/')
+        self.get('/api/availabilities/', self.trainer_token)
+        self.assertEqual(self.stats('AvailabilityListController'), (0, 2))
+        self.get('/api/availabilities/', self.trainer_token)
+        self.assertEqual(self.stats('AvailabilityListController'), (1, 2))
+
+
+class UserAvatarTests(TestCase):
+    # A 1x1 transparent PNG.
+    PNG = base64.b64decode(
+        'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+    )
+
+    def setUp(self):
+        self.admin = User.objects.create_user('avatar@example.com', 'Avatar', 'admin', 'pw')
+        self.token = Token.objects.create(user=self.admin).key
+
+    def upload(self):
+        response = self.client.patch(
+            f'/api/users/{self.admin.id}/', {'avatar': 'data:image/png;base64,' + base64.b64encode(self.PNG).decode()},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.token}',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['avatar']
+
+    def test_inline_upload_is_stored_and_served(self):
+        url = self.upload()
+        self.admin.refresh_from_db()
+        self.assertIsNone(self.admin.avatar)
+        self.assertEqual(self.admin.avatarVersion, 1)
+        self.assertEqual(bytes(UserAvatar.objects.get(user=self.admin, size='original').data), self.PNG)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.PNG)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        etag = response['ETag']
+        # Sizes without a thumbnail fall back to the original.
+        self.assertEqual(self.client.get(url + '?size=small')['ETag'], etag)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_urls_cannot_be_guessed(self):
+        url = self.upload()
+        self.assertEqual(self.client.get(url.rsplit('/', 1)[0] + '/0').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/users/{self.admin.id}/avatar').status_code, 404)
+        # A new upload moves the URL; the old one stops working.
+        self.assertNotEqual(self.upload(), url)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_migration_moves_inline_avatars(self):
+        migration = importlib.import_module('core.migrations.0008_user_avatar')
+        inline = 'data:image/png;base64,' + base64.b64encode(self.PNG).decode()
+        User.objects.filter(pk=self.admin.pk).update(avatar=inline)
+        broken = User.objects.create_user('broken@example.com', 'Broken', 'trainer', 'pw')
+        User.objects.filter(pk=broken.pk).update(avatar='data:text/plain;base64,AAAA')
+
+        migration.move_inline_avatars(apps, None)
+        self.admin.refresh_from_db()
+        self.assertEqual((self.admin.avatar, self.admin.avatarVersion), (None, 1))
+        self.assertEqual(bytes(UserAvatar.objects.get(user=self.admin, size='original').data), self.PNG)
+        # Unusable values are dropped rather than left inline.
+        self.assertIsNone(User.objects.get(pk=broken.pk).avatar)
+
+        migration.restore_inline_avatars(apps, None)
+        self.assertEqual(User.objects.get(pk=self.admin.pk).avatar, inline)
+
+    def test_migration_moves_oversized_avatars(self):
+        migration = importlib.import_module('core.migrations.0008_user_avatar')
+        huge = self.PNG + bytes(6 * 1024 * 1024)
+        User.objects.filter(pk=self.admin.pk).update(avatar='data:image/png;base64,' + base64.b64encode(huge).decode())
+
+        migration.move_inline_avatars(apps, None)
+        self.admin.refresh_from_db()
+        self.assertEqual((self.admin.avatar, self.admin.avatarVersion), (None, 1))
+        self.assertEqual(bytes(UserAvatar.objects.get(user=self.admin, size='original').data), huge)
+        listed = self.client.get('/api/users/', HTTP_AUTHORIZATION=f'Token {self.token}').json()
+        self.assertFalse(any((row['avatar'] or '').startswith('data:') for row in listed))
+
+    def test_bad_user_ids_are_not_found(self):
+        url = self.upload()
+        for user_id in ('abc', '0', '9' * 30):
+            response = self.client.get(url.replace(f'/users/{self.admin.id}/', f'/users/{user_id}/'))
+            self.assertEqual(response.status_code, 404, user_id)
+
+
+class SessionFilterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('filters@example.com', 'Filters', 'admin', 'pw')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+        # Two sessions a day from 2031-03-01 to 03-05; ties on date are ordered by id.
+        for day in range(1, 6):
+            for hour in (9, 9 if day == 3 else 14):
+                Session.objects.create(
+                    trainer=self.admin, batch=f'{day}-{hour}', sessionType='Lab', duration=60, location='R1',
+                    date=datetime.datetime(2031, 3, day, hour, tzinfo=datetime.timezone.utc), status='Scheduled',
+                )
+
+    def batches(self, query):
+        response = self.client.get(f'/api/sessions/?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [row['batch'] for row in response.json()]
+
+    def test_keyset_pagination(self):
+        everything = self.batches('')
+        self.assertEqual(len(everything), 10)
+        paged, url, pages = [], '/api/sessions/?limit=3', 0
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 3)
+            paged += [row['batch'] for row in page['results']]
+            url, pages = page['next'], pages + 1
+        self.assertEqual((paged, pages), (everything, 4))
+
+        filtered = self.client.get('/api/sessions/?limit=2&from=2031-03-03').json()
+        self.assertEqual([row['batch'] for row in filtered['results']], ['3-9', '3-9'])
+        self.assertIn('from=2031-03-03', filtered['next'])
+
+        self.assertEqual(self.client.get('/api/sessions/?cursor=not-a-cursor').status_code, 400)
+        self.assertEqual(self.client.get('/api/sessions/?limit=0').status_code, 400)
+
+    def test_deep_pages_seek_on_the_date_index(self):
+        first = self.client.get('/api/sessions/?limit=4').json()
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get(first['next']).json()
+        self.assertEqual([row['batch'] for row in page['results']], ['3-9', '3-9', '4-9', '4-14'])
+        if connection.vendor == 'sqlite':
+            sql, = [q['sql'] for q in queries if 'ORDER BY' in q['sql'] and 'trainer_utilization"' in q['sql']]
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' | '.join(row[-1] for row in cursor.fetchall())
+            self.assertIn('utilization_date_id_idx', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_date_window(self):
+        self.assertEqual(self.batches('from=2031-03-04'), ['4-9', '4-14', '5-9', '5-14'])
+        # A plain date as the upper bound covers that whole day.
+        self.assertEqual(self.batches('to=2031-03-02'), ['1-9', '1-14', '2-9', '2-14'])
+        self.assertEqual(
+            self.batches('from=2031-03-02T12:00:00Z&to=2031-03-04T12:00:00Z'), ['2-14', '3-9', '3-9', '4-9']
+        )
+        self.assertEqual(self.batches('from=2031-03-06'), [])
+        response = self.client.get('/api/sessions/?from=March')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('from', response.json())
+
+    def test_bad_trainer_is_rejected(self):
+        for url in (
+            '/api/sessions/', '/api/series/', '/api/reports/summary/', '/api/reports/sessions.csv',
+            '/api/scheduling/free-slots/?duration=30&',
+        ):
+            for value in ('abc', '0', '-1', '1.5'):
+                query = f'{url}{"&" if "?" in url else "?"}trainer={value}'
+                response = self.client.get(query)
+                self.assertEqual(response.status_code, 400, query)
+                self.assertIn('trainer', response.json(), query)
+        self.assertEqual(len(self.batches(f'trainer={self.admin.id}')), 10)
+
+
+class SyntheticDatasetTests(TestCase):
+    def test_seed_without_returned_primary_keys(self):
+        # MySQL's bulk_create leaves primary keys unset.
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            counts = seed(SyntheticDataset(3, 60, days_back=70, days_ahead=0))
+        self.assertEqual((counts['trainers'], counts['sessions']), (3, 60))
+        trainers = User.objects.filter(role='trainer')
+        self.assertEqual(Availability.objects.filter(trainer__in=trainers).count(), counts['availabilities'])
+        self.assertEqual(
+            sorted(Session.objects.values_list('trainer__email', flat=True).distinct()),
+            [f'trainer{i}@synthetic.invalid' for i in range(3)],
+        )
+
+    def test_full_capacity_stays_inside_the_span(self):
+        dataset = SyntheticDataset(4, 0, days_back=70, days_ahead=0, seed=7)
+        room = [len(plan.weekly_slots()) * 10 for plan in dataset.plans]
+        self.assertGreater(len(set(room)), 1)  # Uneven trainers; an even split would overflow one.
+        dataset.session_count = dataset.capacity()
+        self.assertEqual(dataset.quotas(), room)
+
+        dataset.session_count = dataset.capacity() - 25
+        quotas = dataset.quotas()
+        self.assertEqual(sum(quotas), dataset.session_count)
+        self.assertTrue(all(quota <= limit for quota, limit in zip(quotas, room)))
+
+        sessions = list(dataset.sessions(range(4)))
+        self.assertEqual(len(sessions), dataset.session_count)
+        first, last = min(s.date for s in sessions), max(s.date for s in sessions)
+        self.assertLess(last - first, datetime.timedelta(weeks=10))
+        self.assertEqual(len({(s.trainer_id, s.date) for s in sessions}), len(sessions))
+        with self.assertRaises(ValueError):
+            dataset.session_count = dataset.capacity() + 1
+            next(dataset.sessions(range(4)))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class SessionBulkUpdateTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('bulk@example.com', 'Bulk', 'admin', 'pw')
+        self.other = User.objects.create_user('other-bulk@example.com', 'Other', 'trainer', 'pw')
+        for trainer in (self.admin, self.other):
+            for day, _ in Availability.DAYS:
+                Availability.objects.create(
+                    trainer=trainer, day=day, startTime=datetime.time(8, 0), endTime=datetime.time(18, 0)
+                )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+        for hour in (9, 10, 11):
+            self.client.post('/api/sessions/', {
+                'trainer': self.admin.id, 'batch': 'B', 'sessionType': 'Lab', 'duration': 60, 'location': 'Hall',
+                'date': f'2031-03-05T{hour}:00:00Z', 'status': 'Scheduled',
+            }, content_type='application/json')
+        self.client.post('/api/sessions/', {
+            'trainer': self.other.id, 'batch': 'C', 'sessionType': 'Lab', 'duration': 60, 'location': 'Lab',
+            'date': '2031-03-05T14:30:00Z', 'status': 'Scheduled',
+        }, content_type='application/json')
+
+    def bulk(self, criteria, changes):
+        return self.client.post(
+            '/api/sessions/bulk/', {'filter': criteria, 'changes': changes}, content_type='application/json'
+        )
+
+    def rollups(self):
+        return sorted(SessionRollup.objects.filter(count__gt=0).values_list('trainer_id', 'day', 'status', 'count'))
+
+    def test_shift_and_move(self):
+        response = self.bulk({'location': 'Hall', 'dateFrom': '2031-03-05', 'dateTo': '2031-03-05'}, {'shiftMinutes': 30})
+        self.assertEqual(response.json(), {'updated': 3, 'materialized': 0, 'total': 3})
+        self.assertEqual(
+            sorted(Session.objects.filter(batch='B').values_list('date__hour', 'date__minute')),
+            [(9, 30), (10, 30), (11, 30)],
+        )
+
+        response = self.bulk({'batch': 'B'}, {'trainer': self.other.id, 'shiftMinutes': 240})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([c['date'][:29] for c in response.json()['conflicts']], ['Trainer already has a session'])  # Only 14:30 overlaps.
+        self.assertFalse(Session.objects.filter(trainer=self.other, batch='B').exists())
+
+        response = self.bulk({'batch': 'B'}, {'trainer': self.other.id, 'status': 'Completed'})
+        self.assertEqual(response.json()['updated'], 3)
+        incremental = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.rollups())
+
+    def test_shift_series_by_a_week(self):
+        response = self.client.post('/api/series/', {
+            'trainer': self.admin.id, 'batch': 'S', 'sessionType': 'Lab', 'duration': 60, 'location': 'Hall',
+            'start': '2031-04-07T09:00:00Z', 'days': ['Monday'], 'count': 4,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        # Store the second occurrence as an exception, so stored and untouched occurrences move together.
+        self.bulk({'batch': 'S', 'dateFrom': '2031-04-14', 'dateTo': '2031-04-14'}, {'status': 'Completed'})
+
+        response = self.bulk({'batch': 'S'}, {'shiftMinutes': 7 * 24 * 60})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json(), {'updated': 1, 'materialized': 3, 'total': 4})
+        self.assertEqual(
+            sorted(Session.objects.filter(batch='S').values_list('date__month', 'date__day')),
+            [(4, 14), (4, 21), (4, 28), (5, 5)],
+        )
+
+    def test_requires_filter_and_change(self):
+        response = self.bulk({}, {})
+        self.assertEqual(set(response.json()), {'filter', 'changes'})
+
+
+class TrainerCalendarFeedTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user('feed@example.com', 'Feed', 'admin', 'pw')
+        for day, _ in Availability.DAYS:
+            Availability.objects.create(
+                trainer=self.trainer, day=day, startTime=datetime.time(0, 0), endTime=datetime.time(23, 59)
+            )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.trainer).key}'
+        start = (timezone.now() + datetime.timedelta(days=2)).replace(hour=9, minute=0, second=0, microsecond=0)
+        self.client.post('/api/sessions/', {
+            'trainer': self.trainer.id, 'batch': 'B', 'sessionType': 'Lab', 'duration': 60, 'location': 'Hall, 1',
+            'date': start.isoformat(), 'status': 'Scheduled',
+        }, content_type='application/json')
+        self.client.post('/api/series/', {
+            'trainer': self.trainer.id, 'batch': 'S', 'sessionType': 'Lecture', 'duration': 30, 'location': 'R1',
+            'start': (start + datetime.timedelta(hours=3)).isoformat(), 'days': ['Monday'], 'count': 3,
+        }, content_type='application/json')
+        self.url = self.client.get(f'/api/trainers/{self.trainer.id}/calendar/').json()['url']
+
+    def test_feed_revalidates_and_rerenders_changed_events(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION='')
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 4)
+        self.assertIn('LOCATION:Hall\\, 1', body)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+            self.assertEqual(self.client.get(self.url).content, response.content)
+        self.assertEqual(len(queries), 2)
+
+        session = Session.objects.get(batch='B')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/sessions/{session.id}/', {'status': 'Cancelled'}, content_type='application/json')
+        changed = self.client.get(self.url).content.decode()
+        self.assertIn('STATUS:CANCELLED', changed)
+        unchanged = lambda text: [block for block in text.split('BEGIN:VEVENT') if 'series-' in block]
+        self.assertEqual(unchanged(changed), unchanged(body))  # Same DTSTAMP: served from the event cache.
+
+    def test_calendar_clients_are_answered(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='text/calendar')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        revalidated = self.client.get(self.url, HTTP_ACCEPT='text/calendar', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+    def test_token_is_checked(self):
+        self.assertEqual(self.client.get(f'/api/trainers/{self.trainer.id}/calendar.ics?token=x').status_code, 403)
+        other = User.objects.create_user('other-feed@example.com', 'Other', 'trainer', 'pw')
+        wrong = self.client.get(f'/api/trainers/{self.trainer.id}/calendar.ics', {'token': make_feed_token(other)})
+        self.assertEqual(wrong.status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trainer.set_password('new-password')
+            self.trainer.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class LiveEventTests(TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.trainer = User.objects.create_user('live@example.com', 'Live', 'trainer', 'pw')
+        self.other = User.objects.create_user('live-other@example.com', 'Other', 'trainer', 'pw')
+
+    def subscribe(self, *channels):
+        async def subscribe():
+            return broker().subscribe(list(channels))
+        subscription = self.loop.run_until_complete(subscribe())
+        self.addCleanup(subscription.close)
+        return subscription
+
+    def received(self, subscription):
+        async def drain():
+            events = []
+            while (event := await subscription.get(timeout=0.01)) is not None:
+                events.append(event)
+            return events
+        return self.loop.run_until_complete(drain())
+
+    def test_writes_reach_trainer_and_admin_streams(self):
+        mine, theirs, admin = (
+            self.subscribe(trainer_channel(self.trainer.id)), self.subscribe(trainer_channel(self.other.id)),
+            self.subscribe(ADMIN_CHANNEL),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            session = Session.objects.create(
+                trainer=self.trainer, batch='B', sessionType='Lab', duration=30, location='R',
+                date=timezone.now() - datetime.timedelta(hours=2), status='Scheduled',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_absent_sessions()
+
+        events = self.received(mine)
+        self.assertEqual([(e['type'], e['action']) for e in events], [('session', 'saved'), ('sessions', 'changed')])
+        self.assertEqual(events[0]['session']['id'], session.id)
+        self.assertEqual(events[1]['reason'], 'absence-sweep')
+        self.assertEqual(self.received(admin), events)
+        self.assertEqual(self.received(theirs), [])
+
+    def test_stream_needs_asgi(self):
+        self.assertEqual(self.client.get('/api/events/').status_code, 501)
+
+
+class SessionExportTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('export@example.com', 'Exporter', 'admin', 'pw')
+        self.trainer = User.objects.create_user('export-trainer@example.com', 'Export Trainer', 'trainer', 'pw')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+        for day, status in ((3, 'Completed'), (4, 'Absent')):
+            Session.objects.create(
+                trainer=self.trainer, batch='B', sessionType='Lab', duration=60, location='Hall', status=status,
+                date=datetime.datetime(2031, 3, day, 9, 0, tzinfo=datetime.timezone.utc),
+            )
+
+    def test_export_answers_its_own_media_type(self):
+        response = self.client.get('/api/reports/sessions.csv', HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'Date,Time,Trainer,Batch,Session Type,Status,Duration,Location,Notes')
+        self.assertEqual(
+            lines[1:],
+            ['2031-03-04,09:00,Export Trainer,B,Lab,Absent,60,Hall,Trainer was absent.',
+             '2031-03-03,09:00,Export Trainer,B,Lab,Completed,60,Hall,'],
+        )
+
+
+class AbsenceSweepTests(TestCase):
+    def setUp(self):
+        self.trainer = User.objects.create_user('sweep@example.com', 'Sweep', 'trainer', 'pw')
+        self.now = timezone.now()
+
+    def session(self, minutes_ago, duration):
+        return Session.objects.create(
+            trainer=self.trainer, batch='B', sessionType='Lab', duration=duration, location='R', status='Scheduled',
+            date=self.now - datetime.timedelta(minutes=minutes_ago),
+        )
+
+    def statuses(self, *sessions):
+        return [Session.objects.get(pk=session.pk).status for session in sessions]
+
+    def test_duration_cutoff(self):
+        sessions = [
+            self.session(25, 40),   # Waits 20 minutes: overdue.
+            self.session(25, 60),   # Waits 30 minutes: not yet.
+            self.session(29, 120),  # Waits at most 30 minutes: not yet.
+            self.session(31, 120),  # Past the longest wait whatever the duration.
+            self.session(-5, 30),   # Not started.
+        ]
+        self.assertEqual(mark_absent_sessions(now=self.now), 2)
+        self.assertEqual(self.statuses(*sessions), ['Absent', 'Scheduled', 'Scheduled', 'Absent', 'Scheduled'])
+
+    def test_finished_series_are_expanded_once(self):
+        series = SessionSeries(
+            trainer=self.trainer, batch='S', sessionType='Lab', duration=60, location='R', days=['Monday'], count=4,
+            start=self.now - datetime.timedelta(weeks=10),
+        )
+        series.lastStart = last_start(series)
+        series.save()
+
+        self.assertEqual(mark_absent_sessions(now=self.now), 4)
+        self.assertEqual(Session.objects.filter(series=series, status='Absent').count(), 4)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(mark_absent_sessions(now=self.now), 0)
+        # The finished series is skipped: no exception lookup, no mark update.
+        self.assertFalse([
+            q for q in queries if '"series_id"' in q['sql'] or q['sql'].startswith('UPDATE "trainer_utilization_series"')
+        ])
+
+        # Deleting an exception brings its occurrence back for the next sweep.
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.trainer).key}'
+        self.client.delete(f'/api/sessions/{Session.objects.filter(series=series).first().id}/')
+        self.assertEqual(mark_absent_sessions(now=self.now), 1)
+
+    def test_loop_catches_sessions_added_in_the_past(self):
+        late = []
+
+        def sleep(seconds):
+            if late:
+                raise KeyboardInterrupt
+            late.append(self.session(24 * 60, 60))  # Created between sweeps, a day in the past.
+
+        with mock.patch('core.management.commands.mark_absent_sessions.time.sleep', side_effect=sleep):
+            call_command('mark_absent_sessions', '--loop', '--interval', '0', stdout=mock.MagicMock())
+        self.assertEqual(self.statuses(*late), ['Absent'])
+
+
+class WeeklyAvailabilityTests(TestCase):
+    WEEK = [
+        {'day': 'Monday', 'startTime': '09:00', 'endTime': '17:00'},
+        {'day': 'Tuesday', 'startTime': '10:00', 'endTime': '14:00'},
+        {'day': 'Friday', 'startTime': '08:00', 'endTime': '12:00'},
+    ]
+
+    def setUp(self):
+        self.trainer = User.objects.create_user('week@example.com', 'Week', 'admin', 'pw')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.trainer).key}'
+        self.url = f'/api/availabilities/{self.trainer.id}/'
+
+    def put(self, week):
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.put(self.url, week, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [q['sql'] for q in queries if q['sql'].split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')]
+
+    def rows(self):
+        return dict(Availability.objects.filter(trainer=self.trainer).values_list('day', 'id'))
+
+    def test_unchanged_week_writes_nothing(self):
+        self.assertTrue(self.put(self.WEEK))
+        before = self.rows()
+        self.assertEqual(self.put(self.WEEK), [])
+        self.assertEqual(self.rows(), before)
+
+    def test_only_changed_days_are_written(self):
+        self.put(self.WEEK)
+        before = self.rows()
+        week = [dict(self.WEEK[0], endTime='18:00'), self.WEEK[1]]
+        writes = self.put(week)
+        self.assertTrue(any('trainer_availability' in sql for sql in writes))
+        self.assertEqual(self.rows(), {'Monday': before['Monday'], 'Tuesday': before['Tuesday']})
+        self.assertEqual(
+            Availability.objects.get(trainer=self.trainer, day='Monday').endTime, datetime.time(18, 0)
+        )
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('dash@example.com', 'Admin', 'admin', 'pw')
+        self.alpha = User.objects.create_user('dash-a@example.com', 'Alpha', 'trainer', 'pw')
+        self.beta = User.objects.create_user('dash-b@example.com', 'Beta', 'trainer', 'pw')
+        today = timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time.min))
+        self.tomorrow = today + datetime.timedelta(days=1)
+        for trainer, offset, batch in (
+            (self.alpha, datetime.timedelta(days=1, hours=10), 'A-soon'),
+            (self.beta, datetime.timedelta(days=1, hours=11), 'B-soon'),
+            (self.alpha, datetime.timedelta(days=40), 'A-later'),
+            (self.alpha, datetime.timedelta(days=-1), 'A-past'),
+        ):
+            self.add_session(trainer, today + offset, batch)
+        series = SessionSeries(
+            trainer=self.alpha, batch='A-weekly', sessionType='Lab', duration=60, location='R1',
+            start=self.tomorrow + datetime.timedelta(hours=8), days=[self.tomorrow.strftime('%A')], count=2,
+        )
+        series.lastStart = last_start(series)
+        series.save()
+        for trainer in (self.alpha, self.beta):
+            Availability.objects.create(
+                trainer=trainer, day='Monday', startTime=datetime.time(9, 0), endTime=datetime.time(17, 0)
+            )
+
+    @staticmethod
+    def add_session(trainer, date, batch):
+        Session.objects.create(
+            trainer=trainer, batch=batch, sessionType='Lab', duration=60, location='R1', status='Scheduled', date=date,
+        )
+
+    def dashboard(self, user, query=''):
+        self.client.force_login(user)
+        response = self.client.get(f'/api/dashboard/{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_shape(self):
+        data = self.dashboard(self.admin)
+        self.assertEqual(list(data), ['sessions', 'trainers', 'availabilities'])
+        self.assertEqual(
+            [row['batch'] for row in data['sessions']], ['A-weekly', 'A-soon', 'B-soon', 'A-weekly'],
+        )
+        self.assertIsNone(data['sessions'][0]['id'])
+        self.assertEqual(set(data['sessions'][1]), set(SessionSerializer().fields))
+        self.assertEqual(
+            data['trainers'],
+            [
+                {'id': user.id, 'name': user.name, 'email': user.email, 'role': 'trainer', 'is_active': True}
+                for user in (self.alpha, self.beta)
+            ],
+        )
+        self.assertEqual(len(data['availabilities']), 2)
+        self.assertEqual(len(self.dashboard(self.admin, '?days=60')['sessions']), 5)
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/api/dashboard/?days=soon').status_code, 400)
+
+    def test_trainers_see_only_themselves(self):
+        data = self.dashboard(self.beta)
+        self.assertEqual([row['batch'] for row in data['sessions']], ['B-soon'])
+        self.assertEqual([row['id'] for row in data['trainers']], [self.beta.id])
+        self.assertEqual({row['trainer'] for row in data['availabilities']}, {self.beta.id})
+        self.assertEqual(
+            [row['batch'] for row in self.dashboard(self.alpha)['sessions']], ['A-weekly', 'A-soon', 'A-weekly'],
+        )
+
+    def test_query_count_is_bounded(self):
+        self.client.force_login(self.admin)
+        # Session and user lookups for the login, then sessions, series,
+        # series exceptions, roster and availabilities.
+        with self.assertNumQueries(7):
+            self.client.get('/api/dashboard/')
+        for hour in range(12, 18):
+            self.add_session(self.beta, self.tomorrow + datetime.timedelta(hours=hour), f'B-{hour}')
+        with self.assertNumQueries(7):
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(len(response.json()['sessions']), 10)
+
+
+class ReportSummaryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('summary@example.com', 'Admin', 'admin', 'pw')
+        self.alpha = User.objects.create_user('summary-a@example.com', 'Alpha', 'trainer', 'pw')
+        self.beta = User.objects.create_user('summary-b@example.com', 'Beta', 'trainer', 'pw')
+        for trainer, day, status, duration in (
+            (self.alpha, datetime.date(2031, 3, 3), 'Completed', 60),
+            (self.alpha, datetime.date(2031, 3, 4), 'Completed', 90),
+            (self.alpha, datetime.date(2031, 3, 5), 'Cancelled', 60),
+            (self.alpha, datetime.date(2031, 4, 1), 'Scheduled', 45),
+            (self.beta, datetime.date(2031, 3, 10), 'Absent', 30),
+            (self.beta, datetime.date(2031, 4, 2), 'Completed', 120),
+        ):
+            Session.objects.create(
+                trainer=trainer, batch='B', sessionType='Lab', duration=duration, location='R1', status=status,
+                date=datetime.datetime.combine(day, datetime.time(10), tzinfo=datetime.timezone.utc),
+            )
+        rebuild_rollups()
+
+    def summary(self, user, query=''):
+        token = Token.objects.get_or_create(user=user)[0].key
+        response = self.client.get(f'/api/reports/summary/{query}', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    @staticmethod
+    def counts(row):
+        return (
+            row['total'], {status: n for status, n in row['byStatus'].items() if n},
+            row['scheduledMinutes'], row['deliveredMinutes'],
+        )
+
+    def test_aggregates(self):
+        report = self.summary(self.admin)
+        self.assertEqual(self.counts(report['totals']), (
+            6, {'Completed': 3, 'Cancelled': 1, 'Scheduled': 1, 'Absent': 1}, 345, 270,
+        ))
+        self.assertEqual(list(report['totals']['byStatus']), ['Scheduled', 'Started', 'Completed', 'Cancelled', 'Absent'])
+        self.assertEqual(
+            [(row['trainerName'], *self.counts(row)) for row in report['byTrainer']],
+            [
+                ('Alpha', 4, {'Completed': 2, 'Cancelled': 1, 'Scheduled': 1}, 195, 150),
+                ('Beta', 2, {'Absent': 1, 'Completed': 1}, 150, 120),
+            ],
+        )
+        self.assertEqual(
+            [(row['period'], *self.counts(row)) for row in report['byPeriod']],
+            [
+                ('2031-03-01', 4, {'Completed': 2, 'Cancelled': 1, 'Absent': 1}, 180, 150),
+                ('2031-04-01', 2, {'Scheduled': 1, 'Completed': 1}, 165, 120),
+            ],
+        )
+
+    def test_filters_and_scoping(self):
+        self.assertEqual(self.counts(self.summary(self.admin, '?status=Completed')['totals'])[0], 3)
+        self.assertEqual(self.counts(self.summary(self.admin, '?from=2031-04-01')['totals'])[0], 2)
+        weekly = self.summary(self.admin, '?period=week&to=2031-03-05')['byPeriod']
+        self.assertEqual([(row['period'], row['total']) for row in weekly], [('2031-03-03', 3)])
+
+        own = self.summary(self.alpha)
+        self.assertEqual([row['trainerName'] for row in own['byTrainer']], ['Alpha'])
+        self.assertEqual(self.counts(own['totals'])[0], 4)
+
+
+class FreeSlotTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user('slots-admin@example.com', 'Admin', 'admin', 'pw')
+        self.alpha = User.objects.create_user('alpha@example.com', 'Alpha', 'trainer', 'pw')
+        self.beta = User.objects.create_user('beta@example.com', 'Beta', 'trainer', 'pw')
+        # 2031-03-03 is a Monday.
+        Availability.objects.create(
+            trainer=self.alpha, day='Monday', startTime=datetime.time(9, 0), endTime=datetime.time(12, 0)
+        )
+        Availability.objects.create(
+            trainer=self.beta, day='Monday', startTime=datetime.time(10, 0), endTime=datetime.time(11, 0)
+        )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=admin).key}'
+
+    def book(self, hour, duration=60, status='Scheduled'):
+        Session.objects.create(
+            trainer=self.alpha, batch='B', sessionType='Lab', duration=duration, location='R1', status=status,
+            date=datetime.datetime(2031, 3, 3, hour, tzinfo=datetime.timezone.utc),
+        )
+
+    def slots(self, query='', trainer=True):
+        if trainer:
+            query += f'&trainer={self.alpha.id}'
+        response = self.client.get(f'/api/scheduling/free-slots/?duration=60&from=2031-03-03&to=2031-03-03{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(slot['start'][11:16], slot['end'][11:16], slot['trainerName']) for slot in response.json()['slots']]
+
+    def test_slots_stay_inside_availability(self):
+        self.assertEqual(self.slots(), [
+            ('09:00', '10:00', 'Alpha'), ('10:00', '11:00', 'Alpha'), ('11:00', '12:00', 'Alpha'),
+        ])
+        # A window opening mid-step rounds up to the next step; 11:15 would end past 12:00.
+        self.assertEqual(
+            [start for start, _, _ in self.slots('&from=2031-03-03T09:10:00Z')], ['09:15', '10:15']
+        )
+        self.assertEqual(self.slots('&step=60&from=2031-03-03T09:10:00Z'), [
+            ('10:00', '11:00', 'Alpha'), ('11:00', '12:00', 'Alpha'),
+        ])
+        # A window that is shorter than the duration holds nothing.
+        response = self.client.get('/api/scheduling/free-slots/?duration=240&from=2031-03-03&to=2031-03-03')
+        self.assertEqual(response.json()['slots'], [])
+
+    def test_back_to_back_sessions(self):
+        self.book(9)
+        self.assertEqual([start for start, _, _ in self.slots()], ['10:00', '11:00'])
+        self.book(10)
+        self.assertEqual([start for start, _, _ in self.slots()], ['11:00'])
+        self.book(11)
+        self.assertEqual(self.slots('&duration=15'), [])
+
+    def test_cancelled_sessions_do_not_block(self):
+        self.book(9, duration=180, status='Cancelled')
+        self.assertEqual([start for start, _, _ in self.slots()], ['09:00', '10:00', '11:00'])
+        self.book(10, duration=30)
+        self.assertEqual([start for start, _, _ in self.slots()], ['09:00', '10:30'])
+
+    def test_every_trainer_by_start_then_name(self):
+        self.assertEqual(self.slots(trainer=False), [
+            ('09:00', '10:00', 'Alpha'), ('10:00', '11:00', 'Alpha'), ('10:00', '11:00', 'Beta'),
+            ('11:00', '12:00', 'Alpha'),
+        ])
+        self.assertEqual(len(self.slots('&limit=2', trainer=False)), 2)
+
+
+class AutoAssignTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('assign@example.com', 'Assigner', 'admin', 'pw')
+        self.trainers = [
+            User.objects.create_user(f'assign-{i}@example.com', f'Trainer {i}', 'trainer', 'pw') for i in range(2)
+        ]
+        for trainer in self.trainers:
+            for day, _ in Availability.DAYS:
+                Availability.objects.create(
+                    trainer=trainer, day=day, startTime=datetime.time(8, 0), endTime=datetime.time(18, 0)
+                )
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.admin).key}'
+        self.nine = datetime.datetime(2031, 3, 5, 9, 0, tzinfo=datetime.timezone.utc)
+
+    def request(self, hours=1, **extra):
+        return {
+            'batch': 'B', 'sessionType': 'Lab', 'location': 'Hall', 'duration': 60,
+            'windowStart': self.nine, 'windowEnd': self.nine + datetime.timedelta(hours=hours), **extra,
+        }
+
+    def test_greedy_spreads_load_and_repair_ejects(self):
+        ids = [trainer.id for trainer in self.trainers]
+        assignments, unassigned = AutoScheduler(ids, [self.request(), self.request()]).solve()
+        self.assertEqual(unassigned, [])
+        self.assertEqual(sorted(trainer_id for trainer_id, _ in assignments.values()), ids)
+
+        # The open request holds the only trainer the shortlisted one accepts;
+        # repair moves it to the other trainer.
+        first, second = ids
+        scheduler = AutoScheduler(ids, [self.request(), self.request(trainers=[first])])
+        scheduler.assign(0, first, self.nine)
+        self.assertTrue(scheduler.repair(1))
+        self.assertEqual(scheduler.assignments, {0: (second, self.nine), 1: (first, self.nine)})
+
+    def post(self, commit, count=1):
+        payload = {'commit': commit, 'requests': [self.request(hours=8) for _ in range(count)]}
+        return self.client.post('/api/scheduling/auto-assign/', payload, content_type='application/json')
+
+    def test_dry_run_then_commit(self):
+        response = self.post(commit=False, count=3)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['assignments']), 3)
+        self.assertFalse(Session.objects.exists())
+
+        response = self.post(commit=True, count=3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(response.json()['created']), sorted(Session.objects.values_list('id', flat=True)))
+        self.assertEqual(Session.objects.count(), 3)
+
+    def test_commit_conflict_writes_nothing(self):
+        Session.objects.create(
+            trainer=self.trainers[0], batch='X', sessionType='Lab', duration=60, location='Hall',
+            date=self.nine, status='Scheduled',
+        )
+        stale = ({0: (self.trainers[0].id, self.nine)}, [])  # Computed before that session was booked.
+        with mock.patch.object(AutoScheduler, 'solve', return_value=stale):
+            response = self.post(commit=True)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Session.objects.count(), 1)
+
+    def test_hundreds_of_requests_solve_quickly(self):
+        for i in range(10):
+            trainer = User.objects.create_user(f'assign-more-{i}@example.com', f'More {i}', 'trainer', 'pw')
+            Availability.objects.bulk_create([
+                Availability(trainer=trainer, day=day, startTime=datetime.time(8, 0), endTime=datetime.time(18, 0))
+                for day, _ in Availability.DAYS
+            ])
+        requests = []
+        for i in range(300):
+            start = self.nine + datetime.timedelta(days=i % 5, hours=(i // 5) % 8 - 1)
+            requests.append({
+                **self.request(), 'windowStart': start, 'windowEnd': start + datetime.timedelta(hours=2),
+            })
+        response = self.client.post(
+            '/api/scheduling/auto-assign/', {'requests': requests}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['unassigned'], [])
+        self.assertLess(response.json()['solveMs'], 1000)
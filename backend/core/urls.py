@@ -2,35 +2,60 @@ from django.urls import path
 
 from core.auth_token import ObtainAuthTokenByEmail
 from core.controllers.UserController import CurrentUserController 
-from core.controllers.AuthController import AuthController 
+from core.controllers.AuthController import AuthController, TokenRefreshController, LogoutController
 from core.controllers.UserController import (
     UserListCreateController,
     UserDetailController,
     UserPasswordChangeController,
+    UserAvatarController,
 )
-from core.controllers.SessionController import SessionListCreateController, SessionDetailController
+from core.controllers.SessionController import (
+    SessionListCreateController,
+    SessionDetailController,
+    SessionImportController,
+    SessionBulkUpdateController,
+)
+from core.controllers.SeriesController import SeriesListCreateController, SeriesDetailController
 from core.controllers.AvailabilityController import (
     AvailabilityListController,
     TrainerAvailabilitiesController,
     AllTrainersController
 )
-from core.controllers.TrainerController import TrainerListController
+from core.controllers.TrainerController import (
+    TrainerListController,
+    TrainerCalendarTokenController,
+    TrainerCalendarFeedController,
+)
+from core.controllers.DashboardController import DashboardController
+from core.controllers.SchedulingController import FreeSlotsController, AutoAssignController
+from core.controllers.ReportController import SessionExportController, ReportSummaryController
+from core.controllers.CacheController import CacheStatsController
+from core.controllers.EventController import EventStreamController
 
 urlpatterns = [
     # Authentication endpoints
     path('auth/login/', AuthController.as_view(), name='auth_login'),
     path('auth/token/', ObtainAuthTokenByEmail.as_view(), name='api_token_auth'),
     path('auth/me/', CurrentUserController.as_view(), name='current_user'),
+    path('auth/refresh/', TokenRefreshController.as_view(), name='auth_refresh'),
+    path('auth/logout/', LogoutController.as_view(), name='auth_logout'),
 
     # User endpoints
     path('users/', UserListCreateController.as_view(), name='user_list_create'),
     path('users/<str:id>/', UserDetailController.as_view(), name='user_detail'),
+    path('users/<str:id>/avatar/<str:key>', UserAvatarController.as_view(), name='user_avatar'),
     path('users/<str:id>/change-password/', UserPasswordChangeController.as_view(), name='user_change_password'),
 
     # Session endpoints
     path('sessions/', SessionListCreateController.as_view(), name='session_list_create'),
+    path('sessions/import/', SessionImportController.as_view(), name='session_import'),
+    path('sessions/bulk/', SessionBulkUpdateController.as_view(), name='session_bulk_update'),
     path('sessions/<str:id>/', SessionDetailController.as_view(), name='session_detail'),
 
+    # Recurring series endpoints
+    path('series/', SeriesListCreateController.as_view(), name='series_list_create'),
+    path('series/<str:id>/', SeriesDetailController.as_view(), name='series_detail'),
+
     # Availability endpoints
     path('availabilities/', AvailabilityListController.as_view(), name='availability_list'),
     path('availabilities/trainers/', AllTrainersController.as_view(), name='all_trainers'),
@@ -38,4 +63,23 @@ urlpatterns = [
 
     # Trainer endpoints
     path('trainers/', TrainerListController.as_view(), name='trainer_list'),
+    path('trainers/<str:id>/calendar/', TrainerCalendarTokenController.as_view(), name='trainer_calendar_token'),
+    path('trainers/<str:id>/calendar.ics', TrainerCalendarFeedController.as_view(), name='trainer_calendar_feed'),
+
+    # Dashboard endpoints
+    path('dashboard/', DashboardController.as_view(), name='dashboard'),
+
+    # Scheduling endpoints
+    path('scheduling/free-slots/', FreeSlotsController.as_view(), name='scheduling_free_slots'),
+    path('scheduling/auto-assign/', AutoAssignController.as_view(), name='scheduling_auto_assign'),
+
+    # Report endpoints
+    path('reports/sessions.csv', SessionExportController.as_view(), name='report_sessions_csv'),
+    path('reports/summary/', ReportSummaryController.as_view(), name='report_summary'),
+
+    # Cache endpoints
+    path('cache/stats/', CacheStatsController.as_view(), name='cache_stats'),
+
+    # Live update endpoints
+    path('events/', EventStreamController.as_view(), name='event_stream'),
 ]
\ No newline at end of file
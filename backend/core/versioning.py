@@ -0,0 +1,113 @@
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from core.models import CollectionVersion
+
+
+def session_scopes(*trainer_ids):
+    return ['sessions'] + [f'sessions:trainer:{trainer_id}' for trainer_id in trainer_ids]
+
+
+def availability_scopes(*trainer_ids):
+    return ['availabilities'] + [f'availabilities:trainer:{trainer_id}' for trainer_id in trainer_ids]
+
+
+def user_scopes():
+    return ['users']
+
+
+def bump(*scopes):
+    """
+    Advance the version of each scope once the current transaction commits.
+
+    Bumping after commit means a reader can at worst see new data under the
+    old stamp and fetch it again after the bump; it can never cache old data
+    under a new stamp.
+    """
+    scopes = sorted(set(scopes))
+    if scopes:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    now = timezone.now()
+    for scope in scopes:
+        updated = CollectionVersion.objects.filter(scope=scope).update(version=F('version') + 1, updatedAt=now)
+        if updated:
+            continue
+        try:
+            with transaction.atomic():
+                CollectionVersion.objects.create(scope=scope, version=1, updatedAt=now)
+        except IntegrityError:
+            CollectionVersion.objects.filter(scope=scope).update(version=F('version') + 1, updatedAt=now)
+
+
+def current(scopes):
+    """``{scope: (version, updatedAt)}`` for ``scopes`` in one query; unknown scopes are at version 0."""
+    stamps = dict.fromkeys(scopes, (0, None))
+    for scope, version, updated_at in CollectionVersion.objects.filter(scope__in=scopes).values_list(
+        'scope', 'version', 'updatedAt'
+    ):
+        stamps[scope] = (version, updated_at)
+    return stamps
+
+
+class NotModified(Exception):
+    """Raised from ``initial`` to skip the handler when the client's copy is current."""
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with strong ETag / Last-Modified validators and 304s.
+
+    Validators come from the version stamps of ``version_scopes()`` plus the
+    query string and negotiated format, never from the response body. The
+    check runs after authentication and before the handler, so a request whose
+    ``If-None-Match`` still matches costs one small query and no serialization.
+
+    ``Last-Modified`` is an HTTP date and so truncated to whole seconds: two
+    writes within one second leave it unchanged. The ETag moves with every
+    bump and is the authoritative validator; ``If-None-Match`` takes
+    precedence when a client sends both, so clients should revalidate with it.
+    """
+
+    def version_scopes(self):
+        raise NotImplementedError
+
+    def conditional_validators(self, request):
+        stamps = current(self.version_scopes())
+        parts = [type(self).__name__, request.accepted_renderer.format, request.GET.urlencode()]
+        parts += [f'{scope}={version}' for scope, (version, _) in sorted(stamps.items())]
+        etag = '"%s"' % hashlib.sha1('|'.join(parts).encode()).hexdigest()
+        modified = [updated_at for _, updated_at in stamps.values() if updated_at is not None]
+        last_modified = int(max(modified).timestamp()) if modified else None
+        return etag, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional = None
+        if request.method in ('GET', 'HEAD'):
+            self.conditional = etag, last_modified = self.conditional_validators(request)
+            if get_conditional_response(request, etag=etag, last_modified=last_modified) is not None:
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return HttpResponseNotModified()
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'conditional', None) and response.status_code in (200, 304):
+            etag, last_modified = self.conditional
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            response['Cache-Control'] = 'private, no-cache'
+        return response
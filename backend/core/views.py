@@ -3,7 +3,6 @@ from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth.hashers import check_password
-from rest_framework.authtoken.models import Token
 
 from .models import User
 from .serializers import (
@@ -11,6 +10,7 @@ from .serializers import (
     UserCreateSerializer,
     ChangePasswordSerializer
 )
+from .signed_tokens import issue_tokens
 
 # --- User List & Create ---
 class UserListCreateAPIView(generics.ListCreateAPIView):
@@ -53,11 +53,10 @@ class LoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
         user_data = UserSerializer(user).data
 
         return Response({
             "message": "Login successful",
-            "token": token.key,
+            **issue_tokens(user),
             "user": user_data
         }, status=status.HTTP_200_OK)